@@ -1,33 +1,63 @@
 """
 Remote Patient Monitoring (RPM) IoT Agent – Flask backend.
 Mock IoT stream, threshold-based alerts, emergency workflow.
+
+    python app.py                      # development: one process, Flask dev server
+    gunicorn -c gunicorn.conf.py       # production: ingestion process + N API workers
 """
 import logging
+import os
 from flask import Flask
 from flask_cors import CORS
 
 from config import Config
-from routes import main_bp, vitals_bp, alerts_bp, thresholds_bp, emergency_bp, predict_bp, diet_bp
+from routes import (
+    main_bp, vitals_bp, alerts_bp, thresholds_bp, emergency_bp, predict_bp, diet_bp, histogram_bp, front_bp,
+    metrics_bp, install_metrics, risk_bp, install_responses,
+)
 from services.mock_stream import mock_stream_service
 from services.alert_engine import alert_engine
-from services.emergency_workflow import emergency_workflow
+from services.alert_store import AlertLog
+from services.serving import SERVE_ROLES, start_services
+from services.shared_state import SharedState
+from services.vitals_rollup import vitals_rollups
+from services.vitals_log import open_vitals_log
+from services.heart_risk_model import load_model
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def _on_reading(reading):
-    alert_engine.evaluate(reading)
-
-
-def _on_critical(alert):
-    emergency_workflow.trigger(alert=alert, source="critical_alert")
-
-
 def create_app(config=None):
+    """
+    Build the app for the configured SERVE_ROLE (see services/serving.py).
+    Background services are not started here; call start_services(app).
+    """
     app = Flask(__name__)
     app.config.from_object(config or Config)
     CORS(app, origins=app.config.get("CORS_ORIGINS") if isinstance(app.config.get("CORS_ORIGINS"), list) else "*")
+    role = app.config.get("SERVE_ROLE", "standalone")
+    if role not in SERVE_ROLES:
+        raise ValueError(f"SERVE_ROLE must be one of {SERVE_ROLES}, got {role!r}")
+    install_metrics(app)
+    install_responses(app)
+    if role == "api":
+        # stateless worker: hot reads from shared memory, stateful requests proxied
+        app.extensions["shared_state"] = SharedState.attach(app.config["SHARED_STATE_NAME"])
+        for bp in (main_bp, metrics_bp, front_bp, diet_bp):
+            app.register_blueprint(bp)
+        load_model()
+        return app
+    if role == "ingest":
+        # the single writer: rings and the alert snapshot live in the shared segment
+        shared = app.extensions["shared_state"] = SharedState.attach(app.config["SHARED_STATE_NAME"])
+        mock_stream_service.store.bind(shared.allocate)
+        alert_engine.set_mirror(shared.publish_alerts)
+    alert_engine.store.configure(
+        max_age_ms=int(app.config["ALERT_RETENTION_HOURS"] * 3_600_000),
+        max_alerts=app.config["ALERT_MAX_RETAINED"],
+        archive=AlertLog(app.config["ALERT_LOG_DIR"]) if app.config.get("ALERT_LOG_DIR") else None,
+    )
     app.register_blueprint(main_bp)
     app.register_blueprint(vitals_bp)
     app.register_blueprint(alerts_bp)
@@ -35,20 +65,22 @@ def create_app(config=None):
     app.register_blueprint(emergency_bp)
     app.register_blueprint(predict_bp)
     app.register_blueprint(diet_bp)
+    app.register_blueprint(histogram_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(risk_bp)
+    load_model()
+    if app.config.get("VITALS_LOG_DIR"):
+        log = open_vitals_log(app.config["VITALS_LOG_DIR"], app.config.get("VITALS_LOG_FLUSH_INTERVAL", 1.0))
+        if not log.running:  # warm-start once per process
+            loaded = log.warm_start(mock_stream_service.store, vitals_rollups)
+            log.start()
+            logger.info("Vitals log at %s; warm-started %d readings.", log.root, loaded)
     return app
 
 
 app = create_app()
 
 
-@app.before_request
-def ensure_stream_started():
-    if not mock_stream_service._running:
-        alert_engine.set_on_critical(_on_critical)
-        mock_stream_service.start(on_reading=_on_reading)
-        logger.info("Mock IoT vitals stream started.")
-
-
 if __name__ == "__main__":
     port = Config.PORT
     print(f"\n--- RPM Backend Starting ---")
@@ -56,4 +88,7 @@ if __name__ == "__main__":
     print(f"API Health:   http://localhost:{port}/api/health")
     print(f"Index:        http://localhost:{port}/")
     print(f"----------------------------\n")
+    if not Config.DEBUG or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_services(app)  # in debug mode, only in the reloader's serving child
+    # development server; production: gunicorn -c gunicorn.conf.py (see services/serving.py)
     app.run(host="0.0.0.0", port=port, debug=Config.DEBUG, threaded=True)
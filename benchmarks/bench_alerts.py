@@ -0,0 +1,89 @@
+"""
+Alert evaluation throughput: scalar AlertEngine.evaluate() loop vs evaluate_batch()
+(threshold, temporal and baseline-anomaly layers; the two paths must produce identical alerts).
+
+    python -m benchmarks.bench_alerts [--sizes 1000 10000 100000] [--patients 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from services.alert_engine import AlertEngine
+from services.vitals_store import VITAL_FIELDS
+
+
+def make_block(n: int, n_patients: int, seed: int = 0) -> dict:
+    """Columnar block where a minority of readings breach a threshold."""
+    rng = np.random.default_rng(seed)
+    ids = np.array([f"p{i}" for i in range(n_patients)], dtype=object)
+    start = 1_700_000_000_000
+    return {
+        "patientId": ids[rng.integers(0, n_patients, size=n)].tolist(),
+        "timestamp": start + np.arange(n, dtype=np.int64) * 1000 // n_patients,  # ~1 Hz per patient
+        "heartRate": rng.integers(52, 124, size=n).astype(np.float64),
+        "systolic": rng.integers(100, 184, size=n).astype(np.float64),
+        "diastolic": rng.integers(62, 100, size=n).astype(np.float64),
+        "bloodOxygen": rng.integers(91, 101, size=n).astype(np.float64),
+        "temperature": np.round(rng.uniform(36.2, 37.4, size=n), 1),
+        "respiratoryRate": rng.integers(12, 21, size=n).astype(np.float64),
+    }
+
+
+def block_to_readings(block: dict) -> list:
+    n = len(block["heartRate"])
+    cols = {k: (v.tolist() if isinstance(v, np.ndarray) else v) for k, v in block.items()}
+    return [
+        {"patientId": cols["patientId"][i], "timestamp": cols["timestamp"][i], **{f: cols[f][i] for f in VITAL_FIELDS}}
+        for i in range(n)
+    ]
+
+
+def _comparable(alerts: list) -> list:
+    """Alerts minus evaluation time and store id, which differ between engines."""
+    return [{k: v for k, v in a.items() if k not in ("timestamp", "id")} for a in alerts]
+
+
+def run(sizes, n_patients: int) -> list:
+    results = []
+    for n in sizes:
+        block = make_block(n, n_patients)
+        readings = block_to_readings(block)
+
+        scalar_engine = AlertEngine()
+        t0 = time.perf_counter()
+        scalar_alerts = []
+        for r in readings:
+            scalar_alerts.extend(scalar_engine.evaluate(r))
+        scalar_s = time.perf_counter() - t0
+
+        batch_engine = AlertEngine()
+        t0 = time.perf_counter()
+        batch_alerts = batch_engine.evaluate_batch(block)
+        batch_s = time.perf_counter() - t0
+
+        if _comparable(scalar_alerts) != _comparable(batch_alerts):
+            raise AssertionError(f"batch alerts differ from scalar alerts at n={n}")
+        results.append({
+            "readings": n,
+            "alerts": len(batch_alerts),
+            "scalar_readings_per_s": n / scalar_s,
+            "batch_readings_per_s": n / batch_s,
+            "speedup": scalar_s / batch_s,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--patients", type=int, default=1_000)
+    args = parser.parse_args()
+    print(f"{'readings':>10} {'alerts':>8} {'scalar r/s':>14} {'batch r/s':>14} {'speedup':>8}")
+    for r in run(args.sizes, args.patients):
+        print(f"{r['readings']:>10} {r['alerts']:>8} {r['scalar_readings_per_s']:>14,.0f} "
+              f"{r['batch_readings_per_s']:>14,.0f} {r['speedup']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Per-patient baseline anomaly scoring at fleet scale: a simulated fleet (default
+10k patients at 1 Hz) is fed one tick per simulated second, through
+PatientBaselines alone and through the whole AlertEngine. The run keeps up
+when the busy time per simulated second stays below one second on this core.
+A smaller fleet also checks that evaluate() and evaluate_batch() agree.
+
+    python -m benchmarks.bench_anomaly [--patients 10000] [--rate 1.0] [--seconds 120]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_alerts import _comparable
+from services.alert_engine import AlertEngine, PatientBaselines
+from services.fleet_simulator import FleetSimulator
+
+START_MS = 1_700_000_000_000
+CHECK_PATIENTS = 200
+# Well above the simulator's default so a two-minute run contains episodes to detect
+BENCH_ANOMALY_RATE = 50.0
+
+
+def _ticks(n_patients: int, rate_hz: float, seconds: int, seed: int, anomaly_rate: float):
+    """(columns, patients in an episode) for each simulated second."""
+    sim = FleetSimulator(n_patients, rate_hz=rate_hz, seed=seed, anomaly_rate=anomaly_rate, start_ms=START_MS)
+    for k in range(1, seconds + 1):
+        block = sim.advance(START_MS + k * 1000)
+        in_episode = {p for ids in sim.active_episodes().values() for p in ids}
+        yield block.to_batch().columns(), in_episode
+
+
+def run(n_patients: int = 10_000, rate_hz: float = 1.0, seconds: int = 120, seed: int = 7,
+        anomaly_rate: float = BENCH_ANOMALY_RATE) -> dict:
+    ticks = list(_ticks(n_patients, rate_hz, seconds, seed, anomaly_rate))
+    readings = sum(len(cols["timestamp"]) for cols, _ in ticks)
+
+    baselines = PatientBaselines()
+    tick_s = []
+    alerted, episode_patients, outside = set(), set(), 0
+    for k, (cols, in_episode) in enumerate(ticks):
+        t0 = time.perf_counter()
+        hits = baselines.evaluate_batch(cols, START_MS + k * 1000)
+        tick_s.append(time.perf_counter() - t0)
+        episode_patients |= in_episode
+        for _, alert in hits:
+            alerted.add(alert["patientId"])
+            outside += alert["patientId"] not in in_episode
+
+    engine = AlertEngine()
+    t0 = time.perf_counter()
+    for cols, _ in ticks:
+        engine.evaluate_batch(cols)
+    engine_s = time.perf_counter() - t0
+
+    busy = sum(tick_s)
+    return {
+        "patients": n_patients,
+        "readings": readings,
+        "baseline_readings_per_s": readings / busy,
+        "baseline_tick_ms": busy / seconds * 1000,
+        "baseline_tick_p99_ms": float(np.percentile(tick_s, 99)) * 1000,
+        "engine_readings_per_s": readings / engine_s,
+        "engine_tick_ms": engine_s / seconds * 1000,
+        "realtime_load": engine_s / seconds,  # < 1: the whole alert engine keeps up with the fleet
+        "episode_patients": len(episode_patients),
+        "episode_patients_alerted": len(episode_patients & alerted),
+        "alerts_outside_episodes": outside,
+    }
+
+
+def check_equivalence(seconds: int = 120, seed: int = 7) -> int:
+    """Scalar vs batch AlertEngine over a small fleet; returns the alert count."""
+    scalar_engine, batch_engine = AlertEngine(), AlertEngine()
+    scalar_alerts, batch_alerts = [], []
+    for cols, _ in _ticks(CHECK_PATIENTS, 1.0, seconds, seed, BENCH_ANOMALY_RATE * 20):
+        batch_alerts.extend(batch_engine.evaluate_batch(cols))
+        for i in range(len(cols["timestamp"])):
+            reading = {"patientId": cols["patientId"][i], "timestamp": int(cols["timestamp"][i])}
+            for vital, col in cols.items():
+                if vital not in reading:
+                    reading[vital] = float(col[i])
+            scalar_alerts.extend(scalar_engine.evaluate(reading))
+    if _comparable(scalar_alerts) != _comparable(batch_alerts):
+        raise AssertionError("batch alerts differ from scalar alerts")
+    return len(batch_alerts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--rate", type=float, default=1.0, help="readings per patient per second")
+    parser.add_argument("--seconds", type=int, default=120, help="simulated seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--anomaly-rate", type=float, default=BENCH_ANOMALY_RATE, help="episodes per patient per day")
+    args = parser.parse_args()
+    print(f"scalar/batch check: {check_equivalence(seed=args.seed)} identical alerts")
+    r = run(args.patients, args.rate, args.seconds, args.seed, args.anomaly_rate)
+    for key, value in r.items():
+        print(f"  {key:<28} {value:>14,.2f}" if isinstance(value, float) else f"  {key:<28} {value:>14}")
+    verdict = "keeps up" if r["realtime_load"] < 1 else "FALLS BEHIND"
+    print(f"{verdict}: {r['patients']:,} patients at {args.rate:g} Hz use {r['realtime_load']:.1%} of one core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Reader/writer contention: one ingestion thread appending while many dashboard
+threads poll latest, history and recent alerts. Compares the lock-free store
+against a single-lock baseline (the previous design, which built history
+dicts while holding the writer's lock). Reader threads here are CPU-bound,
+so the writer's max latency mostly reflects CPython GIL scheduling across
+that many runnable threads; p50/p99 and throughput show the locking effect.
+
+    python -m benchmarks.bench_contention [--readers 0 4 16 64] [--duration 2] [--patients 1000]
+"""
+import argparse
+import random
+import threading
+import time
+
+import numpy as np
+
+from services.alert_engine import AlertEngine
+from services.vitals_store import VitalsStore, columns_to_readings
+
+
+class GlobalLockStore(VitalsStore):
+    """Baseline: every read and write holds one store-wide lock."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def append(self, patient_id, reading):
+        with self._lock:
+            super().append(patient_id, reading)
+
+    def latest(self, patient_id):
+        with self._lock:
+            return super().latest(patient_id)
+
+    def history(self, patient_id, limit=50):
+        with self._lock:
+            ring = self._patients.get(patient_id)
+            if ring is None:
+                return []
+            return columns_to_readings(patient_id, *ring.window(limit))
+
+
+def _reading(pid: str, ts: int, rng: random.Random) -> dict:
+    return {
+        "patientId": pid,
+        "timestamp": ts,
+        "heartRate": rng.randint(55, 125),
+        "systolic": rng.randint(100, 150),
+        "diastolic": rng.randint(62, 95),
+        "bloodOxygen": rng.randint(93, 100),
+        "temperature": round(rng.uniform(36.2, 37.4), 1),
+        "respiratoryRate": rng.randint(12, 20),
+    }
+
+
+def run_once(store_cls, n_readers: int, duration: float, n_patients: int) -> dict:
+    store = store_cls()
+    engine = AlertEngine(buffer_size=200, max_age_ms=10 ** 12)
+    pids = [f"p{i}" for i in range(n_patients)]
+    rng = random.Random(0)
+    for pid in pids:
+        for k in range(store.capacity):
+            store.append(pid, _reading(pid, k, rng))
+    stop = threading.Event()
+    reader_ops = [0] * n_readers
+    latencies = []
+
+    def writer():
+        wrng = random.Random(1)
+        ts = store.capacity
+        readings = [_reading(pids[i % n_patients], 0, wrng) for i in range(4096)]
+        i = 0
+        while not stop.is_set():
+            r = readings[i % len(readings)]
+            r["timestamp"] = ts
+            t0 = time.perf_counter()
+            store.append(r["patientId"], r)
+            if i % 64 == 0:
+                engine.evaluate(r)
+            latencies.append(time.perf_counter() - t0)
+            i += 1
+            ts += 1
+
+    def reader(k: int):
+        rrng = random.Random(100 + k)
+        ops = 0
+        while not stop.is_set():
+            pid = pids[rrng.randrange(n_patients)]
+            store.latest(pid)
+            store.history(pid, 50)
+            engine.get_recent(20)
+            ops += 3
+        reader_ops[k] = ops
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(k,)) for k in range(n_readers)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    lat = np.array(latencies) * 1e6
+    return {
+        "readers": n_readers,
+        "writer_appends_per_s": len(latencies) / duration,
+        "writer_p50_us": float(np.percentile(lat, 50)),
+        "writer_p99_us": float(np.percentile(lat, 99)),
+        "writer_max_us": float(lat.max()),
+        "reader_ops_per_s": sum(reader_ops) / duration,
+    }
+
+
+def run(readers, duration: float, n_patients: int) -> list:
+    results = []
+    for n in readers:
+        for name, cls in (("global-lock", GlobalLockStore), ("lock-free", VitalsStore)):
+            results.append({"store": name, **run_once(cls, n, duration, n_patients)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, nargs="+", default=[0, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=2.0)
+    parser.add_argument("--patients", type=int, default=1000)
+    args = parser.parse_args()
+    print(f"{'store':>12} {'readers':>7} {'appends/s':>11} {'p50 us':>8} {'p99 us':>9} {'max us':>9} {'reads/s':>10}")
+    for r in run(args.readers, args.duration, args.patients):
+        print(f"{r['store']:>12} {r['readers']:>7} {r['writer_appends_per_s']:>11,.0f} {r['writer_p50_us']:>8.1f} "
+              f"{r['writer_p99_us']:>9.1f} {r['writer_max_us']:>9.0f} {r['reader_ops_per_s']:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
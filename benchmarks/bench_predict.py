@@ -0,0 +1,94 @@
+"""
+Heart-risk scoring throughput: per-request sklearn path vs the fused NumPy
+path (scalar and batched).
+
+    python -m benchmarks.bench_predict [--sizes 100 1000 10000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from services import heart_risk_model as hrm
+
+
+def make_payloads(n: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "age": int(rng.integers(25, 85)),
+            "sex": int(rng.integers(0, 2)),
+            "cholesterol": int(rng.integers(150, 320)),
+            "bp": int(rng.integers(100, 180)),
+            "thalachh": int(rng.integers(90, 200)),
+            "fbs": bool(rng.integers(0, 2)),
+            "smoking": bool(rng.integers(0, 2)),
+            "chest_pain": bool(rng.integers(0, 2)),
+        }
+        for _ in range(n)
+    ]
+
+
+def sklearn_pair(artifact):
+    """Rebuild the scikit-learn scaler + model the artifact was exported from."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    scaler.mean_, scaler.scale_ = artifact.mean, artifact.scale
+    scaler.var_ = artifact.scale ** 2
+    scaler.n_features_in_ = len(artifact.feature_names)
+    model = LogisticRegression()
+    model.coef_ = artifact.coef.reshape(1, -1)
+    model.intercept_ = np.array([artifact.intercept])
+    model.classes_ = np.array([0, 1])
+    return model, scaler
+
+
+def sklearn_per_request(model, scaler, payload: dict) -> float:
+    """The original path: featurize, scaler.transform, model.predict_proba per call."""
+    x = hrm.payload_to_features(payload)
+    return float(model.predict_proba(scaler.transform(x))[0, 1])
+
+
+def run(sizes) -> list:
+    model, scaler = sklearn_pair(hrm.get_artifact())  # exclude model loading from the timings
+    results = []
+    for n in sizes:
+        payloads = make_payloads(n)
+
+        t0 = time.perf_counter()
+        ref = [sklearn_per_request(model, scaler, p) for p in payloads]
+        sklearn_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        scalar = [hrm.predict_proba(p) for p in payloads]
+        scalar_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batch = hrm.predict_proba_batch(payloads)
+        batch_s = time.perf_counter() - t0
+
+        if not (np.allclose(ref, scalar) and np.allclose(ref, batch)):
+            raise AssertionError("fused path disagrees with sklearn")
+        results.append({
+            "payloads": n,
+            "sklearn_per_s": n / sklearn_s,
+            "fused_scalar_per_s": n / scalar_s,
+            "fused_batch_per_s": n / batch_s,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    args = parser.parse_args()
+    print(f"{'payloads':>9} {'sklearn/s':>12} {'fused/s':>12} {'batch/s':>12}")
+    for r in run(args.sizes):
+        print(f"{r['payloads']:>9} {r['sklearn_per_s']:>12,.0f} {r['fused_scalar_per_s']:>12,.0f} "
+              f"{r['fused_batch_per_s']:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
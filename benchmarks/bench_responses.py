@@ -0,0 +1,104 @@
+"""
+Response encoding for the high-volume endpoints: a full /api/vitals/history
+page and an alert store query page, encoded with the stdlib json module (the
+old jsonify) vs the fast encoder, as rows vs columnar vs msgpack, plus the
+alert page spliced from its stored encodings. Reports bytes before and after
+gzip and encodes per second. The columnar and rows encodings are checked to
+decode to the same values.
+
+    python -m benchmarks.bench_responses [--alerts 500] [--iterations 2000]
+"""
+import argparse
+import gzip
+import json
+import time
+
+from services.alert_store import AlertStore
+from services.encoding import (
+    GZIP_LEVEL, dumps_json, dumps_msgpack, json_array, loads_json, msgpack, orjson, records_to_columns,
+)
+from services.mock_stream import _generate_one_reading
+from services.vitals_store import VitalsStore
+
+HISTORY_LIMIT = 100
+PATIENT_ID = "bench"
+
+
+def _rate(fn, iterations: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - t0)
+
+
+def _stdlib(obj) -> bytes:
+    return json.dumps(obj, sort_keys=True).encode()
+
+
+def make_history() -> VitalsStore:
+    store = VitalsStore()
+    for i in range(HISTORY_LIMIT):
+        reading = _generate_one_reading(PATIENT_ID)
+        reading["timestamp"] += i * 1000
+        store.append(PATIENT_ID, reading)
+    return store
+
+
+def make_alerts(n: int) -> AlertStore:
+    store = AlertStore()
+    store.add_many([{
+        "type": "heartRate", "message": f"High heart rate: {130 + i % 40} BPM", "severity": "critical",
+        "timestamp": 1_700_000_000_000 + i * 1000, "value": 130 + i % 40, "threshold": 120,
+        "patientId": f"p{i % 50}",
+    } for i in range(n)])
+    return store
+
+
+def run(n_alerts: int = 500, iterations: int = 2000) -> dict:
+    store = make_history()
+    rows = store.history(PATIENT_ID, HISTORY_LIMIT)
+    if loads_json(dumps_json(store.history_columns(PATIENT_ID, HISTORY_LIMIT))) != {
+        **records_to_columns(rows), "patientId": PATIENT_ID,
+    }:
+        raise AssertionError("history_columns differs from history")
+    alerts = make_alerts(n_alerts)
+    if loads_json(json_array(alerts.query(limit=n_alerts, raw=True))) != alerts.query(limit=n_alerts):
+        raise AssertionError("raw alert splice differs from the decoded query")
+
+    cases = {
+        "history_stdlib": lambda: _stdlib(store.history(PATIENT_ID, HISTORY_LIMIT)),
+        "history_rows": lambda: dumps_json(store.history(PATIENT_ID, HISTORY_LIMIT)),
+        "history_columnar": lambda: dumps_json(store.history_columns(PATIENT_ID, HISTORY_LIMIT)),
+        "alerts_stdlib": lambda: _stdlib(alerts.query(limit=n_alerts)),
+        "alerts_rows": lambda: dumps_json(alerts.query(limit=n_alerts)),
+        "alerts_spliced": lambda: json_array(alerts.query(limit=n_alerts, raw=True)),
+    }
+    if msgpack is not None:
+        cases["history_msgpack"] = lambda: dumps_msgpack(store.history(PATIENT_ID, HISTORY_LIMIT))
+        cases["history_columnar_msgpack"] = lambda: dumps_msgpack(store.history_columns(PATIENT_ID, HISTORY_LIMIT))
+        cases["alerts_msgpack"] = lambda: dumps_msgpack(alerts.query(limit=n_alerts))
+
+    result = {"orjson": orjson is not None, "msgpack": msgpack is not None}
+    for name, fn in cases.items():
+        body = fn()
+        n = iterations if name.startswith("history") else max(10, iterations // 10)
+        result[f"{name}_bytes"] = len(body)
+        result[f"{name}_gzip_bytes"] = len(gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0))
+        result[f"{name}_per_s"] = _rate(fn, n)
+    body = cases["alerts_spliced"]()
+    result["gzip_alerts_per_s"] = _rate(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), 200)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=500, help="alerts per query page")
+    parser.add_argument("--iterations", type=int, default=2000, help="history encodes per case (alerts: a tenth)")
+    args = parser.parse_args()
+    r = run(args.alerts, args.iterations)
+    for key, value in r.items():
+        print(f"  {key:<38} {value:>14,.2f}" if isinstance(value, float) else f"  {key:<38} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Continuous risk scoring at fleet scale: RiskScorer.observe() over a window of
+readings and score() over every patient, vs building one /predict payload
+dict per patient and scoring them with predict_proba_batch (the two must give
+the same probabilities). A final pass raises every patient's systolic and heart
+rate and checks that no score goes down.
+
+    python -m benchmarks.bench_risk [--patients 100000] [--readings-per-patient 10] [--passes 5]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from services.heart_risk_model import predict_proba_batch
+from services.risk_scorer import RiskScorer
+from services.vitals_store import VITAL_FIELDS
+
+
+def make_profiles(n_patients: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    flags = rng.random((n_patients, 8)) < 0.2
+    names = ("fbs", "diabetes", "obesity", "shortness_of_breath", "chest_pain", "sweating", "stress", "smoking")
+    ages = rng.integers(25, 90, size=n_patients).tolist()
+    sexes = rng.integers(0, 2, size=n_patients).tolist()
+    cholesterol = rng.integers(150, 320, size=n_patients).tolist()
+    return [
+        {"age": a, "sex": s, "cholesterol": c, **dict(zip(names, f))}
+        for a, s, c, f in zip(ages, sexes, cholesterol, flags.tolist())
+    ]
+
+
+def make_window(n_patients: int, per_patient: int, seed: int = 0) -> tuple[list, np.ndarray]:
+    """patient ids and values[vital, row] for per_patient readings from every patient."""
+    rng = np.random.default_rng(seed)
+    n = n_patients * per_patient
+    ids = [f"p{i}" for i in range(n_patients)] * per_patient
+    values = np.full((len(VITAL_FIELDS), n), np.nan)
+    values[VITAL_FIELDS.index("heartRate")] = rng.integers(55, 160, size=n)
+    values[VITAL_FIELDS.index("systolic")] = rng.integers(100, 185, size=n)
+    return ids, values
+
+
+def run(n_patients: int = 100_000, per_patient: int = 10, passes: int = 5) -> dict:
+    profiles = make_profiles(n_patients)
+    ids, values = make_window(n_patients, per_patient)
+    scorer = RiskScorer()
+    for pid, profile in zip(ids[:n_patients], profiles):
+        scorer.set_profile(pid, profile)
+
+    observe_s, score_s = [], []
+    for _ in range(passes):
+        t0 = time.perf_counter()
+        scorer.observe(ids, values)
+        observe_s.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        scorer.score()
+        score_s.append(time.perf_counter() - t0)
+
+    # the same pass through per-patient payload dicts
+    t0 = time.perf_counter()
+    sys_ = values[VITAL_FIELDS.index("systolic")]
+    bp = np.bincount(np.arange(len(ids)) % n_patients, weights=sys_, minlength=n_patients) / per_patient
+    payloads = [dict(p, bp=b) for p, b in zip(profiles, bp.tolist())]
+    expected = predict_proba_batch(payloads)
+    payload_s = time.perf_counter() - t0
+    got = np.array([scorer.get(f"p{i}")["probability"] for i in range(n_patients)])
+    if not np.allclose(got, np.round(expected, 4), atol=1e-4):
+        raise AssertionError("RiskScorer probabilities differ from the payload path")
+
+    # higher systolic and heart rate must never lower a score
+    raised = values.copy()
+    for vital in ("systolic", "heartRate"):
+        raised[VITAL_FIELDS.index(vital)] += 20
+    scorer.observe(ids, raised)
+    scorer.score()
+    after = np.array([scorer.get(f"p{i}")["probability"] for i in range(n_patients)])
+    if (after < got).any():
+        raise AssertionError(f"{int((after < got).sum())} scores fell when systolic and heart rate rose")
+
+    return {
+        "patients": n_patients,
+        "readings_per_pass": len(ids),
+        "observe_readings_per_s": len(ids) / min(observe_s),
+        "score_ms": min(score_s) * 1000,
+        "score_patients_per_s": n_patients / min(score_s),
+        "payload_path_ms": payload_s * 1000,
+        "tiers": scorer.tier_counts(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--readings-per-patient", type=int, default=10, help="readings per patient per pass")
+    parser.add_argument("--passes", type=int, default=5)
+    args = parser.parse_args()
+    r = run(args.patients, args.readings_per_patient, args.passes)
+    for key, value in r.items():
+        print(f"  {key:<24} {value:>14,.2f}" if isinstance(value, float) else f"  {key:<24} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Threshold lookup cost with and without per-patient overrides, and the cost
+of publishing a single-patient or cohort update on top of a full table.
+
+    python -m benchmarks.bench_thresholds [--patients 100000] [--lookups 200000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from services.threshold_profiles import ThresholdProfiles
+
+
+def _lookup_ns(profiles: ThresholdProfiles, ids: list) -> float:
+    table = profiles.table
+    t0 = time.perf_counter()
+    for pid in ids:
+        table.for_patient(pid)
+    return (time.perf_counter() - t0) / len(ids) * 1e9
+
+
+def run(n_patients: int, n_lookups: int, n_updates: int = 200) -> dict:
+    rng = np.random.default_rng(0)
+    ids = [f"p{i}" for i in rng.integers(0, n_patients, size=n_lookups)]
+
+    profiles = ThresholdProfiles()
+    empty_ns = _lookup_ns(profiles, ids)
+
+    t0 = time.perf_counter()
+    profiles.set_patients({f"p{i}": {"heartRateHigh": 110 + i % 40} for i in range(n_patients)})
+    compile_s = time.perf_counter() - t0
+    profiles.set_cohort("cardiac", {"spo2Low": 90})
+    profiles.assign_cohort([f"p{i}" for i in range(0, n_patients, 3)], "cardiac")
+    full_ns = _lookup_ns(profiles, ids)
+
+    t0 = time.perf_counter()
+    for i in range(n_updates):
+        profiles.set_patient(f"p{i}", {"systolicHigh": 170 + i % 7})
+    update_ms = (time.perf_counter() - t0) / n_updates * 1e3
+    t0 = time.perf_counter()
+    profiles.set_cohort("cardiac", {"heartRateLow": 45})
+    cohort_update_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    profiles.table.batch_thresholds(ids)
+    batch_s = time.perf_counter() - t0
+    return {
+        "patients": n_patients,
+        "lookup_ns_no_overrides": empty_ns,
+        "lookup_ns_with_overrides": full_ns,
+        "bulk_compile_s": compile_s,
+        "patient_update_ms": update_ms,
+        "cohort_update_s": cohort_update_s,
+        "batch_thresholds_s": batch_s,
+        "version": profiles.table.version,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+    for k, v in run(args.patients, args.lookups).items():
+        print(f"{k:>26}: {v:,.6g}" if isinstance(v, float) else f"{k:>26}: {v}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Ingestion throughput with and without the durable vitals log, plus replay cost.
+
+    python -m benchmarks.bench_vitals_log [--readings 20000] [--patients 100] [--flush-interval 0.2]
+                                          [--wide-patients 300]
+
+The per-reading path mirrors what the app does for each reading (store append,
+distribution sketch, rollups, alert evaluation); the persistent variant adds
+VitalsLog.append with the background flusher writing and fsyncing throughout.
+The budget check uses the log's marginal per-reading cost relative to the
+in-memory pipeline. A second, wide flush writes more patients than the log
+keeps segment files open for, and checks every one of them is synced and
+read back.
+"""
+import argparse
+import gc
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from services.alert_engine import AlertEngine
+from services.vitals_distribution import VitalsDistribution
+from services.vitals_log import MAX_OPEN_FILES, VitalsLog
+from services.vitals_rollup import VitalsRollups
+from services.vitals_store import VITAL_FIELDS, VitalsStore
+
+MAX_OVERHEAD = 0.10
+WIDE_PATIENTS = MAX_OPEN_FILES + 44
+
+
+def make_readings(n: int, n_patients: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    base = 1_700_000_000_000
+    pids = rng.integers(0, n_patients, size=n)
+    cols = {
+        "heartRate": rng.integers(55, 110, size=n).tolist(),
+        "systolic": rng.integers(100, 150, size=n).tolist(),
+        "diastolic": rng.integers(62, 95, size=n).tolist(),
+        "bloodOxygen": rng.integers(93, 101, size=n).tolist(),
+        "temperature": np.round(rng.uniform(36.2, 37.4, size=n), 1).tolist(),
+        "respiratoryRate": rng.integers(12, 21, size=n).tolist(),
+    }
+    return [
+        {"patientId": f"p{pids[i]}", "timestamp": base + i * 10, **{v: cols[v][i] for v in VITAL_FIELDS}}
+        for i in range(n)
+    ]
+
+
+def _ingest(readings: list, log: VitalsLog | None) -> float:
+    store, dist, rollups, engine = VitalsStore(), VitalsDistribution(), VitalsRollups(), AlertEngine()
+    t0 = time.perf_counter()
+    for r in readings:
+        pid = r["patientId"]
+        store.append(pid, r)
+        if log is not None:
+            log.append(pid, r)
+        dist.add(pid, r)
+        rollups.add(pid, r)
+        engine.evaluate(r)
+    return time.perf_counter() - t0
+
+
+def _append_only(readings: list, log: VitalsLog | None) -> float:
+    store = VitalsStore()
+    t0 = time.perf_counter()
+    for r in readings:
+        store.append(r["patientId"], r)
+        if log is not None:
+            log.append(r["patientId"], r)
+    return time.perf_counter() - t0
+
+
+def _log_only(readings: list, log: VitalsLog) -> float:
+    t0 = time.perf_counter()
+    for r in readings:
+        log.append(r["patientId"], r)
+    return time.perf_counter() - t0
+
+
+def _timed(fn, readings: list, log: VitalsLog | None) -> float:
+    gc.collect()
+    gc.disable()
+    try:
+        return fn(readings, log)
+    finally:
+        gc.enable()
+
+
+def _wide_flush(root: str, n_patients: int, per_patient: int = 10) -> dict:
+    """One flush over more patients than MAX_OPEN_FILES: every segment is fsynced and replays in full."""
+    readings = make_readings(n_patients * per_patient, 1)
+    log = VitalsLog(root)
+    for i, r in enumerate(readings):
+        log.append(f"p{i % n_patients}", r)
+    t0 = time.perf_counter()
+    log.flush()
+    flush_s = time.perf_counter() - t0
+    fsyncs = log.stats()["fsyncs"]
+    log.stop()
+    if fsyncs != n_patients:
+        raise AssertionError(f"{fsyncs} fsyncs for {n_patients} written segments")
+    total = sum(len(VitalsLog(root).read_range(f"p{i}")[0]) for i in range(n_patients))
+    if total != len(readings):
+        raise AssertionError(f"replayed {total} readings, expected {len(readings)}")
+    return {"patients": n_patients, "flush_ms": flush_s * 1000, "fsyncs": fsyncs}
+
+
+def run(n: int, n_patients: int, flush_interval: float, repeat: int = 7, wide_patients: int = WIDE_PATIENTS) -> dict:
+    readings = make_readings(n, n_patients)
+    root = tempfile.mkdtemp(prefix="vitals-log-bench-")
+    try:
+        results = {"readings": n, "patients": n_patients}
+        for name, fn in (("pipeline", _ingest), ("store_only", _append_only)):
+            # interleave the two variants so CPU frequency drift hits both equally
+            mem_runs, disk_runs = [], []
+            for i in range(repeat):
+                mem_runs.append(_timed(fn, readings, None))
+                log = VitalsLog(f"{root}/{name}-{i}", flush_interval=flush_interval)
+                log.start()
+                disk_runs.append(_timed(fn, readings, log))
+                log.stop()
+            mem, disk = min(mem_runs), min(disk_runs)
+            results[name] = {
+                "memory_readings_per_s": n / mem,
+                "logged_readings_per_s": n / disk,
+                "overhead": disk / mem - 1,
+            }
+        # marginal cost of persistence alone (flusher running), as a share of the
+        # in-memory pipeline: far less sensitive to run-to-run noise than the
+        # difference of two end-to-end timings
+        log_runs = []
+        for i in range(repeat):
+            log = VitalsLog(f"{root}/log-only-{i}", flush_interval=flush_interval)
+            log.start()
+            log_runs.append(_timed(_log_only, readings, log))
+            log.stop()
+        results["log_append_us"] = min(log_runs) / n * 1e6
+        results["marginal_overhead"] = min(log_runs) * results["pipeline"]["memory_readings_per_s"] / n
+
+        log = VitalsLog(f"{root}/pipeline-0")
+        t0 = time.perf_counter()
+        store = VitalsStore()
+        loaded = log.warm_start(store)
+        results["warm_start_s"] = time.perf_counter() - t0
+        results["warm_start_readings"] = loaded
+        t0 = time.perf_counter()
+        total = sum(len(log.read_range(pid)[0]) for pid in log.patient_ids())
+        results["full_replay_readings_per_s"] = total / (time.perf_counter() - t0)
+        if total != n:
+            raise AssertionError(f"replayed {total} readings, expected {n}")
+        results["wide_flush"] = _wide_flush(f"{root}/wide", wide_patients)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readings", type=int, default=20_000)
+    parser.add_argument("--patients", type=int, default=100)
+    parser.add_argument("--flush-interval", type=float, default=0.2)
+    parser.add_argument("--wide-patients", type=int, default=WIDE_PATIENTS,
+                        help=f"patients in the wide-flush check (> MAX_OPEN_FILES={MAX_OPEN_FILES})")
+    args = parser.parse_args()
+    r = run(args.readings, args.patients, args.flush_interval, wide_patients=args.wide_patients)
+    print(f"{r['readings']:,} readings across {r['patients']} patients")
+    print(f"{'path':>12} {'in-memory r/s':>15} {'with log r/s':>15} {'overhead':>9}")
+    for name in ("pipeline", "store_only"):
+        p = r[name]
+        print(f"{name:>12} {p['memory_readings_per_s']:>15,.0f} {p['logged_readings_per_s']:>15,.0f} "
+              f"{p['overhead']:>8.1%}")
+    print(f"warm start: {r['warm_start_readings']:,} readings in {r['warm_start_s'] * 1000:.1f} ms; "
+          f"full replay {r['full_replay_readings_per_s']:,.0f} r/s")
+    w = r["wide_flush"]
+    print(f"wide flush: {w['patients']} patients, {w['fsyncs']} fsyncs in {w['flush_ms']:.1f} ms")
+    verdict = "OK" if r["marginal_overhead"] <= MAX_OVERHEAD else "OVER BUDGET"
+    print(f"log append {r['log_append_us']:.2f} us/reading = {r['marginal_overhead']:.1%} of the "
+          f"in-memory pipeline (budget {MAX_OVERHEAD:.0%}): {verdict}")
+
+
+if __name__ == "__main__":
+    main()
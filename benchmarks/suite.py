@@ -0,0 +1,376 @@
+"""
+Reproducible benchmark suite: alert evaluation, baseline anomaly scoring for
+a 10k-patient fleet, continuous risk scoring of 100k patients, response
+encoding for the history and alert endpoints, batch ingestion, /predict (LLM stubbed), histogram rendering and end-to-end HTTP
+through the Flask test client and a real threaded server on a loopback port.
+No network access; all inputs are seeded.
+Results are written as JSON and can be compared against an earlier run to
+catch regressions.
+
+    python -m benchmarks.suite --out bench.json
+    python -m benchmarks.suite --only alerts predict --compare bench.json
+    python -m benchmarks.suite --quick          # 10x fewer iterations
+
+Each section runs --repeat times and keeps the best value per metric, which
+damps scheduler noise. Metrics ending in _per_s are higher-is-better; _ms are
+lower-is-better.
+--compare exits with status 1 when any metric regresses by more than --tolerance.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from benchmarks.bench_alerts import block_to_readings, make_block
+from benchmarks.bench_predict import make_payloads
+from tools.ingest_load import synthetic_columns
+
+SECTIONS = ("alerts", "anomaly", "risk", "responses", "ingest", "predict", "histogram", "http")
+DEFAULT_TOLERANCE = 0.10
+DEFAULT_REPEAT = 3
+STUB_SUMMARY = "Benchmark stub summary."
+HTTP_CLIENTS = 4
+INGEST_BATCH = 100
+HISTORY_LIMIT = 50
+
+
+def _latency_stats(latencies: list, elapsed: float) -> dict:
+    """Throughput plus p50/p99 in ms for a list of per-call durations (seconds)."""
+    lat = np.asarray(latencies) * 1e3
+    return {
+        "per_s": len(lat) / elapsed,
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p99_ms": float(np.percentile(lat, 99)),
+    }
+
+
+@contextmanager
+def stub_llm():
+    """Enable LLM summaries with a canned, in-process reply instead of an API call."""
+    from services import llm_summary
+
+    saved = llm_summary.OPENAI_API_KEY, llm_summary.get_llm_summary
+    llm_summary.OPENAI_API_KEY = "benchmark-stub"
+    llm_summary.get_llm_summary = lambda *args, **kwargs: STUB_SUMMARY
+    llm_summary.summary_service._cache.clear()
+    try:
+        yield
+    finally:
+        llm_summary.OPENAI_API_KEY, llm_summary.get_llm_summary = saved
+        llm_summary.summary_service._cache.clear()
+
+
+def bench_alerts(n: int, n_patients: int = 1000) -> dict:
+    """AlertEngine.evaluate one reading at a time vs evaluate_batch over the same block."""
+    from services.alert_engine import AlertEngine
+
+    block = make_block(n, n_patients)
+    readings = block_to_readings(block)
+    engine = AlertEngine()
+    t0 = time.perf_counter()
+    for r in readings:
+        engine.evaluate(r)
+    scalar_s = time.perf_counter() - t0
+    engine = AlertEngine()
+    t0 = time.perf_counter()
+    engine.evaluate_batch(block)
+    batch_s = time.perf_counter() - t0
+    return {"evaluate_readings_per_s": n / scalar_s, "evaluate_batch_readings_per_s": n / batch_s}
+
+
+def bench_anomaly(seconds: int, n_patients: int = 10_000) -> dict:
+    """Simulated fleet at 1 Hz, one block per second: baselines alone and the whole AlertEngine."""
+    from benchmarks import bench_anomaly as fleet
+
+    r = fleet.run(n_patients, 1.0, seconds)
+    keys = ("baseline_readings_per_s", "baseline_tick_ms", "engine_readings_per_s", "engine_tick_ms")
+    return {k: r[k] for k in keys}
+
+
+def bench_risk(n_patients: int) -> dict:
+    """RiskScorer: accumulate a window of readings, then re-score every patient in one pass."""
+    from benchmarks import bench_risk as fleet
+
+    r = fleet.run(n_patients, passes=3)
+    return {k: r[k] for k in ("observe_readings_per_s", "score_ms", "payload_path_ms")}
+
+
+def bench_responses(n: int) -> dict:
+    """History and alert page encodes: stdlib json vs the fast encoder, columnar, and the raw alert splice."""
+    from benchmarks import bench_responses as encoding
+
+    r = encoding.run(iterations=n)
+    return {k: v for k, v in r.items() if k.endswith("_per_s") and "msgpack" not in k}
+
+
+def bench_ingest(n: int, n_patients: int = 1000, batch: int = 1000) -> dict:
+    """Validate + ingest columnar batches into a private pipeline (store, rollups, sketches, alerts)."""
+    from services.alert_engine import AlertEngine
+    from services.ingest import IngestPipeline, validate_columns
+    from services.vitals_distribution import VitalsDistribution
+    from services.vitals_rollup import VitalsRollups
+    from services.vitals_store import VitalsStore
+
+    pipeline = IngestPipeline(VitalsStore(), AlertEngine(), VitalsDistribution(), VitalsRollups(), hub=None)
+    rng = np.random.default_rng(0)
+    blocks = [synthetic_columns(batch, n_patients, rng) for _ in range(max(1, n // batch))]
+    t0 = time.perf_counter()
+    for columns in blocks:
+        pipeline.ingest(validate_columns(columns))
+    elapsed = time.perf_counter() - t0
+    return {"batch_size": batch, "ingest_readings_per_s": len(blocks) * batch / elapsed}
+
+
+def bench_predict(app, n: int) -> dict:
+    """POST /predict through the test client with distinct payloads (model cache misses)."""
+    from services import predict_service
+
+    client = app.test_client()
+    payloads = make_payloads(n, seed=1)
+    predict_service._prediction_cache.clear()
+    latencies = []
+    with stub_llm():
+        t0 = time.perf_counter()
+        for p in payloads:
+            t1 = time.perf_counter()
+            r = client.post("/predict", json=p)
+            latencies.append(time.perf_counter() - t1)
+            if r.status_code != 200 or "summary_id" not in r.get_json():
+                raise AssertionError(f"/predict failed: {r.status_code} {r.get_data(as_text=True)[:200]}")
+        elapsed = time.perf_counter() - t0
+    stats = _latency_stats(latencies, elapsed)
+    return {"predict_per_s": stats["per_s"], "predict_p50_ms": stats["p50_ms"], "predict_p99_ms": stats["p99_ms"]}
+
+
+def bench_histogram(n: int, size: int = 500) -> dict:
+    """build_histogram PNG renders: distinct data (render cache misses) vs a repeated input (hits)."""
+    from services import histogram_service
+
+    rng = np.random.default_rng(2)
+    datasets = [rng.normal(72, 12, size=size).tolist() for _ in range(n)]
+    histogram_service._render_cache.clear()
+    histogram_service.build_histogram(datasets[0])  # first render builds the figure
+    t0 = time.perf_counter()
+    for numbers in datasets[1:]:
+        histogram_service.build_histogram(numbers)
+    render_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for _ in range(n * 10):
+        histogram_service.build_histogram(datasets[0])
+    cached_s = time.perf_counter() - t0
+    return {"render_per_s": (n - 1) / render_s, "cached_render_per_s": n * 10 / cached_s}
+
+
+def _http_requests(n: int) -> list:
+    """(name, method, path, is_json, bodies) for a mix covering the dashboard, ingest, predict and histogram routes."""
+    rng = np.random.default_rng(3)
+    ingest_bodies = [synthetic_columns(INGEST_BATCH, 100, rng) for _ in range(16)]
+    payloads = make_payloads(64, seed=4)
+    histogram = {"numbers": rng.normal(72, 12, size=200).round(1).tolist(), "format": "json"}
+    return [
+        ("latest", "GET", "/api/vitals/latest?patient_id=load-0", None, [None] * n),
+        ("history", "GET", f"/api/vitals/history?patient_id=load-0&limit={HISTORY_LIMIT}", None, [None] * n),
+        ("alerts", "GET", "/api/alerts?limit=20", None, [None] * n),
+        ("ingest", "POST", "/api/vitals/ingest", True, [ingest_bodies[i % 16] for i in range(n)]),
+        ("predict", "POST", "/predict", True, [payloads[i % 64] for i in range(n)]),
+        ("histogram_bins", "POST", "/api/histogram", True, [histogram] * n),
+    ]
+
+
+def _seed_vitals(client) -> None:
+    body = synthetic_columns(HISTORY_LIMIT * 100, 100, np.random.default_rng(5))
+    r = client.post("/api/vitals/ingest", json=body)
+    if r.status_code != 200:
+        raise AssertionError(f"seeding vitals failed: {r.status_code}")
+
+
+def bench_http_test_client(app, n: int) -> dict:
+    """Each route in-process through app.test_client() (WSGI dispatch, no sockets)."""
+    client = app.test_client()
+    _seed_vitals(client)
+    out = {}
+    with stub_llm():
+        for name, method, path, _, bodies in _http_requests(n):
+            latencies = []
+            t0 = time.perf_counter()
+            for body in bodies:
+                t1 = time.perf_counter()
+                r = client.open(path, method=method, json=body)
+                latencies.append(time.perf_counter() - t1)
+                if r.status_code != 200:
+                    raise AssertionError(f"{method} {path}: {r.status_code}")
+            stats = _latency_stats(latencies, time.perf_counter() - t0)
+            out.update({f"test_client_{name}_{k}": v for k, v in stats.items()})
+    return out
+
+
+def bench_http_server(app, n: int, clients: int = HTTP_CLIENTS) -> dict:
+    """Each route over loopback HTTP/1.1 keep-alive against a threaded werkzeug server."""
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+    out = {}
+    try:
+        with stub_llm():
+            for name, method, path, is_json, bodies in _http_requests(n):
+                encoded = [json.dumps(b).encode() if is_json else None for b in bodies]
+                headers = {"Content-Type": "application/json"} if is_json else {}
+                latencies, errors = [[] for _ in range(clients)], []
+
+                def worker(k: int):
+                    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                    try:
+                        for body in encoded[k::clients]:
+                            t1 = time.perf_counter()
+                            conn.request(method, path, body=body, headers=headers)
+                            r = conn.getresponse()
+                            r.read()
+                            latencies[k].append(time.perf_counter() - t1)
+                            if r.status != 200:
+                                errors.append(r.status)
+                    finally:
+                        conn.close()
+
+                threads = [threading.Thread(target=worker, args=(k,)) for k in range(clients)]
+                t0 = time.perf_counter()
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                elapsed = time.perf_counter() - t0
+                if errors:
+                    raise AssertionError(f"{method} {path}: {len(errors)} non-200 responses")
+                stats = _latency_stats([x for lat in latencies for x in lat], elapsed)
+                out.update({f"server_{name}_{k}": v for k, v in stats.items()})
+    finally:
+        server.shutdown()
+        server.server_close()
+    out["server_clients"] = clients
+    return out
+
+
+def environment() -> dict:
+    """Enough context to tell whether two result files are comparable."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": int(time.time()),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _best(runs: list) -> dict:
+    """Per-metric best over repeated runs: max for _per_s, min for _ms, anything else from the first run."""
+    best = dict(runs[0])
+    for metric in best:
+        values = [r[metric] for r in runs]
+        if metric.endswith("_per_s"):
+            best[metric] = max(values)
+        elif metric.endswith("_ms"):
+            best[metric] = min(values)
+    return best
+
+
+def run(sections=SECTIONS, scale: float = 1.0, repeat: int = DEFAULT_REPEAT) -> dict:
+    """
+    Run the selected sections repeat times each, keeping the best value per
+    metric; returns {"environment": ..., "results": {section: {metric: value}}}.
+    """
+    def count(n: int) -> int:
+        return max(10, int(n * scale))
+
+    app = None
+    if {"predict", "http"} & set(sections):
+        from app import app
+    benches = {
+        "alerts": lambda: bench_alerts(count(20_000)),
+        "anomaly": lambda: bench_anomaly(count(60)),
+        "risk": lambda: bench_risk(count(100_000)),
+        "responses": lambda: bench_responses(count(2_000)),
+        "ingest": lambda: bench_ingest(count(100_000)),
+        "predict": lambda: bench_predict(app, count(2_000)),
+        "histogram": lambda: bench_histogram(count(50)),
+        "http": lambda: {**bench_http_test_client(app, count(1_000)), **bench_http_server(app, count(1_000))},
+    }
+    results = {}
+    for section in sections:
+        if section not in benches:
+            raise ValueError(f"unknown section {section!r}; choose from {SECTIONS}")
+        results[section] = _best([benches[section]() for _ in range(max(1, repeat))])
+    return {"environment": environment(), "scale": scale, "repeat": repeat, "results": results}
+
+
+def compare(baseline: dict, current: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    Per-metric change vs a baseline run: (section.metric, old, new, change, regressed).
+    change is the improvement ratio, positive = better, for either metric direction.
+    """
+    rows = []
+    for section, metrics in current["results"].items():
+        old_metrics = baseline.get("results", {}).get(section, {})
+        for metric, new in metrics.items():
+            old = old_metrics.get(metric)
+            if old is None or not old or not (metric.endswith("_per_s") or metric.endswith("_ms")):
+                continue
+            change = new / old - 1 if metric.endswith("_per_s") else old / new - 1
+            rows.append((f"{section}.{metric}", old, new, change, change < -tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply iteration counts")
+    parser.add_argument("--quick", action="store_true", help="same as --scale 0.1")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per section; best value is kept")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", metavar="BASELINE", help="results JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed fractional slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    report = run(args.only, 0.1 if args.quick else args.scale, args.repeat)
+    for section, metrics in report["results"].items():
+        print(f"[{section}]")
+        for metric, value in metrics.items():
+            print(f"  {metric:<40} {value:>14,.2f}" if isinstance(value, float) else f"  {metric:<40} {value:>14}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(baseline, report, args.tolerance)
+        print(f"\nvs {args.compare} (commit {baseline.get('environment', {}).get('commit')}), "
+              f"tolerance {args.tolerance:.0%}")
+        for name, old, new, change, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"  {name:<48} {old:>12,.2f} -> {new:>12,.2f} {change:>+8.1%}{flag}")
+        if any(r[4] for r in rows):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,4 +6,28 @@ load_dotenv()
 class Config:
     PORT = int(os.environ.get("PORT", 4000))
     DEBUG = os.environ.get("FLASK_DEBUG", "false").lower() == "true"
+    # Durable vitals log directory; empty disables persistence
+    VITALS_LOG_DIR = os.environ.get("VITALS_LOG_DIR", "")
+    VITALS_LOG_FLUSH_INTERVAL = float(os.environ.get("VITALS_LOG_FLUSH_INTERVAL", 1.0))
+    # Fleet simulator mode: N virtual patients fed through the ingest pipeline (0 = off)
+    FLEET_SIM_PATIENTS = int(os.environ.get("FLEET_SIM_PATIENTS", 0))
+    FLEET_SIM_RATE_HZ = float(os.environ.get("FLEET_SIM_RATE_HZ", 0.5))
+    FLEET_SIM_SEED = int(os.environ["FLEET_SIM_SEED"]) if os.environ.get("FLEET_SIM_SEED") else None
+    # Serving role: standalone (python app.py), or ingest/api as set up by gunicorn.conf.py
+    SERVE_ROLE = os.environ.get("SERVE_ROLE", "standalone")
+    SHARED_STATE_NAME = os.environ.get("SHARED_STATE_NAME", "")
+    SHARED_MAX_PATIENTS = int(os.environ.get("SHARED_MAX_PATIENTS", 10000))
+    # Internal address of the ingestion process that API workers proxy stateful requests to
+    INGEST_HOST = os.environ.get("INGEST_HOST", "127.0.0.1")
+    INGEST_PORT = int(os.environ.get("INGEST_PORT", 4001))
+    # Alert store retention; alerts dropped by compaction are archived to ALERT_LOG_DIR when set
+    ALERT_RETENTION_HOURS = float(os.environ.get("ALERT_RETENTION_HOURS", 24))
+    ALERT_MAX_RETAINED = int(os.environ.get("ALERT_MAX_RETAINED", 2_000_000))
+    ALERT_LOG_DIR = os.environ.get("ALERT_LOG_DIR", "")
+    # Seconds between continuous heart-risk scoring passes over all monitored patients (0 = off)
+    RISK_SCORE_INTERVAL = float(os.environ.get("RISK_SCORE_INTERVAL", 10))
+    # Responses at least this large are gzip/brotli-compressed when the client accepts it (0 = never)
+    COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+    # Sampling profiler rate at startup (0 = off; toggle at runtime via POST /api/metrics/profile)
+    METRICS_PROFILER_HZ = int(os.environ.get("METRICS_PROFILER_HZ", 0))
     CORS_ORIGINS = True  # allow all origins for dev; set to ["http://localhost:3000"] for prod
@@ -0,0 +1,53 @@
+"""
+Production serving: one ingestion process owns all state (mock stream, ingest
+pipeline, alert engine, dispatcher, durable log) and publishes vitals rings
+and recent alerts into shared memory; N stateless gevent workers serve the
+API from it and relay stateful requests to the ingestion process. Each
+request is a greenlet, so an open SSE stream costs a greenlet and a socket,
+not an OS thread: a worker holds up to worker_connections streams.
+
+    gunicorn -c gunicorn.conf.py
+
+The ingestion process is started before any worker is forked and stopped
+(flushing the durable log) when the master exits. See services/serving.py.
+"""
+import multiprocessing
+import os
+
+# Workers import the app after forking; the role and segment name must be in
+# the environment before config is first imported, here or in any worker.
+os.environ["SERVE_ROLE"] = "api"
+os.environ.setdefault("SHARED_STATE_NAME", f"rpm-state-{os.getpid()}")
+
+from config import Config  # noqa: E402
+
+wsgi_app = "app:app"
+bind = f"0.0.0.0:{Config.PORT}"
+workers = int(os.environ.get("WEB_CONCURRENCY", min(4, multiprocessing.cpu_count())))
+worker_class = "gevent"  # monkey-patches the worker before the app is imported
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))  # concurrent requests/streams
+timeout = 60
+graceful_timeout = 20
+keepalive = 5
+preload_app = False  # the app must be imported in each worker, after the segment exists
+
+_ingest = None
+
+
+def on_starting(server):
+    global _ingest
+    from services.serving import IngestProcess
+
+    _ingest = IngestProcess(
+        name=Config.SHARED_STATE_NAME,
+        host=Config.INGEST_HOST,
+        port=Config.INGEST_PORT,
+        max_patients=Config.SHARED_MAX_PATIENTS,
+    )
+    _ingest.start()
+    server.log.info("Ingestion process ready on %s:%d", Config.INGEST_HOST, Config.INGEST_PORT)
+
+
+def on_exit(server):
+    if _ingest is not None:
+        _ingest.stop()
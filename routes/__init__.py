@@ -5,5 +5,10 @@ from .thresholds import thresholds_bp
 from .emergency import emergency_bp
 from .predict import predict_bp
 from .diet import diet_bp
+from .histogram import histogram_bp
+from .front import front_bp
+from .metrics import metrics_bp, install_metrics
+from .risk import risk_bp
+from .responses import install_responses, respond
 
-__all__ = ["main_bp", "vitals_bp", "alerts_bp", "thresholds_bp", "emergency_bp", "predict_bp", "diet_bp"]
+__all__ = ["main_bp", "vitals_bp", "alerts_bp", "thresholds_bp", "emergency_bp", "predict_bp", "diet_bp", "histogram_bp", "front_bp", "metrics_bp", "install_metrics", "risk_bp", "install_responses", "respond"]
@@ -1,13 +1,70 @@
 from flask import Blueprint, jsonify, request
 
+from routes.responses import respond
+from routes.vitals import sse_response
 from services.alert_engine import alert_engine
+from services.alert_store import QUERY_DEFAULT_LIMIT, QUERY_MAX_LIMIT
+from services.vitals_store import DEFAULT_PATIENT_ID
 
 alerts_bp = Blueprint("alerts", __name__, url_prefix="/api/alerts")
 
+# any of these switches /api/alerts from the recent window to the indexed store
+STORE_QUERY_PARAMS = ("since", "before", "type", "severity", "from", "to")
+
 
 @alerts_bp.route("")
 def list_alerts():
-    limit = request.args.get("limit", 20, type=int)
-    limit = min(max(1, limit), 50)
-    data = alert_engine.get_recent(limit=limit)
-    return jsonify(data)
+    """
+    Recent alerts (last minute, at most 50), oldest first. With since=<id>,
+    before=<id>, type=, severity=, from=/to= (ms) the indexed store answers
+    instead, over the whole retention window (limit up to 1000): since pages
+    forward from an id (incremental fetch), otherwise the newest matches are
+    returned, below before= when given. Every alert carries its id.
+    Honours ?format=columnar and msgpack (see routes/responses.py).
+    """
+    patient_id = request.args.get("patient_id")
+    if not any(k in request.args for k in STORE_QUERY_PARAMS):
+        limit = request.args.get("limit", 20, type=int)
+        limit = min(max(1, limit), 50)
+        return respond(lambda: alert_engine.get_recent(limit=limit, patient_id=patient_id))
+    limit = request.args.get("limit", QUERY_DEFAULT_LIMIT, type=int)
+    query = dict(
+        patient_id=patient_id,
+        alert_type=request.args.get("type"),
+        severity=request.args.get("severity"),
+        since=request.args.get("since", type=int),
+        before=request.args.get("before", type=int),
+        start_ms=request.args.get("from", type=int),
+        end_ms=request.args.get("to", type=int),
+        limit=min(max(1, limit), QUERY_MAX_LIMIT),
+    )
+    # plain JSON splices the stored encodings; other formats decode them
+    return respond(lambda: alert_engine.store.query(**query), raw=lambda: alert_engine.store.query(**query, raw=True))
+
+
+@alerts_bp.route("/archive")
+def archive():
+    """Alerts compacted out of the store (ALERT_LOG_DIR), oldest first from since=<id>."""
+    log = alert_engine.store.archive
+    if log is None:
+        return jsonify(error="Alert archive not configured (set ALERT_LOG_DIR)"), 404
+    limit = min(max(1, request.args.get("limit", QUERY_DEFAULT_LIMIT, type=int)), QUERY_MAX_LIMIT)
+    return jsonify(log.read(since=request.args.get("since", type=int), limit=limit))
+
+
+@alerts_bp.route("/baseline")
+def baseline():
+    """A patient's learned per-vital baseline (count, mean, sd) used for anomaly alerts."""
+    baselines = alert_engine.baselines
+    if baselines is None:
+        return jsonify(error="Baseline anomaly detection is disabled"), 404
+    patient_id = request.args.get("patient_id") or DEFAULT_PATIENT_ID
+    learned = baselines.baseline(patient_id)
+    if learned is None:
+        return jsonify(error="No readings for patient"), 404
+    return jsonify(patientId=patient_id, vitals=learned)
+
+
+@alerts_bp.route("/stream")
+def stream():
+    return sse_response("alerts")
@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 
+from services.emergency_dispatch import emergency_dispatcher
 from services.emergency_workflow import emergency_workflow
 
 emergency_bp = Blueprint("emergency", __name__, url_prefix="/api/emergency")
@@ -12,3 +13,15 @@ def trigger():
     source = data.get("source", "manual")
     result = emergency_workflow.trigger(alert=alert, source=source)
     return jsonify(result)
+
+
+@emergency_bp.route("/metrics")
+def metrics():
+    return jsonify(emergency_dispatcher.metrics())
+
+
+@emergency_bp.route("/dead-letters")
+def dead_letters():
+    """Dispatches a sink still rejected after every retry (?limit=, newest last)."""
+    limit = min(max(1, request.args.get("limit", 100, type=int)), 1000)
+    return jsonify(emergency_dispatcher.dead_letters(limit))
@@ -0,0 +1,238 @@
+"""
+Routes for stateless API workers (SERVE_ROLE=api). Dashboard reads (latest,
+history, patients, alerts) come straight from the shared-memory segment the
+ingestion process writes; every other /api request is relayed to the
+ingestion process, which owns the state. Live SSE streams are fanned out
+from this worker's own event hub, fed by one upstream stream per topic, so the
+ingestion process holds one connection per worker and topic rather than one
+per dashboard.
+"""
+import http.client
+import json
+import logging
+import threading
+import time
+
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from routes import histogram as histogram_routes, predict as predict_routes
+from routes.alerts import STORE_QUERY_PARAMS
+from routes.responses import respond
+from routes.vitals import sse_response
+from services.event_hub import SSE_HEARTBEAT, event_hub
+from services.shared_state import SharedState
+from services.vitals_store import DEFAULT_PATIENT_ID
+
+logger = logging.getLogger(__name__)
+
+PROXY_TIMEOUT = 30.0  # > SSE_HEARTBEAT, so idle streams are not cut
+PROXY_CHUNK = 64 * 1024
+PROXY_METHODS = ["GET", "POST", "PUT", "DELETE", "PATCH"]
+# Not forwarded either way: hop-by-hop, framing, and headers each side sets itself
+_SKIP_HEADERS = frozenset((
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailer",
+    "transfer-encoding", "upgrade", "content-length", "host", "server", "date",
+))
+_RETRY_METHODS = frozenset(("GET", "PUT", "DELETE"))  # safe to resend on a stale connection
+# Topic streams relayed once per worker: topic -> upstream path (all patients)
+RELAY_TOPICS = {"vitals": "/api/vitals/stream", "alerts": "/api/alerts/stream", "risk": "/api/risk/stream"}
+RELAY_RETRY = 1.0  # seconds before reconnecting a dropped upstream stream
+
+front_bp = Blueprint("front", __name__)
+_local = threading.local()  # one keep-alive connection to the ingestion process per thread
+
+
+def _shared() -> SharedState:
+    return current_app.extensions["shared_state"]
+
+
+@front_bp.route("/api/vitals/latest")
+def latest():
+    patient_id = request.args.get("patient_id") or DEFAULT_PATIENT_ID
+    reading = _shared().store().latest(patient_id)
+    if reading is None:
+        return jsonify(error="No vitals yet"), 404
+    return jsonify(reading)
+
+
+@front_bp.route("/api/vitals/history")
+def history():
+    if any(k in request.args for k in ("from", "to", "points")):
+        return proxy()  # range queries need the durable log and rollups
+    patient_id = request.args.get("patient_id") or DEFAULT_PATIENT_ID
+    limit = request.args.get("limit", 50, type=int)
+    limit = min(max(1, limit), 100)
+    store = _shared().store()
+    return respond(lambda: store.history(patient_id, limit), columns=lambda: store.history_columns(patient_id, limit))
+
+
+@front_bp.route("/api/vitals/patients")
+def patients():
+    return jsonify(_shared().store().patient_ids())
+
+
+@front_bp.route("/api/alerts")
+def list_alerts():
+    if any(k in request.args for k in STORE_QUERY_PARAMS):
+        return proxy()  # the indexed alert store lives in the ingestion process
+    limit = request.args.get("limit", 20, type=int)
+    limit = min(max(1, limit), 50)
+    return respond(lambda: _shared().recent_alerts(limit=limit, patient_id=request.args.get("patient_id")))
+
+
+class _StreamRelay:
+    """
+    One upstream SSE stream for a topic, started on the first local subscriber
+    and republished event by event into this worker's event hub (which does
+    the per-patient filtering). Reconnects after RELAY_RETRY when dropped.
+    """
+
+    def __init__(self, topic: str, host: str, port: int):
+        self.topic = topic
+        self._address = (host, port)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def ensure_running(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"sse-relay-{self.topic}", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            conn = http.client.HTTPConnection(*self._address, timeout=SSE_HEARTBEAT * 3)
+            try:
+                conn.request("GET", RELAY_TOPICS[self.topic])
+                upstream = conn.getresponse()
+                if upstream.status == 200:
+                    self._relay(upstream)
+                else:
+                    logger.warning("SSE relay %s: upstream answered %d", self.topic, upstream.status)
+            except (OSError, http.client.HTTPException) as e:
+                logger.warning("SSE relay %s: %s; reconnecting", self.topic, e)
+            finally:
+                conn.close()
+            time.sleep(RELAY_RETRY)
+
+    def _relay(self, upstream: http.client.HTTPResponse) -> None:
+        data = []
+        while line := upstream.readline():
+            line = line.rstrip(b"\r\n")
+            if line.startswith(b"data:"):
+                data.append(line[5:].strip())
+            elif not line and data:  # end of event
+                event = json.loads(b"\n".join(data))
+                data = []
+                patient_id = event.get("patientId") if isinstance(event, dict) else None
+                event_hub.publish(self.topic, event, patient_id=patient_id)
+
+
+_relays: dict = {}
+_relays_lock = threading.Lock()
+
+
+def _relay(topic: str) -> _StreamRelay:
+    relay = _relays.get(topic)
+    if relay is None:
+        with _relays_lock:
+            relay = _relays.get(topic)
+            if relay is None:
+                config = current_app.config
+                relay = _relays[topic] = _StreamRelay(topic, config["INGEST_HOST"], config["INGEST_PORT"])
+    return relay
+
+
+@front_bp.route("/api/vitals/stream")
+@front_bp.route("/api/alerts/stream")
+@front_bp.route("/api/risk/stream")
+def stream():
+    """Live SSE from this worker's hub (optionally ?patient_id=), fed by the topic's shared upstream relay."""
+    topic = request.path.split("/")[2]
+    _relay(topic).ensure_running()
+    return sse_response(topic)
+
+
+@front_bp.route("/api/predict/batch", methods=["POST"])
+def predict_batch():
+    """Batch scoring is stateless (no LLM summaries): served by this worker."""
+    return predict_routes.predict_batch()
+
+
+@front_bp.route("/api/histogram", methods=["POST"])
+def histogram():
+    """Histograms of posted numbers render here; vital distributions live in the ingestion process."""
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict) and payload.get("numbers") is None and payload.get("vital"):
+        return proxy()
+    return histogram_routes.histogram()
+
+
+def _connection(fresh: bool = False) -> http.client.HTTPConnection:
+    conn = None if fresh else getattr(_local, "conn", None)
+    if conn is None:
+        conn = http.client.HTTPConnection(
+            current_app.config["INGEST_HOST"], current_app.config["INGEST_PORT"], timeout=PROXY_TIMEOUT
+        )
+        if not fresh:
+            _local.conn = conn
+    return conn
+
+
+def _forward(conn: http.client.HTTPConnection, body: bytes) -> http.client.HTTPResponse:
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in _SKIP_HEADERS}
+    path = request.full_path if request.query_string else request.path
+    conn.request(request.method, path, body=body or None, headers=headers)
+    return conn.getresponse()
+
+
+def fetch_upstream(path: str) -> tuple[int, bytes]:
+    """GET path from the ingestion process on this thread's connection; (0, b"") if unreachable."""
+    conn = _connection()
+    for _ in range(2):  # second try after a stale keep-alive connection
+        try:
+            conn.request("GET", path)
+            upstream = conn.getresponse()
+            return upstream.status, upstream.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+    return 0, b""
+
+
+# /predict and /api/predict start LLM summary jobs, which the ingestion process keeps
+@front_bp.route("/predict", methods=["POST"])
+@front_bp.route("/api/<path:path>", methods=PROXY_METHODS)
+def proxy(path=None):
+    """Relay the request to the ingestion process; SSE streams get their own connection."""
+    streaming = request.path.endswith("/stream")
+    conn = _connection(fresh=streaming)
+    body = request.get_data()
+    try:
+        try:
+            upstream = _forward(conn, body)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            if streaming or request.method not in _RETRY_METHODS:
+                raise
+            upstream = _forward(conn, body)  # the kept-alive connection had gone stale
+    except (OSError, http.client.HTTPException):
+        conn.close()
+        return jsonify(error="Ingestion service unavailable"), 502
+    headers = [
+        (k, v) for k, v in upstream.getheaders()
+        if k.lower() not in _SKIP_HEADERS and not k.lower().startswith("access-control-")
+    ]
+    if not streaming:
+        data = upstream.read()
+        return Response(data, status=upstream.status, headers=headers)
+
+    def relay():
+        try:
+            while chunk := upstream.read1(PROXY_CHUNK):
+                yield chunk
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            conn.close()
+
+    return Response(relay(), status=upstream.status, headers=headers, direct_passthrough=True)
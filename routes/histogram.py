@@ -1,6 +1,7 @@
 from flask import Blueprint, request, Response, jsonify
 
-from services.histogram_service import build_histogram
+from services.histogram_service import compute_bins, histogram_bins, render_histogram
+from services.vitals_distribution import VITAL_BINS
 
 histogram_bp = Blueprint("histogram", __name__)
 
@@ -9,12 +10,17 @@ histogram_bp = Blueprint("histogram", __name__)
 def histogram():
     """
     Accept JSON: { "numbers": [1, 2, 3, ...], "title": "...", "xlabel": "...", "bins": 10 }.
-    Returns PNG image of the histogram.
+    Returns PNG image of the histogram, or with ?format=json (or "format": "json"
+    in the body) just the bin counts and edges.
     """
     if not request.is_json:
         return jsonify(error="Content-Type must be application/json"), 400
     payload = request.get_json() or {}
+    if not isinstance(payload, dict):
+        return jsonify(error="Body must be an object"), 400
     numbers = payload.get("numbers")
+    if numbers is None and payload.get("vital"):
+        return _vital_histogram(payload)
     if numbers is None:
         return jsonify(error="Missing 'numbers' array"), 400
     if not isinstance(numbers, (list, tuple)):
@@ -35,14 +41,45 @@ def histogram():
             bins = max(2, min(100, bins))
         except (TypeError, ValueError):
             bins = None
+    fmt = request.args.get("format") or payload.get("format") or "png"
     try:
-        png_bytes = build_histogram(
-            nums,
+        if fmt == "json":
+            return jsonify(histogram_bins(nums, bins=bins))
+        counts, edges = compute_bins(nums, bins=bins)
+        png_bytes, key = render_histogram(
+            counts,
+            edges,
             title=str(title),
             xlabel=str(xlabel),
             ylabel=str(ylabel),
-            bins=bins,
         )
     except ValueError as e:
         return jsonify(error=str(e)), 400
-    return Response(png_bytes, mimetype="image/png")
+    resp = Response(png_bytes, mimetype="image/png")
+    resp.set_etag(key)
+    return resp
+
+
+def _vital_histogram(payload: dict):
+    """{ "vital": "heartRate", "patient_id" | "cohort": ... } renders from the stored distribution sketch."""
+    from routes.vitals import distribution_sketch
+
+    vital = payload["vital"]
+    if not isinstance(vital, str) or vital not in VITAL_BINS:
+        return jsonify(error=f"Unknown vital '{vital}'"), 400
+    sketch = distribution_sketch(vital, payload.get("patient_id"), payload.get("cohort"))
+    if not sketch.n:
+        return jsonify(error="No readings yet"), 404
+    counts, edges = sketch.bins()
+    if (request.args.get("format") or payload.get("format")) == "json":
+        return jsonify(sketch.summary())
+    png_bytes, key = render_histogram(
+        counts,
+        edges,
+        title=str(payload.get("title", f"{vital} distribution")),
+        xlabel=str(payload.get("xlabel", vital)),
+        ylabel=str(payload.get("ylabel", "Frequency")),
+    )
+    resp = Response(png_bytes, mimetype="image/png")
+    resp.set_etag(key)
+    return resp
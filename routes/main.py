@@ -1,4 +1,6 @@
-from flask import Blueprint, jsonify
+import json
+
+from flask import Blueprint, current_app, jsonify
 
 main_bp = Blueprint("main", __name__)
 
@@ -15,8 +17,26 @@ def index():
 @main_bp.route("/health")
 @main_bp.route("/api/health")
 def health():
-    from services.predict_service import LATEST_RESULT
-    return jsonify(ok=True, message="RPM Backend is running", port=5000, last_prediction=LATEST_RESULT)
+    """Predictions and their caches live in the ingestion process; api workers report its values."""
+    if current_app.config.get("SERVE_ROLE") == "api":
+        from routes.front import fetch_upstream
+
+        status, body = fetch_upstream("/api/health")
+        if status != 200:
+            return jsonify(ok=False, message="Ingestion process unreachable", port=current_app.config.get("PORT")), 503
+        upstream = json.loads(body)
+        last_prediction, prediction_cache = upstream.get("last_prediction"), upstream.get("prediction_cache")
+    else:
+        from services.predict_service import LATEST_RESULT, cache_stats
+
+        last_prediction, prediction_cache = LATEST_RESULT, cache_stats()
+    return jsonify(
+        ok=True,
+        message="RPM Backend is running",
+        port=current_app.config.get("PORT"),
+        last_prediction=last_prediction,
+        prediction_cache=prediction_cache,
+    )
 
 
 @main_bp.route("/api/hello")
@@ -0,0 +1,181 @@
+"""
+Observability endpoints: Prometheus /metrics, a JSON summary at /api/metrics
+and the sampling-profiler toggle at /api/metrics/profile.
+
+In the api serving role each worker labels its own series process="api-<pid>"
+and merges in the ingestion process's families (process="ingest"), so any
+scrape covers ingestion, alerting and dispatch plus the answering worker's
+HTTP metrics. Profiling requests are relayed to the ingestion process, where
+the hot paths run.
+"""
+import json
+import os
+import threading
+import time
+
+from flask import Blueprint, Response, current_app, g, jsonify, request
+
+from services.alert_engine import alert_engine
+from services.emergency_dispatch import emergency_dispatcher
+from services.event_hub import event_hub
+from services.llm_summary import summary_service
+from services.metrics import (
+    PROFILE_HZ, family, http_request_seconds, http_requests, label_families, merge_families, metrics, profiler,
+    render_prometheus, summarize,
+)
+from services.mock_stream import mock_stream_service
+from services.predict_service import cache_stats
+from services.risk_scorer import risk_scorer
+from services.vitals_log import get_vitals_log
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DISPATCH_OUTCOMES = ("submitted", "suppressed", "dropped", "dispatched", "failed", "retries")
+
+metrics_bp = Blueprint("metrics", __name__)
+_started_at = time.time()
+
+
+def _service_families() -> list:
+    """Scrape-time view of state the services already keep (no per-event cost)."""
+    dispatch = emergency_dispatcher.metrics()
+    stream_buffer = mock_stream_service.buffer_usage()
+    alert_buffer = alert_engine.buffer_usage()
+    predictions = cache_stats()["predictions"]
+    families = [
+        family("rpm_emergency_dispatch_events", "counter", "Emergency dispatch events by outcome",
+               [({"outcome": k}, dispatch.get(k, 0)) for k in DISPATCH_OUTCOMES]),
+        family("rpm_emergency_dispatch_queue_depth", "gauge", "Dispatches waiting for a worker", dispatch["queue_depth"]),
+        family("rpm_emergency_dispatch_dead_letters", "gauge", "Undeliverable dispatches kept for inspection",
+               dispatch["dead_letters"]),
+        family("rpm_buffer_used", "gauge", "Entries held in bounded buffers", [
+            ({"buffer": "mock_stream"}, stream_buffer["used"]),
+            ({"buffer": "alert_engine"}, alert_buffer["used"]),
+        ]),
+        family("rpm_buffer_capacity", "gauge", "Capacity of bounded buffers", [
+            ({"buffer": "mock_stream"}, stream_buffer["capacity"]),
+            ({"buffer": "alert_engine"}, alert_buffer["capacity"]),
+        ]),
+        family("rpm_vitals_patients", "gauge", "Patients in the vitals store", len(mock_stream_service.store)),
+        family("rpm_alert_temporal_patients", "gauge", "Patients with temporal alert-rule state",
+               alert_engine.temporal_patients),
+        family("rpm_alert_baseline_patients", "gauge", "Patients with a learned anomaly baseline",
+               len(alert_engine.baselines) if alert_engine.baselines is not None else 0),
+        family("rpm_event_hub_subscribers", "gauge", "Open SSE subscriptions", event_hub.stats()["subscribers"]),
+        family("rpm_llm_summary_pending", "gauge", "LLM summary jobs queued or running", summary_service.stats()["pending"]),
+        family("rpm_prediction_cache_lookups", "counter", "Prediction cache lookups by result", [
+            ({"result": "hit"}, predictions.get("hits", 0)),
+            ({"result": "miss"}, predictions.get("misses", 0)),
+        ]),
+    ]
+    store = alert_engine.store.stats()
+    families += [
+        family("rpm_alert_store_retained", "gauge", "Alerts held in the indexed alert store", store["retained"]),
+        family("rpm_alert_store_compacted", "counter", "Alerts dropped by retention compaction", store["compacted"]),
+    ]
+    families.append(family("rpm_risk_patients", "gauge", "Monitored patients by current risk tier",
+                           [({"tier": tier}, n) for tier, n in risk_scorer.tier_counts().items()]))
+    log = get_vitals_log()
+    if log is not None:
+        stats = log.stats()
+        families += [
+            family("rpm_vitals_log_records", "counter", "Durable log records appended and flushed", [
+                ({"stage": "appended"}, stats["appended"]),
+                ({"stage": "flushed"}, stats["flushed"]),
+            ]),
+            family("rpm_vitals_log_pending", "gauge", "Records buffered awaiting the next flush", stats["pending"]),
+        ]
+    return families
+
+
+def _process_families() -> list:
+    return [
+        family("rpm_process_uptime_seconds", "gauge", "Seconds since the metrics module loaded", time.time() - _started_at),
+        family("rpm_process_cpu_seconds", "counter", "CPU time used by this process", time.process_time()),
+        family("rpm_process_threads", "gauge", "Live threads in this process", threading.active_count()),
+    ]
+
+
+def install_metrics(app) -> None:
+    """Per-route request timing plus scrape-time collectors for the app's role."""
+    if app.config.get("SERVE_ROLE") != "api":
+        metrics.add_collector(_service_families)
+    metrics.add_collector(_process_families)
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_t0 = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        t0 = g.pop("metrics_t0", None)
+        if t0 is not None:
+            rule = request.url_rule
+            route = rule.rule if rule is not None else "<unmatched>"
+            http_request_seconds.labels(route, request.method).observe(time.perf_counter() - t0)
+            http_requests.labels(route, request.method, response.status_code).inc()
+        return response
+
+    hz = app.config.get("METRICS_PROFILER_HZ")
+    if hz and app.config.get("SERVE_ROLE") != "api":
+        profiler.start(hz)
+
+
+def _families() -> list:
+    """This process's families; api workers add the ingestion process's."""
+    local = metrics.collect()
+    if current_app.config.get("SERVE_ROLE") != "api":
+        return local
+    from routes.front import fetch_upstream
+
+    local = label_families(local, process=f"api-{os.getpid()}")
+    status, body = fetch_upstream("/metrics?format=json")
+    if status != 200:
+        return local
+    return merge_families(label_families(json.loads(body), process="ingest"), local)
+
+
+@metrics_bp.route("/metrics")
+def prometheus():
+    """Prometheus text exposition; ?format=json returns the raw families."""
+    families = _families()
+    if request.args.get("format") == "json":
+        return jsonify(families)
+    return Response(render_prometheus(families), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@metrics_bp.route("/api/metrics")
+def summary():
+    """Compact JSON: counters/gauges by label set, histograms as count/mean/p50/p99 in ms."""
+    return jsonify(summarize(_families()))
+
+
+@metrics_bp.route("/api/metrics/profile", methods=["GET", "POST"])
+def profile():
+    """
+    GET: collapsed stacks ("thread;outer;...;inner count" per line) for
+    flamegraph.pl or speedscope; ?format=json for profiler status.
+    POST {"enabled": true|false, "hz": 97, "reset": false}: start/stop sampling.
+    """
+    if current_app.config.get("SERVE_ROLE") == "api":
+        from routes.front import proxy
+
+        return proxy()
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify(error="Body must be an object"), 400
+        if data.get("reset"):
+            profiler.reset()
+        if "enabled" in data:
+            if data["enabled"]:
+                try:
+                    hz = int(data.get("hz", PROFILE_HZ))
+                except (TypeError, ValueError):
+                    return jsonify(error="hz must be an integer"), 400
+                profiler.start(hz)
+            else:
+                profiler.stop()
+        return jsonify(profiler.stats())
+    if request.args.get("format") == "json":
+        return jsonify(profiler.stats())
+    return Response(profiler.collapsed(), mimetype="text/plain")
@@ -1,9 +1,14 @@
-from flask import Blueprint, jsonify, request
+import json
 
-from services.predict_service import predict as run_predict
+from flask import Blueprint, Response, jsonify, request
+
+from services.llm_summary import summary_service
+from services.predict_service import MAX_BATCH_SIZE, predict as run_predict, predict_batch as run_predict_batch
 
 predict_bp = Blueprint("predict", __name__)
 
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
 
 @predict_bp.route("/predict", methods=["POST"])
 @predict_bp.route("/api/predict", methods=["POST"])
@@ -17,3 +22,71 @@ def predict():
         return jsonify(result)
     except Exception as e:
         return jsonify(error=str(e)), 500
+
+
+def _read_ndjson() -> list:
+    """Parse an NDJSON body line by line straight off the request stream."""
+    payloads = []
+    for line in request.stream:
+        line = line.strip()
+        if not line:
+            continue
+        if len(payloads) >= MAX_BATCH_SIZE:
+            raise OverflowError(f"Batch too large (max {MAX_BATCH_SIZE} payloads)")
+        payloads.append(json.loads(line))
+    return payloads
+
+
+@predict_bp.route("/api/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    Score N payloads at once. Body is a JSON array of form payloads, or NDJSON
+    (one payload per line, Content-Type application/x-ndjson). Returns an array
+    of results in input order; no LLM summaries.
+    """
+    try:
+        if request.mimetype in NDJSON_MIMETYPES:
+            payloads = _read_ndjson()
+        elif request.is_json:
+            payloads = request.get_json(silent=True)
+        else:
+            return jsonify(error="Content-Type must be application/json or application/x-ndjson"), 400
+    except OverflowError as e:
+        return jsonify(error=str(e)), 413
+    except ValueError:
+        return jsonify(error="Invalid JSON"), 400
+    if not isinstance(payloads, list) or not all(isinstance(p, dict) for p in payloads):
+        return jsonify(error="Body must be an array of objects"), 400
+    if len(payloads) > MAX_BATCH_SIZE:
+        return jsonify(error=f"Batch too large (max {MAX_BATCH_SIZE} payloads)"), 413
+    try:
+        return jsonify(run_predict_batch(payloads))
+    except Exception as e:
+        return jsonify(error=str(e)), 500
+
+
+@predict_bp.route("/api/predict/summary/<summary_id>")
+def get_summary(summary_id):
+    """Summary job status; ?wait=<seconds> (max 30) long-polls until it is finished."""
+    wait = min(max(request.args.get("wait", 0, type=float), 0.0), 30.0)
+    job = summary_service.wait(summary_id, wait) if wait else summary_service.get(summary_id)
+    if job is None:
+        return jsonify(error="Unknown summary_id"), 404
+    return jsonify(job.to_dict())
+
+
+@predict_bp.route("/api/predict/summary/<summary_id>/stream")
+def stream_summary(summary_id):
+    """Server-Sent Events: one `summary` event once the job finishes (keep-alives until then)."""
+    job = summary_service.get(summary_id)
+    if job is None:
+        return jsonify(error="Unknown summary_id"), 404
+
+    def events():
+        for _ in range(12):  # give up after ~60 s
+            if job.done.wait(5.0):
+                break
+            yield ": keepalive\n\n"
+        yield f"event: summary\ndata: {json.dumps(job.to_dict())}\n\n"
+
+    return Response(events(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,118 @@
+"""
+Response layer: jsonify goes through the fast encoder (services.encoding),
+high-volume routes negotiate their body format with respond(), and responses
+over COMPRESS_MIN_BYTES are gzip- or brotli-compressed when the client
+accepts it.
+
+Formats: ?format=columnar returns one array per field instead of a list of
+objects; ?format=msgpack, or Accept: application/msgpack, returns msgpack
+(either layout).
+"""
+from flask import Response, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+
+from services.encoding import (
+    ENCODINGS, JSON_MIMETYPE, MSGPACK_MIMETYPE, MSGPACK_MIMETYPES, compress, dumps_json, dumps_msgpack, json_array,
+    loads_json, msgpack, records_to_columns,
+)
+
+COMPRESS_MIN_BYTES = 1024  # below this the headers outweigh the savings
+COMPRESSIBLE_MIMETYPES = frozenset((
+    JSON_MIMETYPE, MSGPACK_MIMETYPE, "application/x-ndjson", "text/plain", "text/html", "text/csv",
+))
+FORMATS = ("json", "columnar", "msgpack")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider on the fast encoder; same output apart from whitespace and NaN as null."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:  # custom encoder arguments: keep the stdlib behaviour
+            return super().dumps(obj, **kwargs)
+        return dumps_json(obj, sort_keys=self.sort_keys, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads_json(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = dumps_json(obj, sort_keys=self.sort_keys, indent=indent, default=self.default)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def negotiate() -> tuple[str, str] | None:
+    """(layout, encoding) for this request: layout rows|columnar, encoding json|msgpack; None if unsupported."""
+    fmt = request.args.get("format", "json")
+    if fmt not in FORMATS:
+        return None
+    layout = "columnar" if fmt == "columnar" else "rows"
+    # Accept only selects msgpack when it names it explicitly, at least as high as JSON
+    accept = request.accept_mimetypes
+    msgpack_q = max((q for value, q in accept if value in MSGPACK_MIMETYPES), default=0)
+    wants_msgpack = fmt == "msgpack" or (msgpack_q > 0 and msgpack_q >= accept[JSON_MIMETYPE])
+    return layout, "msgpack" if wants_msgpack else "json"
+
+
+def _unsupported():
+    if request.args.get("format", "json") not in FORMATS:
+        return jsonify(error=f"format must be one of {', '.join(FORMATS)}"), 400
+    return jsonify(error="msgpack responses need the msgpack package installed"), 406
+
+
+def respond(rows, columns=None, raw=None):
+    """
+    Encode a route's result in the negotiated format. rows() returns the
+    result as a list of objects (or any JSON value); columns() the same data as
+    one array per field, built straight from the source buffers (default:
+    pivot rows()). raw(), when given, returns the rows already JSON-encoded
+    and is spliced into the plain JSON response without decoding.
+    Only the callable the format needs is called.
+    """
+    negotiated = negotiate()
+    if negotiated is None or (negotiated[1] == "msgpack" and msgpack is None):
+        return _unsupported()
+    layout, encoding = negotiated
+    if layout == "rows" and encoding == "json" and raw is not None:
+        return Response(json_array(raw()), mimetype=JSON_MIMETYPE)
+    if layout == "columnar":
+        data = columns() if columns is not None else rows()
+        if isinstance(data, list):
+            data = records_to_columns(data)
+    else:
+        data = rows()
+    if encoding == "msgpack":
+        return Response(dumps_msgpack(data), mimetype=MSGPACK_MIMETYPE)
+    return Response(dumps_json(data), mimetype=JSON_MIMETYPE)
+
+
+def install_responses(app) -> None:
+    """Fast jsonify plus Accept-Encoding negotiation on every response."""
+    app.json = FastJSONProvider(app)
+    min_bytes = app.config.get("COMPRESS_MIN_BYTES", COMPRESS_MIN_BYTES)
+    if not min_bytes:
+        return
+
+    @app.after_request
+    def _compress(response):
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(ENCODINGS)
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < min_bytes:
+            return response
+        response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
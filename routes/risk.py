@@ -0,0 +1,43 @@
+from flask import Blueprint, jsonify, request
+
+from routes.vitals import sse_response
+from services.risk_scorer import RISK_TOP_DEFAULT, risk_scorer
+
+risk_bp = Blueprint("risk", __name__, url_prefix="/api/risk")
+
+RISK_TOP_MAX = 1000
+
+
+@risk_bp.route("")
+def get_risk():
+    """
+    One patient's latest continuous risk score (?patient_id=), or the fleet
+    view: patients per tier and the highest-risk patients (?limit=).
+    """
+    patient_id = request.args.get("patient_id")
+    if patient_id is not None:
+        score = risk_scorer.get(patient_id)
+        if score is None:
+            return jsonify(error="Patient not scored yet"), 404
+        return jsonify(score)
+    limit = min(max(1, request.args.get("limit", RISK_TOP_DEFAULT, type=int)), RISK_TOP_MAX)
+    return jsonify(tiers=risk_scorer.tier_counts(), top=risk_scorer.top(limit), stats=risk_scorer.stats())
+
+
+@risk_bp.route("/profile", methods=["PUT"])
+def put_profile():
+    """Static model features for ?patient_id= (same fields as /predict); bp comes from live vitals."""
+    patient_id = request.args.get("patient_id")
+    if not patient_id:
+        return jsonify(error="patient_id is required"), 400
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify(error="Body must be a JSON object"), 400
+    risk_scorer.set_profile(patient_id, payload)
+    return jsonify(patientId=patient_id, status="ok")
+
+
+@risk_bp.route("/stream")
+def stream():
+    """Tier changes as Server-Sent Events, optionally for one ?patient_id=."""
+    return sse_response("risk")
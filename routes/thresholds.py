@@ -1,24 +1,84 @@
 from flask import Blueprint, jsonify, request
 
 from services.alert_engine import alert_engine
+from services.threshold_profiles import THRESHOLD_KEYS
 
 thresholds_bp = Blueprint("thresholds", __name__, url_prefix="/api/thresholds")
 
 
+def _parse_updates(data: dict) -> dict:
+    return {k: int(v) for k, v in data.items() if k in THRESHOLD_KEYS and isinstance(v, (int, float))}
+
+
+def _scope() -> dict:
+    """Optional ?patient_id= or ?cohort= selecting which profile a request targets."""
+    return {
+        "patient_id": request.args.get("patient_id"),
+        "cohort": request.args.get("cohort"),
+    }
+
+
 @thresholds_bp.route("", methods=["GET"])
 def get_thresholds():
-    return jsonify(alert_engine.get_thresholds())
+    return jsonify(alert_engine.get_thresholds(**_scope()))
 
 
 @thresholds_bp.route("", methods=["PUT"])
 def put_thresholds():
     data = request.get_json(silent=True) or {}
-    allowed = {
-        "heartRateHigh", "heartRateLow",
-        "systolicHigh", "diastolicHigh", "diastolicLow",
-    }
-    updates = {k: int(v) for k, v in data.items() if k in allowed and isinstance(v, (int, float))}
+    if not isinstance(data, dict):
+        return jsonify(error="Body must be an object of threshold values"), 400
+    updates = _parse_updates(data)
+    scope = _scope()
     if not updates:
-        return jsonify(alert_engine.get_thresholds())
-    alert_engine.set_thresholds(updates)
-    return jsonify(alert_engine.get_thresholds())
+        return jsonify(alert_engine.get_thresholds(**scope))
+    alert_engine.set_thresholds(updates, **scope)
+    return jsonify(alert_engine.get_thresholds(**scope))
+
+
+@thresholds_bp.route("", methods=["DELETE"])
+def delete_thresholds():
+    """Drop a patient's overrides (?patient_id=) or a cohort profile (?cohort=)."""
+    scope = _scope()
+    profiles = alert_engine.profiles
+    if scope["patient_id"] is not None:
+        profiles.clear_patient(scope["patient_id"])
+    elif scope["cohort"] is not None:
+        profiles.delete_cohort(scope["cohort"])
+    else:
+        return jsonify(error="patient_id or cohort is required"), 400
+    return jsonify(profiles.describe())
+
+
+@thresholds_bp.route("/profiles", methods=["GET"])
+def get_profiles():
+    return jsonify(alert_engine.profiles.describe())
+
+
+@thresholds_bp.route("/patients", methods=["PUT"])
+def put_patient_thresholds():
+    """Bulk patient overrides: { "<patient_id>": { "heartRateHigh": 130, ... }, ... }."""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify(error="Body must be an object keyed by patient_id"), 400
+    overrides = {}
+    for pid, values in data.items():
+        updates = _parse_updates(values) if isinstance(values, dict) else {}
+        if updates:
+            overrides[str(pid)] = updates
+    if overrides:
+        alert_engine.profiles.set_patients(overrides)
+    return jsonify(alert_engine.profiles.describe())
+
+
+@thresholds_bp.route("/cohorts/<cohort>/patients", methods=["PUT"])
+def assign_cohort(cohort):
+    """Assign patients to a cohort: { "patients": ["p1", "p2", ...] }."""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify(error="Body must be an object with a 'patients' array"), 400
+    patients = data.get("patients")
+    if not isinstance(patients, list):
+        return jsonify(error="'patients' must be an array"), 400
+    alert_engine.profiles.assign_cohort([str(p) for p in patients], cohort)
+    return jsonify(alert_engine.profiles.describe())
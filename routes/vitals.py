@@ -1,13 +1,37 @@
-from flask import Blueprint, jsonify, request
+import json
+import time
 
+import numpy as np
+from flask import Blueprint, Response, jsonify, request
+
+from routes.predict import NDJSON_MIMETYPES
+from routes.responses import respond
+from services.alert_engine import alert_engine
+from services.encoding import MSGPACK_MIMETYPES, msgpack
+from services.event_hub import event_hub, sse_events
+from services.histogram_service import build_histogram_from_bins
+from services.ingest import (
+    MAX_INGEST_BATCH, IngestError, IngestTooLarge, ingest_pipeline, rows_to_columns, validate_columns,
+)
+from services.metrics import readings_rejected
 from services.mock_stream import mock_stream_service
+from services.shared_state import SharedStateFull
+from services.vitals_log import get_vitals_log
+from services.vitals_distribution import DEFAULT_QUANTILES, VITAL_BINS, vitals_distribution
+from services.vitals_rollup import downsample_series, vitals_rollups
+from services.vitals_store import VITAL_FIELDS
+
+DEFAULT_RANGE_MS = 3_600_000
+MAX_POINTS = 5000
+MAX_REJECTED_REPORTED = 100
 
 vitals_bp = Blueprint("vitals", __name__, url_prefix="/api/vitals")
 
 
 @vitals_bp.route("/latest")
 def latest():
-    reading = mock_stream_service.get_latest()
+    patient_id = request.args.get("patient_id")
+    reading = mock_stream_service.get_latest(patient_id=patient_id)
     if reading is None:
         return jsonify(error="No vitals yet"), 404
     return jsonify(reading)
@@ -15,7 +39,197 @@ def latest():
 
 @vitals_bp.route("/history")
 def history():
+    """
+    Recent raw readings (?limit=, max 100), or with any of ?from=&to=&points=
+    (epoch ms; default last hour, 500 points) an LTTB-downsampled series per
+    vital drawn from raw readings when they cover the range, else from the
+    durable log when enabled, else from the finest rollup resolution that does.
+    Raw readings honour ?format=columnar (one array per field, straight from
+    the ring buffer) and msgpack (see routes/responses.py).
+    """
+    patient_id = request.args.get("patient_id")
+    if any(k in request.args for k in ("from", "to", "points")):
+        return _history_range(patient_id or mock_stream_service.patient_id)
     limit = request.args.get("limit", 50, type=int)
     limit = min(max(1, limit), 100)
-    data = mock_stream_service.get_history(limit=limit)
-    return jsonify(data)
+    patient_id = patient_id or mock_stream_service.patient_id
+    store = mock_stream_service.store
+    return respond(lambda: store.history(patient_id, limit), columns=lambda: store.history_columns(patient_id, limit))
+
+
+def _history_range(patient_id: str):
+    end = request.args.get("to", type=int) or int(time.time() * 1000)
+    start = request.args.get("from", type=int)
+    if start is None:
+        start = end - DEFAULT_RANGE_MS
+    points = min(max(request.args.get("points", 500, type=int), 2), MAX_POINTS)
+    if start > end:
+        return jsonify(error="'from' must be <= 'to'"), 400
+    out = {"patientId": patient_id, "from": start, "to": end, "points": points}
+
+    window = mock_stream_service.store.snapshot(patient_id)
+    if window is not None and len(window[0]) and window[0][0] <= start:
+        ts, values = window
+        mask = (ts >= start) & (ts <= end)
+        ts, values = ts[mask], values[:, mask]
+        out["source"] = "raw"
+    elif (log := get_vitals_log()) is not None and (oldest := log.oldest(patient_id)) is not None and oldest <= start:
+        ts, values = log.read_range(patient_id, start, end)
+        out["source"] = "log"
+    else:
+        resolution = vitals_rollups.covering_resolution(patient_id, start)
+        if resolution is None:
+            out.update(source="none", series={v: {"timestamps": [], "values": []} for v in VITAL_FIELDS})
+            return jsonify(out)
+        rolled = vitals_rollups.series(patient_id, resolution, start, end)
+        ts, values = rolled["timestamps"], rolled["mean"]
+        out["source"] = resolution
+    out["series"] = downsample_series(ts, values, points)
+    return jsonify(out)
+
+
+def _read_ingest_body():
+    """Decoded upload: a list of reading objects or a columnar object of arrays."""
+    if request.mimetype in MSGPACK_MIMETYPES:
+        if msgpack is None:
+            raise TypeError("msgpack uploads need the msgpack package installed")
+        return msgpack.unpackb(request.get_data(), raw=False)
+    if request.mimetype in NDJSON_MIMETYPES:
+        rows = []
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            if len(rows) >= MAX_INGEST_BATCH:
+                raise IngestTooLarge(f"Batch too large (max {MAX_INGEST_BATCH} readings)")
+            rows.append(json.loads(line))
+        return rows
+    if request.is_json:
+        body = request.get_json(silent=True)
+        if body is None:
+            raise ValueError("Invalid JSON")
+        return body
+    raise TypeError("Content-Type must be application/json, application/x-ndjson or application/msgpack")
+
+
+@vitals_bp.route("/ingest", methods=["POST"])
+def ingest():
+    """
+    Bulk upload from device gateways: a JSON array of readings, NDJSON (one
+    reading per line), or msgpack; either form may also be one columnar object
+    {"patientId": [...], "timestamp": [...], "heartRate": [...], ...}. Invalid
+    readings are skipped and reported; the rest are stored and alert-checked
+    as one batch.
+    """
+    try:
+        body = _read_ingest_body()
+        columns = rows_to_columns(body) if isinstance(body, list) else body
+        batch = validate_columns(columns)
+    except TypeError as e:
+        return jsonify(error=str(e)), 415
+    except IngestError as e:
+        return jsonify(error=str(e)), e.status
+    except ValueError:
+        return jsonify(error="Malformed body"), 400
+    if batch.rejected:
+        readings_rejected.inc(len(batch.rejected))
+    try:
+        result = ingest_pipeline.ingest(batch)
+    except SharedStateFull as e:  # ingest role: no slot left for a new patient
+        return jsonify(error=str(e)), 507
+    result["rejected"] = len(batch.rejected)
+    if batch.rejected:
+        result["errors"] = batch.rejected[:MAX_REJECTED_REPORTED]
+    return jsonify(result)
+
+
+@vitals_bp.route("/rollups")
+def rollups():
+    """Tumbling-window aggregates: ?patient_id=&resolution=1m|5m|1h&from=&to= (epoch ms)."""
+    patient_id = request.args.get("patient_id") or mock_stream_service.patient_id
+    resolution = request.args.get("resolution", "1m")
+    if resolution not in vitals_rollups.resolutions:
+        return jsonify(error=f"resolution must be one of {sorted(vitals_rollups.resolutions)}"), 400
+    rolled = vitals_rollups.series(
+        patient_id, resolution, request.args.get("from", type=int), request.args.get("to", type=int)
+    )
+    if rolled is None:
+        return jsonify(error="No vitals yet"), 404
+
+    def _col(a):
+        return np.where(np.isnan(a), None, np.round(a, 2)).tolist()
+
+    return jsonify({
+        "patientId": patient_id,
+        "resolution": resolution,
+        "timestamps": rolled["timestamps"].tolist(),
+        "vitals": {
+            vital: {
+                "count": rolled["count"][j].tolist(),
+                "mean": _col(rolled["mean"][j]),
+                "min": _col(rolled["min"][j].astype(np.float64)),
+                "max": _col(rolled["max"][j].astype(np.float64)),
+            }
+            for j, vital in enumerate(VITAL_FIELDS)
+        },
+    })
+
+
+@vitals_bp.route("/patients")
+def patients():
+    return jsonify(mock_stream_service.store.patient_ids())
+
+
+def distribution_sketch(vital: str, patient_id: str | None, cohort: str | None):
+    """Merged sketch for one patient, a cohort, or (neither given) every patient."""
+    if patient_id:
+        patient_ids = [patient_id]
+    elif cohort:
+        patient_ids = alert_engine.profiles.cohort_members(cohort)
+    else:
+        patient_ids = vitals_distribution.patient_ids()
+    return vitals_distribution.sketch(vital, patient_ids)
+
+
+@vitals_bp.route("/distribution")
+def distribution():
+    """
+    Distribution of one vital (?vital=, default heartRate) for ?patient_id=, ?cohort=
+    or all patients: count/min/max/mean, ?quantiles=0.5,0.95,0.99 and bin counts.
+    ?format=png renders the bins as a histogram image.
+    """
+    vital = request.args.get("vital", "heartRate")
+    if vital not in VITAL_BINS:
+        return jsonify(error=f"Unknown vital '{vital}'"), 400
+    try:
+        qs = [float(q) for q in request.args.get("quantiles", "").split(",") if q] or DEFAULT_QUANTILES
+    except ValueError:
+        return jsonify(error="quantiles must be comma-separated numbers in [0, 1]"), 400
+    if not all(0.0 <= q <= 1.0 for q in qs):
+        return jsonify(error="quantiles must be comma-separated numbers in [0, 1]"), 400
+    sketch = distribution_sketch(vital, request.args.get("patient_id"), request.args.get("cohort"))
+    if request.args.get("format") == "png":
+        if not sketch.n:
+            return jsonify(error="No readings yet"), 404
+        counts, edges = sketch.bins()
+        png = build_histogram_from_bins(counts, edges, title=f"{vital} distribution", xlabel=vital)
+        return Response(png, mimetype="image/png")
+    return jsonify(sketch.summary(qs))
+
+
+def sse_response(topic: str) -> Response:
+    """Open a Server-Sent Events stream on topic, optionally filtered by ?patient_id=."""
+    try:
+        sub = event_hub.subscribe(topic, patient_id=request.args.get("patient_id"))
+    except RuntimeError as e:
+        return jsonify(error=str(e)), 503
+    return Response(
+        sse_events(sub),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@vitals_bp.route("/stream")
+def stream():
+    return sse_response("vitals")
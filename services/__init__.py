@@ -1,5 +1,6 @@
+from .vitals_store import vitals_store
 from .mock_stream import mock_stream_service
 from .alert_engine import alert_engine
 from .emergency_workflow import emergency_workflow
 
-__all__ = ["mock_stream_service", "alert_engine", "emergency_workflow"]
+__all__ = ["vitals_store", "mock_stream_service", "alert_engine", "emergency_workflow"]
@@ -1,144 +1,787 @@
 """
 Threshold-based alert detection. Evaluates each vital reading against
-configurable thresholds and maintains a list of recent alerts.
+per-patient threshold profiles and maintains a list of recent alerts.
+
+Three layers run on every reading:
+- ALERT_RULES: instantaneous threshold checks on the reading alone.
+- TEMPORAL_RULES: stateful rules that confirm a condition over recent
+  readings (k of the last n), follow a trend (EWMA level, regression slope)
+  or combine vitals. Each patient keeps O(1) state per vital and per rule,
+  updated incrementally; history is never rescanned.
+- ANOMALY_VITALS: each patient's own baseline (online mean/variance) per
+  vital; a reading far from it in z-score raises a warning even when it is
+  inside the fixed thresholds.
+
+Only confirmed (temporal) critical alerts escalate to the on_critical
+callback, so one noisy sample no longer starts an emergency.
 """
 from collections import deque
-from threading import Lock
+from heapq import merge
+import math
+from operator import itemgetter
 import time
 
-DEFAULT_THRESHOLDS = {
-    "heartRateHigh": 120,
-    "heartRateLow": 50,
-    "systolicHigh": 180,
-    "diastolicHigh": 120,
-    "diastolicLow": 60,
-}
+import numpy as np
+
+from services.alert_store import AlertStore, alert_store
+from services.event_hub import EventHub, event_hub
+from services.metrics import TimedLock, alert_evaluation_seconds, alerts_raised
+from services.threshold_profiles import DEFAULT_THRESHOLDS, ThresholdProfiles
 
 ALERTS_BUFFER_SIZE = 50
 ALERTS_MAX_AGE_MS = 60 * 1000  # 1 minute
 
+_eval_scalar = alert_evaluation_seconds.labels("scalar")
+_eval_batch = alert_evaluation_seconds.labels("batch")
+
+
+# One row per threshold check, in the order detect_alerts reports them:
+# (vital, threshold key, comparison, alert type, message, severity, skip when threshold is falsy)
+ALERT_RULES = (
+    ("heartRate", "heartRateHigh", ">=", "heartRate", "High heart rate: {} BPM", "critical", False),
+    ("heartRate", "heartRateLow", "<=", "heartRate", "Low heart rate: {} BPM", "critical", False),
+    ("systolic", "systolicHigh", ">=", "bloodPressure", "High systolic: {} mmHg", "critical", False),
+    ("diastolic", "diastolicHigh", ">=", "bloodPressure", "High diastolic: {} mmHg", "critical", False),
+    ("diastolic", "diastolicLow", "<=", "bloodPressure", "Low diastolic: {} mmHg", "warning", True),
+    ("bloodOxygen", "spo2Low", "<", "bloodOxygen", "Low SpO2: {}%", "critical", False),
+)
+
+_COMPARE = {
+    ">=": lambda v, t: v >= t,
+    "<=": lambda v, t: v <= t,
+    "<": lambda v, t: v < t,
+    ">": lambda v, t: v > t,
+}
+
+# Stateful rules, evaluated after ALERT_RULES. A rule fires once when at least
+# k of the patient's last n readings satisfy all of its conditions, and re-arms
+# only after n readings in a row do not (hysteresis against flapping).
+# A condition is (vital, statistic, comparison, threshold):
+#   statistic  "value" (this reading), "ewma" (smoothed level), "slope" (trend, units/min)
+#   threshold  a number, or a threshold-profile key resolved per patient
+# A condition is false when the reading lacks its vital.
+# (rule id, alert type, conditions, k, n, message, severity)
+TEMPORAL_RULES = (
+    ("heartRateHighSustained", "heartRate", (("heartRate", "value", ">=", "heartRateHigh"),), 5, 6,
+     "Sustained high heart rate: {} BPM", "critical"),
+    ("heartRateLowSustained", "heartRate", (("heartRate", "value", "<=", "heartRateLow"),), 5, 6,
+     "Sustained low heart rate: {} BPM", "critical"),
+    ("systolicHighSustained", "bloodPressure", (("systolic", "value", ">=", "systolicHigh"),), 4, 5,
+     "Sustained high systolic: {} mmHg", "critical"),
+    ("spo2LowSustained", "bloodOxygen", (("bloodOxygen", "value", "<", "spo2Low"),), 3, 4,
+     "Sustained low SpO2: {}%", "critical"),
+    ("spo2Falling", "bloodOxygen", (("bloodOxygen", "slope", "<=", -8.0),), 1, 1,
+     "SpO2 falling {} %/min", "warning"),
+    ("respiratoryDistress", "respiratory", (("bloodOxygen", "value", "<", 92), ("respiratoryRate", "value", ">", 24)),
+     2, 3, "Low SpO2 {}% with respiratory rate {}/min", "critical"),
+    ("feverSustained", "temperature", (("temperature", "ewma", ">=", 38.0),), 1, 1,
+     "Persistent fever: {} °C", "warning"),
+)
+
+TEMPORAL_EWMA_ALPHA = 0.2  # per-reading weight of the newest value in "ewma"
+TEMPORAL_TREND_TAU_S = 30.0  # slope regression weights decay as exp(-age / tau), independent of sample rate
+TEMPORAL_MIN_WEIGHT = 2.5  # decayed reading count before a slope is reported
+TEMPORAL_MIN_TIME_VAR = 8.0  # and weighted variance of reading times (s^2), about 10 s of data
+TEMPORAL_MAX_WINDOW = 16  # n is kept as a bitmask; popcounts come from a 2**16 table
+TEMPORAL_INITIAL_SLOTS = 1024
 
-def detect_alerts(reading: dict, thresholds: dict) -> list:
+# per-vital state columns: EWMA, then time-decayed sums of w, w*t, w*v, w*t^2,
+# w*t*v with t in seconds relative to the newest reading, and that reading's time
+_EWMA, _W, _WT, _WV, _WTT, _WTV, _LAST_T = range(7)
+_TEMPORAL_FIELDS = 7
+_POPCOUNT = np.array([bin(i).count("1") for i in range(1 << TEMPORAL_MAX_WINDOW)], dtype=np.int64)
+
+# Per-patient baselines: each vital's running mean/variance is learned online
+# and a reading whose z-score against it reaches ANOMALY_Z raises a warning,
+# whatever the fixed thresholds say.
+# (vital, alert type, label, unit, minimum standard deviation); the minimum keeps a
+# clinically negligible change from scoring high
+ANOMALY_VITALS = (
+    ("heartRate", "heartRate", "Heart rate", " BPM", 5.0),
+    ("systolic", "bloodPressure", "Systolic", " mmHg", 6.0),
+    ("diastolic", "bloodPressure", "Diastolic", " mmHg", 4.0),
+    ("bloodOxygen", "bloodOxygen", "SpO2", "%", 1.0),
+    ("temperature", "temperature", "Temperature", " °C", 0.2),
+    ("respiratoryRate", "respiratory", "Respiratory rate", "/min", 2.0),
+)
+ANOMALY_Z = 4.0  # |z| that raises an alert
+ANOMALY_REARM_Z = 3.0  # and the |z| a vital must fall below before it can alert again
+ANOMALY_WARMUP = 30  # readings before a baseline is trusted
+ANOMALY_WINDOW = 600  # Welford up to this many readings, then exponentially weighted (alpha = 1/window)
+ANOMALY_CLIP_Z = 4.0  # after warm-up one reading moves the baseline by at most this many sd
+
+
+def _rule_threshold(key, thresholds):
+    return thresholds.get(key, DEFAULT_THRESHOLDS[key])
+
+
+def _alert_value(value):
+    """Normalise a reading value so scalar and batch paths format it the same way."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _make_alert(rule, value, threshold, ts: int, patient_id=None) -> dict:
+    _, _, _, alert_type, message, severity, _ = rule
+    value = _alert_value(value)
+    threshold = _alert_value(threshold)
+    alert = {
+        "type": alert_type,
+        "message": message.format(value),
+        "severity": severity,
+        "timestamp": ts,
+        "value": value,
+        "threshold": threshold,
+    }
+    if patient_id is not None:
+        alert["patientId"] = patient_id
+    return alert
+
+
+def detect_alerts(reading: dict, thresholds) -> list:
     """Compare one reading to thresholds; return list of alert dicts."""
     alerts = []
     ts = int(time.time() * 1000)
-    hr_high = thresholds.get("heartRateHigh", DEFAULT_THRESHOLDS["heartRateHigh"])
-    hr_low = thresholds.get("heartRateLow", DEFAULT_THRESHOLDS["heartRateLow"])
-    sys_high = thresholds.get("systolicHigh", DEFAULT_THRESHOLDS["systolicHigh"])
-    dia_high = thresholds.get("diastolicHigh", DEFAULT_THRESHOLDS["diastolicHigh"])
-    dia_low = thresholds.get("diastolicLow", DEFAULT_THRESHOLDS["diastolicLow"])
-
-    hr = reading.get("heartRate")
-    if hr is not None:
-        if hr >= hr_high:
-            alerts.append({
-                "type": "heartRate",
-                "message": f"High heart rate: {hr} BPM",
-                "severity": "critical",
-                "timestamp": ts,
-                "value": hr,
-                "threshold": hr_high,
-            })
-        if hr <= hr_low:
-            alerts.append({
-                "type": "heartRate",
-                "message": f"Low heart rate: {hr} BPM",
-                "severity": "critical",
-                "timestamp": ts,
-                "value": hr,
-                "threshold": hr_low,
-            })
-
-    systolic = reading.get("systolic")
-    if systolic is not None and systolic >= sys_high:
-        alerts.append({
-            "type": "bloodPressure",
-            "message": f"High systolic: {systolic} mmHg",
-            "severity": "critical",
-            "timestamp": ts,
-            "value": systolic,
-            "threshold": sys_high,
-        })
-
-    diastolic = reading.get("diastolic")
-    if diastolic is not None:
-        if diastolic >= dia_high:
-            alerts.append({
-                "type": "bloodPressure",
-                "message": f"High diastolic: {diastolic} mmHg",
-                "severity": "critical",
-                "timestamp": ts,
-                "value": diastolic,
-                "threshold": dia_high,
-            })
-        if dia_low and diastolic <= dia_low:
-            alerts.append({
-                "type": "bloodPressure",
-                "message": f"Low diastolic: {diastolic} mmHg",
-                "severity": "warning",
-                "timestamp": ts,
-                "value": diastolic,
-                "threshold": dia_low,
-            })
-
-    spo2 = reading.get("bloodOxygen")
-    if spo2 is not None and spo2 < 92:
-        alerts.append({
-            "type": "bloodOxygen",
-            "message": f"Low SpO2: {spo2}%",
-            "severity": "critical",
-            "timestamp": ts,
-            "value": spo2,
-            "threshold": 92,
-        })
+    patient_id = reading.get("patientId")
+    for rule in ALERT_RULES:
+        vital, key, op, _, _, _, optional = rule
+        value = reading.get(vital)
+        if value is None:
+            continue
+        threshold = _rule_threshold(key, thresholds)
+        if optional and not threshold:
+            continue
+        if _COMPARE[op](value, threshold):
+            alerts.append(_make_alert(rule, value, threshold, ts, patient_id))
+    return alerts
 
+
+def detect_alerts_batch(columns: dict, thresholds: dict) -> list:
+    """
+    Vectorised detect_alerts over a columnar block of readings.
+    columns maps vital name -> 1-D array (one row per reading, any mix of
+    patients/samples) and optionally "patientId" -> sequence of ids.
+    Missing vitals may be NaN. thresholds values may be scalars or per-row
+    arrays (see RuleTable.batch_thresholds). Returns the same alerts, in the
+    same order, as calling detect_alerts on each row in turn.
+    """
+    return [alert for _, alert in _detect_alerts_rows(columns, thresholds)]
+
+
+def _detect_alerts_rows(columns: dict, thresholds: dict) -> list:
+    """detect_alerts_batch as (row, alert) pairs, rows ascending."""
+    n = None
+    for vital, *_ in ALERT_RULES:
+        if vital in columns:
+            n = len(columns[vital])
+            break
+    if not n:
+        return []
+    masks = np.zeros((n, len(ALERT_RULES)), dtype=bool)
+    values = np.full((n, len(ALERT_RULES)), np.nan)
+    rule_thresholds = []
+    for k, rule in enumerate(ALERT_RULES):
+        vital, key, op, _, _, _, optional = rule
+        threshold = _rule_threshold(key, thresholds)
+        rule_thresholds.append(threshold)
+        col = columns.get(vital)
+        per_row = isinstance(threshold, np.ndarray)
+        if col is None or (optional and not per_row and not threshold):
+            continue
+        v = np.asarray(col, dtype=np.float64)
+        values[:, k] = v
+        mask = _COMPARE[op](v, threshold)  # NaN compares False
+        if optional and per_row:
+            mask &= threshold != 0
+        masks[:, k] = mask
+    rows, ks = np.nonzero(masks)  # row-major: per reading, rules in order
+    if not len(rows):
+        return []
+    ts = int(time.time() * 1000)
+    patient_ids = columns.get("patientId")
+    hit_values = values[rows, ks].tolist()
+    alerts = []
+    for row, k, value in zip(rows.tolist(), ks.tolist(), hit_values):
+        patient_id = patient_ids[row] if patient_ids is not None else None
+        threshold = rule_thresholds[k]
+        if isinstance(threshold, np.ndarray):
+            threshold = threshold[row]
+        alerts.append((row, _make_alert(ALERT_RULES[k], value, threshold, ts, patient_id)))
     return alerts
 
 
+def _advance(s: list, o: int, v: float, t: float) -> None:
+    """Fold reading v at time t (seconds) into the vital state at s[o:o + 7], in place."""
+    w, wt, wv, wtt, wtv, last = s[o + _W], s[o + _WT], s[o + _WV], s[o + _WTT], s[o + _WTV], s[o + _LAST_T]
+    # re-centre the sums on t, decay them by age, then add the new reading at offset 0;
+    # fresh state (all zero) decays to nothing, so the first reading needs no special case
+    dt = max(t - last, 0.0)
+    decay = math.exp(-dt / TEMPORAL_TREND_TAU_S)
+    wtt = wtt - 2.0 * dt * wt + dt * dt * w
+    wtv = wtv - dt * wv
+    wt = wt - dt * w
+    s[o + _EWMA] = v if w == 0.0 else s[o + _EWMA] + TEMPORAL_EWMA_ALPHA * (v - s[o + _EWMA])
+    s[o + _W] = decay * w + 1.0
+    s[o + _WT] = decay * wt
+    s[o + _WV] = decay * wv + v
+    s[o + _WTT] = decay * wtt
+    s[o + _WTV] = decay * wtv
+    s[o + _LAST_T] = max(t, last)
+
+
+def _slope(s: list, o: int) -> float | None:
+    """Weighted least-squares slope of recent readings, units per minute."""
+    w, wt = s[o + _W], s[o + _WT]
+    den = w * s[o + _WTT] - wt * wt
+    if w < TEMPORAL_MIN_WEIGHT or den < TEMPORAL_MIN_TIME_VAR * w * w:
+        return None
+    return (w * s[o + _WTV] - wt * s[o + _WV]) / den * 60.0
+
+
+def _temporal_alert(rule, shown: list, threshold, ts: int, patient_id) -> dict:
+    rule_id, alert_type, conditions, _, _, message, severity = rule
+    shown = [_alert_value(x if c[1] == "value" else round(x, 1)) for c, x in zip(conditions, shown)]
+    alert = {
+        "type": alert_type,
+        "rule": rule_id,
+        "message": message.format(*shown),
+        "severity": severity,
+        "timestamp": ts,
+        "value": shown[0],
+        "threshold": _alert_value(threshold),
+    }
+    if patient_id is not None:
+        alert["patientId"] = patient_id
+    return alert
+
+
+def _rounds(slots: np.ndarray) -> list:
+    """
+    Split rows into rounds for per-patient state updates: each patient's first
+    row in the block, then its second, ... Rows within a round belong to
+    different patients and stay in block order, so one vectorised step per
+    round applies every patient's readings in order.
+    """
+    n = len(slots)
+    if len(np.unique(slots)) == n:
+        return [np.arange(n)]
+    # occurrence[i]: how many earlier rows in the block belong to row i's patient
+    order = np.argsort(slots, kind="stable")
+    sorted_slots = slots[order]
+    starts = np.flatnonzero(np.r_[True, sorted_slots[1:] != sorted_slots[:-1]])
+    occurrence = np.empty(n, dtype=np.intp)
+    occurrence[order] = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+    return np.split(np.argsort(occurrence, kind="stable"), np.cumsum(np.bincount(occurrence))[:-1])
+
+
+def _condition_threshold(threshold, thresholds):
+    return _rule_threshold(threshold, thresholds) if isinstance(threshold, str) else threshold
+
+
+class TemporalState:
+    """
+    Incremental per-patient state for temporal rules, kept as arrays indexed by
+    a patient slot: stats[slot, vital * 7 + field] (EWMA + decayed regression
+    sums, for vitals with "ewma"/"slope" conditions), masks[slot, rule] (last
+    n condition results as bits) and active[slot, rule] (fired and not yet
+    re-armed). evaluate() and evaluate_batch() produce the same alerts for
+    the same sequence of readings.
+    """
+
+    def __init__(self, rules: tuple = TEMPORAL_RULES):
+        for rule in rules:
+            if not 1 <= rule[3] <= rule[4] <= TEMPORAL_MAX_WINDOW:
+                raise ValueError(f"temporal rule {rule[0]!r} needs 1 <= k <= n <= {TEMPORAL_MAX_WINDOW}")
+        self.rules = rules
+        self.vitals = tuple(dict.fromkeys(c[0] for rule in rules for c in rule[2]))
+        # only vitals with "ewma"/"slope" conditions carry state; "value" reads the reading itself
+        tracked = dict.fromkeys(c[0] for rule in rules for c in rule[2] if c[1] != "value")
+        offset = {v: j * _TEMPORAL_FIELDS for j, v in enumerate(tracked)}
+        self._offsets = tuple(offset.items())
+        # per rule: (k, need, full mask, ((vital, offset, stat, compare, threshold), ...))
+        self._compiled = tuple(
+            (k, rule[3], (1 << rule[4]) - 1, tuple((c[0], offset.get(c[0]), c[1], _COMPARE[c[2]], c[3]) for c in rule[2]))
+            for k, rule in enumerate(rules)
+        )
+        self._slots: dict = {}
+        width = len(offset) * _TEMPORAL_FIELDS
+        self._stats = np.zeros((TEMPORAL_INITIAL_SLOTS, width))
+        self._masks = np.zeros((TEMPORAL_INITIAL_SLOTS, len(rules)), dtype=np.int64)
+        self._active = np.zeros((TEMPORAL_INITIAL_SLOTS, len(rules)), dtype=bool)
+        self._lock = TimedLock("alert_state")
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _slot(self, patient_id) -> int:
+        slot = self._slots.get(patient_id)
+        if slot is None:
+            slot = self._slots[patient_id] = len(self._slots)
+            if slot == len(self._stats):
+                self._stats = np.concatenate([self._stats, np.zeros_like(self._stats)])
+                self._masks = np.concatenate([self._masks, np.zeros_like(self._masks)])
+                self._active = np.concatenate([self._active, np.zeros_like(self._active)])
+        return slot
+
+    def evaluate(self, reading: dict, thresholds, now_ms: int) -> list:
+        """Fold one reading into its patient's state; return newly confirmed alerts."""
+        patient_id = reading.get("patientId")
+        t = (reading.get("timestamp") or now_ms) / 1000.0
+        current = {}
+        for vital in self.vitals:
+            v = reading.get(vital)
+            if v is not None and v == v:
+                current[vital] = float(v)
+        alerts = []
+        with self._lock:
+            slot = self._slot(patient_id)
+            stats = self._stats[slot].tolist()
+            for vital, o in self._offsets:
+                v = current.get(vital)
+                if v is not None:
+                    _advance(stats, o, v, t)
+            self._stats[slot] = stats
+            masks = self._masks[slot].tolist()
+            active = None
+            for k, need, full, conditions in self._compiled:
+                hit, shown = True, []
+                for vital, o, stat, compare, threshold in conditions:
+                    x = current.get(vital)
+                    if x is not None and stat != "value":
+                        x = stats[o + _EWMA] if stat == "ewma" else _slope(stats, o)
+                    if isinstance(threshold, str):
+                        threshold = thresholds.get(threshold, DEFAULT_THRESHOLDS[threshold])
+                    if x is None or not compare(x, threshold):
+                        hit = False
+                        break
+                    shown.append(x)
+                if not hit and not masks[k]:
+                    continue  # empty window stays empty; an empty window is never active
+                masks[k] = ((masks[k] << 1) | hit) & full
+                if active is None:
+                    active = self._active[slot].tolist()
+                confirmed = masks[k].bit_count() >= need
+                if confirmed and not active[k]:
+                    rule = self.rules[k]
+                    threshold = _condition_threshold(rule[2][0][3], thresholds)
+                    alerts.append(_temporal_alert(rule, shown, threshold, now_ms, patient_id))
+                active[k] = confirmed or (active[k] and masks[k] != 0)
+            if active is not None:
+                self._masks[slot] = masks
+                self._active[slot] = active
+        return alerts
+
+    def evaluate_batch(self, columns: dict, thresholds: dict, now_ms: int) -> list:
+        """
+        Columnar evaluate(): rows are applied in order per patient. Rows are
+        grouped into rounds (each patient's first reading in the block, then
+        its second, ...) and every round is one vectorised update. Returns
+        (row, alert) pairs ordered by row, then rule.
+        """
+        n = None
+        for vital in self.vitals:
+            if vital in columns:
+                n = len(columns[vital])
+                break
+        if not n:
+            return []
+        values = {}
+        for vital in self.vitals:
+            col = columns.get(vital)
+            values[vital] = np.full(n, np.nan) if col is None else np.asarray(col, dtype=np.float64)
+        ts = columns.get("timestamp")
+        t = (np.full(n, now_ms, dtype=np.float64) if ts is None else np.asarray(ts, dtype=np.float64)) / 1000.0
+        patient_ids = columns.get("patientId")
+        hits = []
+        with self._lock:
+            if patient_ids is None:
+                slots = np.full(n, self._slot(None), dtype=np.intp)
+            else:
+                slots = np.fromiter((self._slot(p) for p in patient_ids), dtype=np.intp, count=n)
+            for rows in _rounds(slots):
+                hits.extend(self._round(rows, slots[rows], t[rows], values, thresholds, patient_ids, now_ms))
+        hits.sort(key=itemgetter(0, 1))
+        return [(row, alert) for row, _, alert in hits]
+
+    def _round(self, rows, slots, t, values: dict, thresholds: dict, patient_ids, now_ms: int) -> list:
+        """One vectorised step over rows that all belong to different patients."""
+        stats = self._stats[slots]
+        current = {vital: values[vital][rows] for vital in self.vitals}
+        with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+            for vital, o in self._offsets:
+                v = current[vital]
+                present = ~np.isnan(v)
+                if present.all():
+                    sel, s, tt = slice(None), stats, t
+                elif present.any():
+                    sel = np.flatnonzero(present)
+                    s, v, tt = stats[sel], v[sel], t[sel]
+                else:
+                    continue
+                w, wt, wv, wtt, wtv, last = (s[:, o + f] for f in (_W, _WT, _WV, _WTT, _WTV, _LAST_T))
+                dt = np.maximum(tt - last, 0.0)
+                decay = np.exp(-dt / TEMPORAL_TREND_TAU_S)
+                wtt = wtt - 2.0 * dt * wt + dt * dt * w
+                wtv = wtv - dt * wv
+                wt = wt - dt * w
+                ewma = s[:, o + _EWMA]
+                stats[sel, o + _EWMA] = np.where(w == 0.0, v, ewma + TEMPORAL_EWMA_ALPHA * (v - ewma))
+                stats[sel, o + _W] = decay * w + 1.0
+                stats[sel, o + _WT] = decay * wt
+                stats[sel, o + _WV] = decay * wv + v
+                stats[sel, o + _WTT] = decay * wtt
+                stats[sel, o + _WTV] = decay * wtv
+                stats[sel, o + _LAST_T] = np.maximum(tt, last)
+            self._stats[slots] = stats
+            masks = self._masks[slots]
+            active = self._active[slots]
+            hits = []
+            for k, need, full, conditions in self._compiled:
+                hit = None
+                shown = []
+                for vital, o, stat, compare, threshold in conditions:
+                    x = current[vital]
+                    if stat == "ewma":
+                        x = np.where(np.isnan(x), np.nan, stats[:, o + _EWMA])
+                    elif stat == "slope":
+                        w, wt = stats[:, o + _W], stats[:, o + _WT]
+                        den = w * stats[:, o + _WTT] - wt * wt
+                        slope = (w * stats[:, o + _WTV] - wt * stats[:, o + _WV]) / den * 60.0
+                        valid = ~np.isnan(x) & (w >= TEMPORAL_MIN_WEIGHT) & (den >= TEMPORAL_MIN_TIME_VAR * w * w)
+                        x = np.where(valid, slope, np.nan)
+                    th = _condition_threshold(threshold, thresholds)
+                    if isinstance(th, np.ndarray):
+                        th = th[rows]
+                    c = compare(x, th)  # NaN compares False
+                    hit = c if hit is None else hit & c
+                    shown.append(x)
+                mask = masks[:, k]
+                if not hit.any() and not mask.any():
+                    continue
+                mask = masks[:, k] = ((mask << 1) | hit) & full
+                confirmed = _POPCOUNT[mask] >= need
+                fire = np.flatnonzero(confirmed & ~active[:, k])
+                active[:, k] = confirmed | (active[:, k] & (mask != 0))
+                if not len(fire):
+                    continue
+                rule = self.rules[k]
+                th0 = _condition_threshold(rule[2][0][3], thresholds)
+                for i in fire.tolist():
+                    row = int(rows[i])
+                    patient_id = patient_ids[row] if patient_ids is not None else None
+                    threshold = th0[row] if isinstance(th0, np.ndarray) else th0
+                    alert = _temporal_alert(rule, [float(x[i]) for x in shown], threshold, now_ms, patient_id)
+                    hits.append((row, k, alert))
+            self._masks[slots] = masks
+            self._active[slots] = active
+        return hits
+
+
+def _anomaly_alert(spec, x: float, mean: float, std: float, z: float, ts: int, patient_id) -> dict:
+    vital, alert_type, label, unit, _ = spec
+    direction = "above" if z > 0 else "below"
+    value = _alert_value(x)
+    alert = {
+        "type": alert_type,
+        "rule": f"{vital}Anomaly",
+        "message": f"{label} {value}{unit} is {abs(z):.1f}σ {direction} baseline {mean:.1f}",
+        "severity": "warning",
+        "timestamp": ts,
+        "value": value,
+        "threshold": round(mean + math.copysign(ANOMALY_Z, z) * std, 1),
+        "baseline": round(mean, 1),
+        "zScore": round(z, 2),
+    }
+    if patient_id is not None:
+        alert["patientId"] = patient_id
+    return alert
+
+
+class PatientBaselines:
+    """
+    Online per-patient baseline for each vital in ANOMALY_VITALS, kept as
+    (slot, vital) arrays: reading count, mean, population variance and whether
+    the vital is currently anomalous. Each reading is scored against the
+    baseline before it is folded in (Welford's update; past ANOMALY_WINDOW
+    readings the weight stays at 1/window so the baseline tracks slow drift).
+    evaluate() and evaluate_batch() produce the same alerts and state for the
+    same sequence of readings.
+    """
+
+    def __init__(self, vitals: tuple = ANOMALY_VITALS):
+        self.vitals = vitals
+        self._names = tuple(v[0] for v in vitals)
+        self._floors = np.array([v[4] for v in vitals], dtype=np.float64)
+        self._slots: dict = {}
+        shape = (TEMPORAL_INITIAL_SLOTS, len(vitals))
+        self._count = np.zeros(shape, dtype=np.int64)
+        self._mean = np.zeros(shape)
+        self._var = np.zeros(shape)
+        self._active = np.zeros(shape, dtype=bool)
+        self._lock = TimedLock("alert_baseline")
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _slot(self, patient_id) -> int:
+        slot = self._slots.get(patient_id)
+        if slot is None:
+            slot = self._slots[patient_id] = len(self._slots)
+            if slot == len(self._count):
+                self._count = np.concatenate([self._count, np.zeros_like(self._count)])
+                self._mean = np.concatenate([self._mean, np.zeros_like(self._mean)])
+                self._var = np.concatenate([self._var, np.zeros_like(self._var)])
+                self._active = np.concatenate([self._active, np.zeros_like(self._active)])
+        return slot
+
+    def baseline(self, patient_id) -> dict | None:
+        """vital -> {"count", "mean", "sd"} for one patient, or None if never seen."""
+        slot = self._slots.get(patient_id)
+        if slot is None:
+            return None
+        return {
+            name: {"count": int(c), "mean": m, "sd": math.sqrt(v)}
+            for name, c, m, v in zip(self._names, self._count[slot].tolist(), self._mean[slot].tolist(),
+                                     self._var[slot].tolist())
+        }
+
+    def evaluate(self, reading: dict, now_ms: int) -> list:
+        """Score one reading against its patient's baselines, then fold it in; return new alerts."""
+        patient_id = reading.get("patientId")
+        alerts = []
+        with self._lock:
+            slot = self._slot(patient_id)
+            count, mean, var = self._count[slot].tolist(), self._mean[slot].tolist(), self._var[slot].tolist()
+            active = self._active[slot].tolist()
+            for j, spec in enumerate(self.vitals):
+                x = reading.get(spec[0])
+                if x is None or x != x:
+                    continue
+                x = float(x)
+                delta = x - mean[j]
+                if count[j] >= ANOMALY_WARMUP:
+                    std = max(math.sqrt(var[j]), spec[4])
+                    z = delta / std
+                    if abs(z) >= ANOMALY_Z:
+                        if not active[j]:
+                            alerts.append(_anomaly_alert(spec, x, mean[j], std, z, now_ms, patient_id))
+                        active[j] = True
+                    elif abs(z) < ANOMALY_REARM_Z:
+                        active[j] = False
+                    clip = ANOMALY_CLIP_Z * std
+                    delta = min(max(delta, -clip), clip)
+                count[j] += 1
+                alpha = 1.0 / min(count[j], ANOMALY_WINDOW)
+                mean[j] += alpha * delta
+                var[j] = (1.0 - alpha) * (var[j] + alpha * delta * delta)
+            self._count[slot], self._mean[slot], self._var[slot], self._active[slot] = count, mean, var, active
+        return alerts
+
+    def evaluate_batch(self, columns: dict, now_ms: int) -> list:
+        """
+        Columnar evaluate(): one vectorised step per round of rows (see
+        _rounds). Returns (row, alert) pairs ordered by row, then vital.
+        """
+        n = None
+        for name in self._names:
+            if name in columns:
+                n = len(columns[name])
+                break
+        if not n:
+            return []
+        values = np.full((n, len(self._names)), np.nan)
+        for j, name in enumerate(self._names):
+            col = columns.get(name)
+            if col is not None:
+                values[:, j] = col
+        patient_ids = columns.get("patientId")
+        hits = []
+        with self._lock:
+            if patient_ids is None:
+                slots = np.full(n, self._slot(None), dtype=np.intp)
+            else:
+                slots = np.fromiter((self._slot(p) for p in patient_ids), dtype=np.intp, count=n)
+            for rows in _rounds(slots):
+                hits.extend(self._round(rows, slots[rows], values[rows], patient_ids, now_ms))
+        hits.sort(key=itemgetter(0, 1))
+        return [(row, alert) for row, _, alert in hits]
+
+    def _round(self, rows, slots, x, patient_ids, now_ms: int) -> list:
+        """One vectorised step over rows that all belong to different patients."""
+        count, mean, var, active = self._count[slots], self._mean[slots], self._var[slots], self._active[slots]
+        present = ~np.isnan(x)
+        warm = present & (count >= ANOMALY_WARMUP)
+        delta = x - mean
+        std = np.maximum(np.sqrt(var), self._floors)
+        z = delta / std
+        abs_z = np.abs(z)
+        anomalous = warm & (abs_z >= ANOMALY_Z)
+        fire = anomalous & ~active
+        self._active[slots] = np.where(warm, anomalous | (active & (abs_z >= ANOMALY_REARM_Z)), active)
+        clip = ANOMALY_CLIP_Z * std
+        delta = np.where(warm, np.clip(delta, -clip, clip), delta)
+        count = count + present
+        with np.errstate(divide="ignore", invalid="ignore"):
+            alpha = 1.0 / np.minimum(count, ANOMALY_WINDOW)
+            self._mean[slots] = np.where(present, mean + alpha * delta, mean)
+            self._var[slots] = np.where(present, (1.0 - alpha) * (var + alpha * delta * delta), var)
+        self._count[slots] = count
+        hits = []
+        for i, j in zip(*np.nonzero(fire)):
+            row = int(rows[i])
+            patient_id = patient_ids[row] if patient_ids is not None else None
+            alert = _anomaly_alert(self.vitals[j], float(x[i, j]), float(mean[i, j]), float(std[i, j]),
+                                   float(z[i, j]), now_ms, patient_id)
+            hits.append((row, int(j), alert))
+        return hits
+
+
 class AlertEngine:
-    def __init__(self, buffer_size: int = ALERTS_BUFFER_SIZE, max_age_ms: int = ALERTS_MAX_AGE_MS):
+    def __init__(
+        self,
+        buffer_size: int = ALERTS_BUFFER_SIZE,
+        max_age_ms: int = ALERTS_MAX_AGE_MS,
+        hub: EventHub | None = None,
+        temporal_rules: tuple = TEMPORAL_RULES,
+        store: AlertStore | None = None,
+        anomaly_vitals: tuple | None = ANOMALY_VITALS,
+    ):
         self._alerts: deque = deque(maxlen=buffer_size)
-        self._lock = Lock()
+        self._lock = TimedLock("alert_engine")  # writers only
+        self._snapshot: tuple = ()  # immutable copy of _alerts published after each write; read lock-free
         self._max_age_ms = max_age_ms
-        self._thresholds = dict(DEFAULT_THRESHOLDS)
+        self._profiles = ThresholdProfiles()
         self._on_critical = None  # optional callback for auto emergency trigger
+        self._mirror = None  # optional callback(snapshot) e.g. shared memory for API workers
+        self._hub = hub  # optional live fan-out for /api/alerts/stream
+        self._temporal = TemporalState(temporal_rules)
+        self._baselines = PatientBaselines(anomaly_vitals) if anomaly_vitals else None  # None/() = off
+        self._store = store if store is not None else AlertStore()  # every alert, indexed, until retention
 
-    def set_thresholds(self, thresholds: dict):
-        with self._lock:
-            self._thresholds.update(thresholds)
+    @property
+    def store(self) -> AlertStore:
+        return self._store
 
-    def get_thresholds(self) -> dict:
-        with self._lock:
-            return dict(self._thresholds)
+    @property
+    def profiles(self) -> ThresholdProfiles:
+        return self._profiles
+
+    def set_thresholds(self, thresholds: dict, patient_id: str | None = None, cohort: str | None = None):
+        """Update the global defaults, one cohort profile, or one patient's overrides."""
+        if patient_id is not None:
+            self._profiles.set_patient(patient_id, thresholds)
+        elif cohort is not None:
+            self._profiles.set_cohort(cohort, thresholds)
+        else:
+            self._profiles.set_defaults(thresholds)
+
+    def get_thresholds(self, patient_id: str | None = None, cohort: str | None = None) -> dict:
+        table = self._profiles.table
+        if patient_id is not None:
+            return dict(table.for_patient(patient_id))
+        if cohort is not None:
+            return dict(table.for_cohort(cohort))
+        return dict(table.defaults)
 
     def set_on_critical(self, callback):
-        """Set callback(alert) when a critical alert is added (e.g. trigger emergency)."""
+        """
+        Set callback(alert) when a confirmed critical alert (a TEMPORAL_RULES
+        alert) is added, e.g. to queue an emergency dispatch. Instantaneous
+        threshold alerts are recorded but never escalate. Called on the
+        ingestion thread, so it should not block.
+        """
         self._on_critical = callback
 
-    def evaluate(self, reading: dict) -> list:
-        """Evaluate reading, append new alerts, return new alerts."""
+    def set_mirror(self, callback):
+        """
+        Set callback(snapshot) receiving the recent-alerts tuple after every
+        write. Called under the writer lock so mirrors see snapshots in order.
+        """
+        self._mirror = callback
         with self._lock:
-            th = dict(self._thresholds)
-        new_alerts = detect_alerts(reading, th)
+            if callback is not None:
+                callback(self._snapshot)
+
+    def evaluate(self, reading: dict) -> list:
+        """
+        Evaluate reading (thresholds, temporal rules, then baseline anomalies),
+        append new alerts, return new alerts.
+        """
+        t0 = time.perf_counter()
+        th = self._profiles.table.for_patient(reading.get("patientId"))
+        now_ms = int(time.time() * 1000)
+        alerts = detect_alerts(reading, th)
+        alerts += self._temporal.evaluate(reading, th, now_ms)
+        if self._baselines is not None:
+            alerts += self._baselines.evaluate(reading, now_ms)
+        _eval_scalar.observe(time.perf_counter() - t0)
+        return self._record(alerts)
+
+    def evaluate_batch(self, columns: dict) -> list:
+        """
+        Evaluate a columnar block of readings (see detect_alerts_batch); return
+        new alerts in the order evaluate() would give them row by row. Temporal
+        rules use the block's "timestamp" column when present.
+        """
+        t0 = time.perf_counter()
+        th = self._profiles.table.batch_thresholds(columns.get("patientId"))
+        now_ms = int(time.time() * 1000)
+        instant = _detect_alerts_rows(columns, th)
+        temporal = self._temporal.evaluate_batch(columns, th, now_ms)
+        anomalies = self._baselines.evaluate_batch(columns, now_ms) if self._baselines is not None else ()
+        alerts = [alert for _, alert in merge(instant, temporal, anomalies, key=itemgetter(0))]
+        _eval_batch.observe(time.perf_counter() - t0)
+        return self._record(alerts)
+
+    def _record(self, new_alerts: list) -> list:
         if not new_alerts:
             return []
+        for a in new_alerts:
+            alerts_raised.labels(a["severity"]).inc()
+        self._store.add_many(new_alerts)  # sets alert["id"] before anything is published
         now = int(time.time() * 1000)
         with self._lock:
+            self._alerts.extend(new_alerts)
+            # drop too-old alerts
+            while self._alerts and (now - self._alerts[0]["timestamp"]) > self._max_age_ms:
+                self._alerts.popleft()
+            self._snapshot = tuple(self._alerts)
+            if self._mirror is not None:
+                self._mirror(self._snapshot)
+        # callbacks run outside the lock so a slow handler never stalls readers
+        on_critical = self._on_critical
+        if on_critical:
             for a in new_alerts:
-                self._alerts.append(a)
-                if a.get("severity") == "critical" and self._on_critical:
+                if a.get("severity") == "critical" and "rule" in a:
                     try:
-                        self._on_critical(a)
+                        on_critical(a)
                     except Exception:
                         pass
-            # drop too-old alerts
-            while self._alerts and (now - self._alerts[0]["timestamp"]) > self._max_age_ms:
-                self._alerts.popleft()
+        if self._hub is not None:
+            for a in new_alerts:
+                self._hub.publish("alerts", a, patient_id=a.get("patientId"))
         return new_alerts
 
-    def get_recent(self, limit: int = 20) -> list:
-        with self._lock:
-            return list(self._alerts)[-limit:]
+    @property
+    def temporal_patients(self) -> int:
+        return len(self._temporal)
+
+    @property
+    def baselines(self) -> PatientBaselines | None:
+        return self._baselines
+
+    def buffer_usage(self) -> dict:
+        return {"used": len(self._snapshot), "capacity": self._alerts.maxlen}
+
+    def get_recent(self, limit: int = 20, patient_id: str | None = None) -> list:
+        """
+        Newest alerts (oldest first) within max_age_ms from the published
+        snapshot; never blocks the writer. Older or filtered alerts: store.query().
+        """
+        snapshot = self._snapshot
+        if patient_id is not None:
+            snapshot = [a for a in snapshot if a.get("patientId") == patient_id]
+        return list(snapshot[-limit:])
 
 
-alert_engine = AlertEngine()
+alert_engine = AlertEngine(hub=event_hub, store=alert_store)
@@ -0,0 +1,398 @@
+"""
+Indexed alert storage. Every recorded alert gets a monotonically increasing
+id and is kept, as compact JSON, until it falls out of the retention window.
+Queries filter by patient, type, severity and time and page with id cursors:
+since=<id> for incremental fetches, before=<id> for older pages.
+
+Layout: NumPy index columns (time, patient/type/severity codes) in id order,
+plus a sorted posting list of ids per patient, type and severity, so a filtered
+page is a couple of binary searches and a slice. Writers append under a lock;
+readers take no lock. Compaction drops expired alerts by building a new index
+off to the side, archiving the dropped alerts to NDJSON segments (AlertLog)
+and swapping the index in.
+"""
+import logging
+import os
+import time
+from threading import Lock, Thread
+
+import numpy as np
+
+from services.encoding import dumps_json, loads_json
+from services.metrics import TimedLock
+
+logger = logging.getLogger(__name__)
+
+ALERT_RETENTION_MS = 24 * 3_600_000
+ALERT_MAX_RETAINED = 2_000_000
+COMPACT_INTERVAL = 60.0  # seconds between background compactions
+COMPACT_SLACK = 0.25  # compact inline once the store is this far over max_alerts
+QUERY_DEFAULT_LIMIT = 100
+QUERY_MAX_LIMIT = 1000
+SCAN_CHUNK = 4096  # candidates checked per step when a filter is not the driving index
+INITIAL_CAPACITY = 4096
+ARCHIVE_SEGMENT_BYTES = 64 * 1024 * 1024
+ARCHIVE_PREFIX = "alerts-"
+ARCHIVE_SUFFIX = ".ndjson"
+
+
+class _Growable:
+    """Append-only NumPy array with amortised O(1) appends; view() never blocks the writer."""
+
+    __slots__ = ("data", "size")
+
+    def __init__(self, dtype, capacity: int = INITIAL_CAPACITY, data: np.ndarray | None = None):
+        if data is None:
+            self.data = np.empty(capacity, dtype=dtype)
+            self.size = 0
+        else:
+            self.data = np.empty(max(capacity, len(data)), dtype=data.dtype)
+            self.data[:len(data)] = data
+            self.size = len(data)
+
+    def append(self, value) -> None:
+        if self.size == len(self.data):
+            grown = np.empty(2 * len(self.data), dtype=self.data.dtype)
+            grown[:self.size] = self.data
+            self.data = grown
+        self.data[self.size] = value
+        self.size += 1  # published after the value is in place
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+class _Codes:
+    """Interned string -> small int code, shared by the index columns."""
+
+    __slots__ = ("codes", "names")
+
+    def __init__(self):
+        self.codes: dict = {}
+        self.names: list = []
+
+    def code(self, name) -> int:
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+class _Index:
+    """One generation of the store: ids first_id .. first_id + size - 1."""
+
+    __slots__ = ("first_id", "time", "patient", "type", "severity", "blobs", "postings")
+
+    def __init__(self, first_id: int, capacity: int = INITIAL_CAPACITY):
+        self.first_id = first_id
+        self.time = _Growable(np.int64, capacity)
+        self.patient = _Growable(np.int32, capacity)
+        self.type = _Growable(np.int32, capacity)
+        self.severity = _Growable(np.int32, capacity)
+        self.blobs: list = []
+        # (field, code) -> posting list of ids, e.g. ("patient", 3)
+        self.postings: dict = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.blobs)
+
+    def append(self, alert_id: int, ts: int, codes: tuple, blob: bytes) -> None:
+        self.time.append(ts)
+        for field, code in zip(("patient", "type", "severity"), codes):
+            getattr(self, field).append(code)
+            posting = self.postings.get((field, code))
+            if posting is None:
+                posting = self.postings[(field, code)] = _Growable(np.int64, 16)
+            posting.append(alert_id)
+        self.blobs.append(blob)  # last: readers bound every query by len(blobs)
+
+
+class AlertLog:
+    """Append-only archive of compacted alerts: NDJSON segments named by their first id."""
+
+    def __init__(self, root: str, segment_bytes: int = ARCHIVE_SEGMENT_BYTES):
+        self._root = root
+        self._segment_bytes = segment_bytes
+        self._lock = Lock()
+        self.archived = 0
+        os.makedirs(root, exist_ok=True)
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    def segments(self) -> list:
+        return sorted(f for f in os.listdir(self._root) if f.startswith(ARCHIVE_PREFIX) and f.endswith(ARCHIVE_SUFFIX))
+
+    def append(self, first_id: int, blobs: list) -> None:
+        """Write blobs (ids first_id, first_id + 1, ...) and fsync before returning."""
+        if not blobs:
+            return
+        with self._lock:
+            segments = self.segments()
+            path = os.path.join(self._root, segments[-1]) if segments else None
+            if path is None or os.path.getsize(path) >= self._segment_bytes:
+                path = os.path.join(self._root, f"{ARCHIVE_PREFIX}{first_id:020d}{ARCHIVE_SUFFIX}")
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, b"\n".join(blobs) + b"\n")
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self.archived += len(blobs)
+
+    def read(self, since: int | None = None, limit: int = QUERY_DEFAULT_LIMIT) -> list:
+        """Archived alerts with id > since, oldest first (segments before the cursor are skipped)."""
+        segments = self.segments()
+        if since is not None:
+            starts = [int(name[len(ARCHIVE_PREFIX):-len(ARCHIVE_SUFFIX)]) for name in segments]
+            first = max((k for k, start in enumerate(starts) if start <= since + 1), default=0)
+            segments = segments[first:]
+        out = []
+        for name in segments:
+            with open(os.path.join(self._root, name), "rb") as f:
+                for line in f:
+                    alert = loads_json(line)
+                    if since is None or alert["id"] > since:
+                        out.append(alert)
+                        if len(out) >= limit:
+                            return out
+        return out
+
+
+class AlertStore:
+    def __init__(
+        self,
+        max_age_ms: int = ALERT_RETENTION_MS,
+        max_alerts: int = ALERT_MAX_RETAINED,
+        archive: AlertLog | None = None,
+    ):
+        self.max_age_ms = max_age_ms
+        self.max_alerts = max_alerts
+        self._archive = archive
+        # ids start from the clock (µs) so they keep increasing across restarts
+        self._index = _Index(int(time.time() * 1_000_000))
+        self._next_id = self._index.first_id
+        self._patients, self._types, self._severities = _Codes(), _Codes(), _Codes()
+        self._lock = TimedLock("alert_store")  # writers
+        self._compact_lock = Lock()
+        self._last_ts = 0
+        self._stats = {"added": 0, "compacted": 0, "compactions": 0, "compact_ms_last": 0.0}
+        self._running = False
+        self._thread: Thread | None = None
+
+    def configure(self, max_age_ms: int | None = None, max_alerts: int | None = None,
+                  archive: AlertLog | None = None) -> None:
+        if max_age_ms is not None:
+            self.max_age_ms = max_age_ms
+        if max_alerts is not None:
+            self.max_alerts = max_alerts
+        if archive is not None:
+            self._archive = archive
+
+    def __len__(self) -> int:
+        return self._index.size
+
+    @property
+    def archive(self) -> AlertLog | None:
+        return self._archive
+
+    # --- writing ---------------------------------------------------------
+
+    def _encode(self, alert: dict) -> tuple:
+        codes = (
+            self._patients.code(alert.get("patientId")),
+            self._types.code(alert.get("type")),
+            self._severities.code(alert.get("severity")),
+        )
+        return codes, dumps_json(alert)
+
+    def add_many(self, alerts: list) -> None:
+        """Assign ids (set as alert["id"]) and index the alerts; ids follow list order."""
+        if not alerts:
+            return
+        with self._lock:
+            index = self._index
+            for alert in alerts:
+                alert["id"] = alert_id = self._next_id
+                self._next_id += 1
+                # index time never decreases, so time bounds are binary searches over id order
+                ts = self._last_ts = max(self._last_ts, int(alert.get("timestamp") or 0))
+                codes, blob = self._encode(alert)
+                index.append(alert_id, ts, codes, blob)
+            self._stats["added"] += len(alerts)
+            overfull = index.size > self.max_alerts * (1 + COMPACT_SLACK)
+        if overfull:
+            self.compact()
+
+    # --- reading ---------------------------------------------------------
+
+    def query(
+        self,
+        patient_id=None,
+        alert_type: str | None = None,
+        severity: str | None = None,
+        since: int | None = None,
+        before: int | None = None,
+        start_ms: int | None = None,
+        end_ms: int | None = None,
+        limit: int = QUERY_DEFAULT_LIMIT,
+        raw: bool = False,
+    ) -> list:
+        """
+        Matching alerts, oldest first. With since, the oldest `limit` alerts
+        whose id > since (page forward by passing the last id back); otherwise
+        the newest `limit` alerts, below `before` when given (page backwards
+        by passing the first id back). start_ms/end_ms bound alert time.
+        raw=True returns the stored JSON encodings (bytes) instead of dicts.
+        """
+        index = self._index
+        n = index.size
+        first = index.first_id
+        lo, hi = first, first + n  # id range [lo, hi)
+        if since is not None:
+            lo = max(lo, since + 1)
+        if before is not None:
+            hi = min(hi, before)
+        if start_ms is not None or end_ms is not None:
+            times = index.time.view()[:n]
+            if start_ms is not None:
+                lo = max(lo, first + int(np.searchsorted(times, start_ms, side="left")))
+            if end_ms is not None:
+                hi = min(hi, first + int(np.searchsorted(times, end_ms, side="right")))
+        if lo >= hi or limit <= 0:
+            return []
+        filters = []
+        for field, codes, value in (
+            ("patient", self._patients, patient_id),
+            ("type", self._types, alert_type),
+            ("severity", self._severities, severity),
+        ):
+            if value is None:
+                continue
+            code = codes.codes.get(value)
+            posting = index.postings.get((field, code)) if code is not None else None
+            if posting is None:
+                return []
+            filters.append((field, code, posting.view()))
+        forward = since is not None
+        if not filters:
+            ids = np.arange(lo, min(hi, lo + limit)) if forward else np.arange(max(lo, hi - limit), hi)
+        else:
+            ids = self._scan(index, filters, lo, hi, limit, forward)
+        blobs = index.blobs
+        if raw:
+            return [blobs[i] for i in (ids - first).tolist()]
+        return [loads_json(blobs[i]) for i in (ids - first).tolist()]
+
+    @staticmethod
+    def _scan(index: _Index, filters: list, lo: int, hi: int, limit: int, forward: bool) -> np.ndarray:
+        """Walk the shortest posting list inside [lo, hi); other filters are checked against the columns."""
+        filters.sort(key=lambda f: len(f[2]))
+        _, _, driving = filters[0]
+        a = int(np.searchsorted(driving, lo, side="left"))
+        b = int(np.searchsorted(driving, hi, side="left"))
+        if len(filters) == 1:
+            return driving[a:min(b, a + limit)] if forward else driving[max(a, b - limit):b]
+        checks = [(getattr(index, field).view(), code) for field, code, _ in filters[1:]]
+        found, total = [], 0
+        step = max(SCAN_CHUNK, 4 * limit)
+        while a < b and total < limit:
+            chunk = driving[a:a + step] if forward else driving[max(a, b - step):b]
+            positions = chunk - index.first_id
+            keep = np.ones(len(chunk), dtype=bool)
+            for column, code in checks:
+                keep &= column[positions] == code
+            hits = chunk[keep]
+            if forward:
+                hits = hits[:limit - total]
+                a += step
+            else:
+                hits = hits[max(0, len(hits) - (limit - total)):]
+                b -= step
+            found.append(hits)
+            total += len(hits)
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(found if forward else found[::-1])
+
+    def newest_id(self) -> int | None:
+        index = self._index
+        return index.first_id + index.size - 1 if index.size else None
+
+    # --- retention -------------------------------------------------------
+
+    def compact(self, now_ms: int | None = None) -> int:
+        """
+        Drop alerts older than max_age_ms or beyond max_alerts, archiving them
+        first when an AlertLog is set. The new index is built without holding
+        the writer lock; alerts added meanwhile are carried over at the swap.
+        Returns the number of alerts dropped.
+        """
+        with self._compact_lock:
+            t0 = time.perf_counter()
+            now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+            old = self._index
+            n = old.size
+            times = old.time.view()[:n]
+            cut = max(int(np.searchsorted(times, now_ms - self.max_age_ms, side="left")), n - self.max_alerts, 0)
+            if not cut:
+                return 0
+            if self._archive is not None:
+                self._archive.append(old.first_id, old.blobs[:cut])
+            new = self._rebuild(old, cut, n)
+            with self._lock:
+                for pos in range(n, old.size):  # appended while we were copying
+                    codes = (int(old.patient.data[pos]), int(old.type.data[pos]), int(old.severity.data[pos]))
+                    new.append(old.first_id + pos, int(old.time.data[pos]), codes, old.blobs[pos])
+                self._index = new
+            self._stats["compacted"] += cut
+            self._stats["compactions"] += 1
+            self._stats["compact_ms_last"] = round((time.perf_counter() - t0) * 1000, 3)
+            return cut
+
+    @staticmethod
+    def _rebuild(old: _Index, cut: int, n: int) -> _Index:
+        new = _Index(old.first_id + cut, capacity=max(INITIAL_CAPACITY, 2 * (n - cut)))
+        for field in ("time", "patient", "type", "severity"):
+            setattr(new, field, _Growable(None, len(getattr(new, field).data), getattr(old, field).view()[cut:n]))
+        new.blobs = old.blobs[cut:n]
+        last_id = old.first_id + n
+        for key, posting in old.postings.items():
+            ids = posting.view()
+            a = int(np.searchsorted(ids, new.first_id, side="left"))
+            b = int(np.searchsorted(ids, last_id, side="left"))
+            if b > a:
+                new.postings[key] = _Growable(None, 2 * (b - a), ids[a:b])
+        return new
+
+    def start(self, interval: float = COMPACT_INTERVAL) -> None:
+        if self._running:
+            return
+        self._running = True
+
+        def loop():
+            while self._running:
+                time.sleep(interval)
+                try:
+                    self.compact()
+                except Exception:
+                    logger.exception("Alert store compaction failed")
+
+        self._thread = Thread(target=loop, name="alert-store-compact", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        self._thread = None
+
+    def stats(self) -> dict:
+        out = dict(self._stats, retained=len(self), patients=len(self._patients.names))
+        if self._archive is not None:
+            out["archived"] = self._archive.archived
+        return out
+
+
+alert_store = AlertStore()
@@ -0,0 +1,107 @@
+"""
+Bounded LRU cache with optional TTL and single-flight computation: concurrent
+callers asking for the same missing key wait for one computation instead of
+repeating it.
+"""
+import time
+from collections import OrderedDict
+from threading import Event, Lock
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = Event()
+        self.value = None
+        self.error = None
+
+
+class LRUCache:
+    def __init__(self, max_size: int = 1024, ttl: float | None = None):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._data: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self._inflight: dict = {}
+        self._lock = Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "coalesced": 0}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _lookup(self, key):
+        """Return (found, value); caller holds the lock."""
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            self._stats["expired"] += 1
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def _store(self, key, value):
+        expires_at = time.monotonic() + self._ttl if self._ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self._lookup(key)
+            self._stats["hits" if found else "misses"] += 1
+            return value if found else default
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_compute(self, key, compute, cache_if=None, count_lookup: bool = True):
+        """
+        Return the cached value for key, or run compute() once for all concurrent
+        callers. The result is cached unless cache_if(result) is falsy; errors
+        propagate to every waiting caller and are not cached. count_lookup=False
+        leaves hits/misses alone, for a caller that already counted the lookup
+        with get().
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self._stats["hits"] += count_lookup
+                return value
+            self._stats["misses"] += count_lookup
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None and (cache_if is None or cache_if(flight.value)):
+                    self._store(key, flight.value)
+                del self._inflight[key]
+            flight.done.set()
+        return flight.value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, size=len(self._data), max_size=self._max_size)
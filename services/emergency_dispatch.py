@@ -0,0 +1,205 @@
+"""
+Asynchronous emergency dispatch: critical alerts are queued (bounded,
+non-blocking) and a small worker pool delivers them to pluggable sinks
+(workflow log, webhooks, ...). Repeats for the same patient and alert type
+are suppressed for a cooldown window; failing sinks are retried with
+exponential backoff, and an event a sink still rejects after the last retry
+is kept in a bounded dead-letter buffer for inspection.
+"""
+import json
+import logging
+import os
+import queue
+import time
+import urllib.request
+from collections import deque
+from threading import Thread
+
+from services.emergency_workflow import emergency_workflow
+from services.metrics import TimedLock
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_QUEUE_SIZE = 1000
+DISPATCH_WORKERS = 2
+# Same patient + alert type is dispatched at most once per window (seconds)
+DISPATCH_COOLDOWN = 60.0
+DISPATCH_MAX_RETRIES = 3
+DISPATCH_BACKOFF = 0.5  # first retry delay; doubles per attempt
+LATENCY_SAMPLES = 1000
+DEAD_LETTER_SIZE = 1000  # newest undeliverable (event, sink) pairs kept
+# Expired cooldown entries are swept once the table grows past this size
+COOLDOWN_PRUNE_SIZE = 10_000
+
+EMERGENCY_WEBHOOK_URL = os.environ.get("EMERGENCY_WEBHOOK_URL")
+
+
+def workflow_sink(event: dict):
+    """Default sink: run the (log-only) emergency workflow."""
+    emergency_workflow.trigger(alert=event.get("alert"), source=event.get("source", "critical_alert"))
+
+
+class WebhookSink:
+    """POST each dispatch event as JSON; any non-2xx response or network error raises."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, event: dict):
+        req = urllib.request.Request(
+            self.url,
+            data=json.dumps(event).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            if not 200 <= resp.status < 300:
+                raise RuntimeError(f"Webhook returned HTTP {resp.status}")
+
+    def __repr__(self):
+        return f"WebhookSink({self.url!r})"
+
+
+class EmergencyDispatcher:
+    def __init__(
+        self,
+        sinks=None,
+        workers: int = DISPATCH_WORKERS,
+        queue_size: int = DISPATCH_QUEUE_SIZE,
+        cooldown: float = DISPATCH_COOLDOWN,
+        max_retries: int = DISPATCH_MAX_RETRIES,
+        backoff: float = DISPATCH_BACKOFF,
+    ):
+        self._sinks = list(sinks or [])
+        self._workers = workers
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._cooldown = cooldown
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._last_sent: dict[tuple, float] = {}
+        self._lock = TimedLock("emergency_dispatch")
+        self._threads: list[Thread] = []
+        self._running = False
+        self._latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+        self._dead_letters: deque = deque(maxlen=DEAD_LETTER_SIZE)
+        self._counters = {
+            "submitted": 0,
+            "suppressed": 0,
+            "dropped": 0,
+            "dispatched": 0,
+            "failed": 0,
+            "retries": 0,
+        }
+
+    def add_sink(self, sink):
+        self._sinks.append(sink)
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            for i in range(self._workers):
+                t = Thread(target=self._run_worker, name=f"emergency-dispatch-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for t in threads:
+            t.join(timeout=timeout)
+
+    def submit(self, alert: dict, source: str = "critical_alert") -> str:
+        """
+        Queue an alert for dispatch without blocking.
+        Returns "queued", "suppressed" (inside cooldown) or "dropped" (queue full).
+        """
+        now = time.monotonic()
+        key = (alert.get("patientId"), alert.get("type"))
+        with self._lock:
+            self._counters["submitted"] += 1
+            last = self._last_sent.get(key)
+            if last is not None and now - last < self._cooldown:
+                self._counters["suppressed"] += 1
+                return "suppressed"
+            self._last_sent[key] = now
+            if len(self._last_sent) > COOLDOWN_PRUNE_SIZE:
+                cutoff = now - self._cooldown
+                self._last_sent = {k: t for k, t in self._last_sent.items() if t >= cutoff}
+        event = {"alert": alert, "source": source, "queued_at": int(time.time() * 1000)}
+        try:
+            self._queue.put_nowait((now, event))
+        except queue.Full:
+            with self._lock:
+                self._counters["dropped"] += 1
+                self._last_sent.pop(key, None)
+            logger.error("Emergency dispatch queue full; dropped alert %s", alert)
+            return "dropped"
+        return "queued"
+
+    def _run_worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            enqueued, event = item
+            ok = all([self._deliver(sink, event) for sink in self._sinks])
+            with self._lock:
+                self._counters["dispatched" if ok else "failed"] += 1
+                self._latencies.append(time.monotonic() - enqueued)
+
+    def _deliver(self, sink, event: dict) -> bool:
+        for attempt in range(self._max_retries + 1):
+            try:
+                sink(event)
+                return True
+            except Exception as e:
+                if attempt == self._max_retries:
+                    logger.error("Emergency sink %r failed after %d attempts: %s", sink, attempt + 1, e)
+                    with self._lock:
+                        self._dead_letters.append({
+                            "event": event,
+                            "sink": repr(sink),
+                            "error": str(e),
+                            "attempts": attempt + 1,
+                            "failed_at": int(time.time() * 1000),
+                        })
+                    return False
+                with self._lock:
+                    self._counters["retries"] += 1
+                time.sleep(self._backoff * (2 ** attempt))
+        return False
+
+    def dead_letters(self, limit: int | None = None) -> list:
+        """Undelivered events (newest last) with the sink, last error and attempt count."""
+        with self._lock:
+            letters = list(self._dead_letters)
+        return letters[-limit:] if limit else letters
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lat = sorted(self._latencies)
+            out = dict(self._counters)
+            out["dead_letters"] = len(self._dead_letters)
+        out["queue_depth"] = self._queue.qsize()
+        out["workers"] = len(self._threads)
+        if lat:
+            out["latency_ms"] = {
+                "p50": round(lat[len(lat) // 2] * 1000, 3),
+                "p95": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000, 3),
+                "max": round(lat[-1] * 1000, 3),
+                "samples": len(lat),
+            }
+        return out
+
+
+emergency_dispatcher = EmergencyDispatcher(sinks=[workflow_sink])
+if EMERGENCY_WEBHOOK_URL:
+    emergency_dispatcher.add_sink(WebhookSink(EMERGENCY_WEBHOOK_URL))
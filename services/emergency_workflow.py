@@ -26,4 +26,4 @@ def trigger_emergency(alert: dict = None, source: str = "manual") -> dict:
     return payload
 
 
-emergency_workflow = type("EmergencyWorkflow", (), {"trigger": trigger_emergency})()
+emergency_workflow = type("EmergencyWorkflow", (), {"trigger": staticmethod(trigger_emergency)})()
@@ -0,0 +1,99 @@
+"""
+Response body encoders. JSON goes through orjson when it is installed (NumPy
+arrays serialise straight from their buffers) and falls back to the standard
+library; msgpack and brotli are optional too. Every encoder accepts NumPy
+arrays and scalars, with NaN written as null.
+"""
+import gzip
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+try:
+    import msgpack
+except ImportError:  # optional: msgpack uploads and responses are refused without it
+    msgpack = None
+try:
+    import brotli
+except ImportError:  # optional: gzip is offered alone without it
+    brotli = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, "application/x-msgpack", "application/vnd.msgpack")
+GZIP_LEVEL = 5  # most of level 9's ratio on repetitive JSON at a fraction of the CPU
+BROTLI_QUALITY = 4
+# Content-Encoding values this process can produce, in order of preference
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+_ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def plain(value):
+    """NumPy array/scalar -> list/number (NaN -> None); anything else raises TypeError."""
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == "f":
+            nan = np.isnan(value)
+            if nan.any():
+                return np.where(nan, None, value).tolist()
+        return value.tolist()
+    if isinstance(value, np.generic):
+        value = value.item()
+        return None if value != value else value
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def dumps_json(obj, sort_keys: bool = False, indent: bool = False, default=None) -> bytes:
+    """Compact UTF-8 JSON (two-space indent when indent). default(obj) handles other types."""
+    def fallback(value):
+        if isinstance(value, (np.ndarray, np.generic)) or default is None:
+            return plain(value)
+        return default(value)
+
+    if orjson is not None:
+        option = _ORJSON_OPTIONS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=fallback, option=option)
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits: the stdlib encoder copes
+    return json.dumps(
+        obj, default=fallback, sort_keys=sort_keys, indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+    ).encode()
+
+
+def loads_json(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def dumps_msgpack(obj) -> bytes:
+    if msgpack is None:
+        raise RuntimeError("msgpack responses need the msgpack package installed")
+    return msgpack.packb(obj, default=plain, use_bin_type=True)
+
+
+def json_array(items) -> bytes:
+    """Splice already-encoded JSON values into one array without decoding them."""
+    return b"[" + b",".join(items) + b"]"
+
+
+def records_to_columns(records: list) -> dict:
+    """[{k: v}, ...] -> {k: [v, ...]} over every key seen (None where a record lacks it)."""
+    keys = dict.fromkeys(k for r in records for k in r)
+    return {k: [r.get(k) for r in records] for k in keys}
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"unsupported content encoding {encoding!r}")
@@ -0,0 +1,137 @@
+"""
+In-process publish/subscribe fan-out for live vitals and alerts.
+Each subscriber owns a bounded queue that drops its oldest events when the
+client falls behind, so a slow dashboard never blocks the publisher.
+Subscribers can filter by patient; publishing only touches the wildcard
+subscribers of a topic plus the subscribers of that one patient.
+
+An SSE client waits in Subscription.get() on a threading.Event. Production API
+workers run under gunicorn's gevent worker (gunicorn.conf.py), which patches
+threading, so each open stream is a parked greenlet rather than an OS thread.
+The Werkzeug development server (python app.py) still gives each stream a
+thread.
+"""
+import json
+import logging
+from collections import deque
+from itertools import count
+from threading import Event
+
+from services.metrics import TimedLock
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 256
+MAX_SUBSCRIBERS = 10_000
+# Seconds between SSE keep-alive comments when no events arrive
+SSE_HEARTBEAT = 15.0
+
+
+class Subscription:
+    __slots__ = ("topic", "patient_id", "dropped", "closed", "_queue", "_ready", "_hub")
+
+    def __init__(self, hub, topic: str, patient_id: str | None, queue_size: int):
+        self.topic = topic
+        self.patient_id = patient_id
+        self.dropped = 0
+        self.closed = False
+        self._queue: deque = deque(maxlen=queue_size)
+        self._ready = Event()
+        self._hub = hub
+
+    def _push(self, item):
+        q = self._queue
+        if len(q) == q.maxlen:
+            self.dropped += 1  # deque drops the oldest entry on append
+        q.append(item)
+        self._ready.set()
+
+    def get(self, timeout: float | None = None) -> list:
+        """Wait up to timeout for events; return everything queued (possibly [])."""
+        if not self._queue:
+            self._ready.wait(timeout)
+        self._ready.clear()
+        items = []
+        q = self._queue
+        while q:
+            items.append(q.popleft())
+        return items
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._hub.unsubscribe(self)
+            self._ready.set()
+
+
+class EventHub:
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE, max_subscribers: int = MAX_SUBSCRIBERS):
+        self._queue_size = queue_size
+        self._max_subscribers = max_subscribers
+        # topic -> patient_id (None = all patients) -> subscriptions
+        self._subs: dict[str, dict[str | None, set]] = {}
+        self._count = 0
+        self._seq = count(1)
+        self._lock = TimedLock("event_hub")
+
+    def subscribe(self, topic: str, patient_id: str | None = None, queue_size: int | None = None) -> Subscription:
+        with self._lock:
+            if self._count >= self._max_subscribers:
+                raise RuntimeError("Too many subscribers")
+            sub = Subscription(self, topic, patient_id, queue_size or self._queue_size)
+            self._subs.setdefault(topic, {}).setdefault(patient_id, set()).add(sub)
+            self._count += 1
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            by_patient = self._subs.get(sub.topic, {})
+            subs = by_patient.get(sub.patient_id)
+            if subs and sub in subs:
+                subs.discard(sub)
+                self._count -= 1
+                if not subs:
+                    del by_patient[sub.patient_id]
+
+    def has_subscribers(self, topic: str) -> bool:
+        """Cheap check so publishers can skip building events nobody will read."""
+        return bool(self._subs.get(topic))
+
+    def publish(self, topic: str, event, patient_id: str | None = None) -> int:
+        """Deliver event to matching subscribers; returns how many received it."""
+        by_patient = self._subs.get(topic)
+        if not by_patient:
+            return 0
+        item = (next(self._seq), event)
+        with self._lock:
+            targets = list(by_patient.get(None, ()))
+            if patient_id is not None:
+                targets.extend(by_patient.get(patient_id, ()))
+        for sub in targets:
+            sub._push(item)
+        return len(targets)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": self._count,
+                "topics": {t: sum(len(s) for s in bp.values()) for t, bp in self._subs.items()},
+            }
+
+
+def sse_events(sub: Subscription, heartbeat: float = SSE_HEARTBEAT):
+    """Yield Server-Sent Events frames for a subscription until the client goes away."""
+    try:
+        yield "retry: 3000\n\n"
+        while not sub.closed:
+            items = sub.get(timeout=heartbeat)
+            if not items:
+                yield ": keepalive\n\n"
+                continue
+            for seq, event in items:
+                yield f"id: {seq}\nevent: {sub.topic}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        sub.close()
+
+
+event_hub = EventHub()
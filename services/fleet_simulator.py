@@ -0,0 +1,284 @@
+"""
+Fleet-scale vitals simulator: N virtual patients generated as vectorised NumPy
+blocks. Each vital is a per-patient baseline plus a circadian swing and a
+mean-reverting random walk; anomaly episodes (tachycardia, desaturation,
+hypertensive spikes) start at random with a ramped onset and recovery.
+Runs are reproducible from a seed. Blocks feed the in-process ingest pipeline
+directly, or are serialised for the HTTP ingest endpoint (tools/fleet_sim.py).
+"""
+import logging
+import math
+import time
+from threading import Thread
+
+import numpy as np
+
+from services.ingest import VITAL_LIMITS, IngestBatch, IngestPipeline
+from services.vitals_store import VITAL_DECIMALS, VITAL_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Population baseline per vital: (mean, standard deviation across patients)
+BASELINES = {
+    "heartRate": (72.0, 8.0),
+    "systolic": (120.0, 10.0),
+    "diastolic": (78.0, 6.0),
+    "bloodOxygen": (97.5, 1.0),
+    "temperature": (36.8, 0.2),
+    "respiratoryRate": (15.0, 2.0),
+}
+# Mean-reverting random walk per vital: (volatility per sqrt(second), reversion rate per second)
+RANDOM_WALK = {
+    "heartRate": (0.8, 0.02),
+    "systolic": (0.6, 0.01),
+    "diastolic": (0.4, 0.01),
+    "bloodOxygen": (0.15, 0.05),
+    "temperature": (0.01, 0.002),
+    "respiratoryRate": (0.25, 0.03),
+}
+# Peak-to-trough half amplitude of the 24 h circadian swing
+CIRCADIAN_AMPLITUDE = {
+    "heartRate": 6.0,
+    "systolic": 6.0,
+    "diastolic": 4.0,
+    "bloodOxygen": 0.3,
+    "temperature": 0.3,
+    "respiratoryRate": 1.0,
+}
+# Anomaly kind -> {vital: (low, high) offset at peak}
+EPISODES = {
+    "tachycardia": {"heartRate": (35.0, 70.0), "respiratoryRate": (3.0, 8.0)},
+    "desaturation": {"bloodOxygen": (-12.0, -5.0), "heartRate": (5.0, 15.0), "respiratoryRate": (4.0, 10.0)},
+    "hypertensive": {"systolic": (40.0, 75.0), "diastolic": (20.0, 40.0)},
+}
+EPISODE_KINDS = tuple(EPISODES)
+EPISODE_DURATION_S = (60.0, 600.0)
+EPISODE_RAMP_S = 20.0
+DEFAULT_ANOMALY_RATE = 0.5  # episodes per patient per day
+DEFAULT_RATE_HZ = 0.5  # readings per patient per second (the mock stream's 2 s interval)
+DAY_S = 86_400.0
+
+_N = len(VITAL_FIELDS)
+
+
+def _vital_vector(spec: dict, default=0.0) -> np.ndarray:
+    return np.array([spec.get(v, default) for v in VITAL_FIELDS], dtype=np.float64)
+
+
+_SIGMA = np.array([RANDOM_WALK[v][0] for v in VITAL_FIELDS])
+_THETA = np.array([RANDOM_WALK[v][1] for v in VITAL_FIELDS])
+_CIRCADIAN = _vital_vector(CIRCADIAN_AMPLITUDE)
+_LOW = np.array([VITAL_LIMITS[v][0] for v in VITAL_FIELDS])
+_HIGH = np.array([VITAL_LIMITS[v][1] for v in VITAL_FIELDS])
+_HIGH[VITAL_FIELDS.index("bloodOxygen")] = 100.0
+# (kind, vital) peak offset ranges as two (kinds, vitals) matrices
+_EPISODE_LOW = np.vstack([_vital_vector({v: lo for v, (lo, hi) in EPISODES[k].items()}) for k in EPISODE_KINDS])
+_EPISODE_HIGH = np.vstack([_vital_vector({v: hi for v, (lo, hi) in EPISODES[k].items()}) for k in EPISODE_KINDS])
+_ROUND = np.array([10.0 ** VITAL_DECIMALS[v] for v in VITAL_FIELDS])
+
+
+class FleetBlock:
+    """One tick of readings: patient indices[n], timestamps[n] (epoch ms), values[vital, n]."""
+
+    __slots__ = ("patients", "timestamps", "values", "patient_ids")
+
+    def __init__(self, patients: np.ndarray, timestamps: np.ndarray, values: np.ndarray, patient_ids: list):
+        self.patients = patients
+        self.timestamps = timestamps
+        self.values = values
+        self.patient_ids = patient_ids
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def to_batch(self) -> IngestBatch:
+        return IngestBatch(self.patient_ids, self.timestamps, self.values, [])
+
+    def to_columns(self) -> dict:
+        """JSON/msgpack-ready columnar form accepted by POST /api/vitals/ingest."""
+        cols = {"patientId": self.patient_ids, "timestamp": self.timestamps.tolist()}
+        for j, vital in enumerate(VITAL_FIELDS):
+            col = self.values[j]
+            cols[vital] = col.astype(np.int64).tolist() if not VITAL_DECIMALS[vital] else col.tolist()
+        return cols
+
+
+class FleetSimulator:
+    """
+    State for n_patients as (patient, vital) arrays. advance(until_ms) emits
+    every reading due before until_ms; patients are phase-staggered so a fleet
+    at rate_hz spreads evenly over time instead of arriving in bursts.
+    """
+
+    def __init__(
+        self,
+        n_patients: int,
+        rate_hz: float = DEFAULT_RATE_HZ,
+        seed: int | None = None,
+        anomaly_rate: float = DEFAULT_ANOMALY_RATE,
+        prefix: str = "sim",
+        start_ms: int | None = None,
+    ):
+        if n_patients < 1 or rate_hz <= 0:
+            raise ValueError("n_patients must be >= 1 and rate_hz > 0")
+        self.n_patients = n_patients
+        self.rate_hz = rate_hz
+        self.anomaly_rate = anomaly_rate
+        self.seed = seed
+        self._rng = rng = np.random.default_rng(seed)
+        self.patient_ids = np.array([f"{prefix}-{i}" for i in range(n_patients)], dtype=object)
+        means = np.array([BASELINES[v][0] for v in VITAL_FIELDS])
+        sds = np.array([BASELINES[v][1] for v in VITAL_FIELDS])
+        # baselines stay within 2.5 sd of the population mean: a healthy-ish fleet
+        self._baseline = means + sds * np.clip(rng.standard_normal((n_patients, _N)), -2.5, 2.5)
+        spo2 = VITAL_FIELDS.index("bloodOxygen")
+        self._baseline[:, spo2] = np.minimum(self._baseline[:, spo2], 99.5)  # leave room to vary below 100
+        self._walk = np.zeros((n_patients, _N))
+        self._phase = rng.uniform(0, 2 * math.pi, size=n_patients)
+        # anomaly episodes: kind index (-1 = none), elapsed/duration in s, peak offsets
+        self._episode_kind = np.full(n_patients, -1, dtype=np.int8)
+        self._episode_elapsed = np.zeros(n_patients)
+        self._episode_duration = np.zeros(n_patients)
+        self._episode_peak = np.zeros((n_patients, _N))
+        start_ms = int(time.time() * 1000) if start_ms is None else start_ms
+        period_ms = 1000.0 / rate_hz
+        self._next_due = start_ms + rng.uniform(0, period_ms, size=n_patients)
+        self._period_ms = period_ms
+        self.episodes_started = np.zeros(len(EPISODE_KINDS), dtype=np.int64)
+        self.readings = 0
+        self._thread: Thread | None = None
+        self._running = False
+
+    @property
+    def now_ms(self) -> int:
+        """Simulated clock: the earliest time any patient is next due."""
+        return int(self._next_due.min())
+
+    def active_episodes(self) -> dict:
+        """kind -> patient ids currently in an anomaly episode (ground truth for alert checks)."""
+        return {
+            kind: self.patient_ids[self._episode_kind == k].tolist() for k, kind in enumerate(EPISODE_KINDS)
+        }
+
+    def _step(self, idx: np.ndarray, ts_ms: np.ndarray) -> np.ndarray:
+        """Advance the given patients by one reading interval and return their values[vital, n]."""
+        rng = self._rng
+        n = len(idx)
+        dt = 1.0 / self.rate_hz
+        # Ornstein-Uhlenbeck step (exact discretisation)
+        decay = np.exp(-_THETA * dt)
+        noise = _SIGMA * np.sqrt((1 - decay ** 2) / (2 * _THETA))
+        walk = self._walk[idx] * decay + noise * rng.standard_normal((n, _N))
+        self._walk[idx] = walk
+
+        # episodes: finish, then start new ones at the configured hazard
+        kind = self._episode_kind[idx]
+        active = kind >= 0
+        elapsed = self._episode_elapsed[idx] + dt * active
+        ended = active & (elapsed >= self._episode_duration[idx])
+        kind[ended] = -1
+        elapsed[ended] = 0.0
+        hazard = self.anomaly_rate * dt / DAY_S
+        starting = (kind < 0) & (rng.random(n) < hazard)
+        if starting.any():
+            s = np.flatnonzero(starting)
+            new_kind = rng.integers(0, len(EPISODE_KINDS), size=len(s))
+            kind[s] = new_kind
+            elapsed[s] = 0.0
+            rows = idx[s]
+            self._episode_duration[rows] = rng.uniform(*EPISODE_DURATION_S, size=len(s))
+            u = rng.random((len(s), _N))
+            self._episode_peak[rows] = _EPISODE_LOW[new_kind] + u * (_EPISODE_HIGH[new_kind] - _EPISODE_LOW[new_kind])
+            self.episodes_started += np.bincount(new_kind, minlength=len(EPISODE_KINDS))
+        self._episode_kind[idx] = kind
+        self._episode_elapsed[idx] = elapsed
+        remaining = self._episode_duration[idx] - elapsed
+        envelope = np.where(kind >= 0, np.clip(np.minimum(elapsed, remaining) / EPISODE_RAMP_S, 0.0, 1.0), 0.0)
+
+        day_angle = 2 * math.pi * (ts_ms / 1000.0 % DAY_S) / DAY_S
+        circadian = np.sin(day_angle + self._phase[idx])[:, None] * _CIRCADIAN
+        values = self._baseline[idx] + circadian + walk + envelope[:, None] * self._episode_peak[idx]
+        values = np.round(np.clip(values, _LOW, _HIGH) * _ROUND) / _ROUND
+        return values.T
+
+    def advance(self, until_ms: int) -> FleetBlock:
+        """Every reading due before until_ms, oldest first per patient."""
+        parts_idx, parts_ts, parts_values = [], [], []
+        while True:
+            due = np.flatnonzero(self._next_due < until_ms)
+            if not len(due):
+                break
+            ts = self._next_due[due].astype(np.int64)
+            parts_values.append(self._step(due, ts))
+            parts_idx.append(due)
+            parts_ts.append(ts)
+            self._next_due[due] += self._period_ms
+        if not parts_idx:
+            return FleetBlock(np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64), np.empty((_N, 0)), [])
+        idx = np.concatenate(parts_idx)
+        ts = np.concatenate(parts_ts)
+        values = np.concatenate(parts_values, axis=1)
+        self.readings += len(idx)
+        return FleetBlock(idx, ts, values, self.patient_ids[idx].tolist())
+
+    # --- driving the in-process pipeline ----------------------------------
+
+    def run(self, pipeline: IngestPipeline, duration: float | None = None, tick: float = 1.0, speed: float = 1.0) -> dict:
+        """
+        Feed the pipeline for duration seconds of simulated time (None = until
+        stop()). speed > 1 compresses time; speed 0 runs as fast as possible.
+        Returns throughput and how far behind real time the pipeline fell.
+        """
+        self._running = True
+        return self._drive(pipeline, duration, tick, speed)
+
+    def _drive(self, pipeline: IngestPipeline, duration: float | None, tick: float, speed: float) -> dict:
+        sim_start = self.now_ms
+        wall_start = time.perf_counter()
+        sent, max_lag = 0, 0.0
+        step_ms = int(tick * 1000)
+        t = sim_start
+        while self._running and (duration is None or t - sim_start < duration * 1000):
+            t += step_ms
+            block = self.advance(t)
+            if len(block):
+                pipeline.ingest(block.to_batch())
+                sent += len(block)
+            if speed:
+                target = wall_start + (t - sim_start) / 1000.0 / speed
+                lag = time.perf_counter() - target
+                max_lag = max(max_lag, lag)
+                if lag < 0:
+                    time.sleep(-lag)
+        wall = time.perf_counter() - wall_start
+        self._running = False
+        return {
+            "patients": self.n_patients,
+            "readings": sent,
+            "simulated_s": (t - sim_start) / 1000.0,
+            "wall_s": wall,
+            "readings_per_s": sent / wall if wall else 0.0,
+            "max_lag_s": max_lag,
+            "episodes_started": dict(zip(EPISODE_KINDS, self.episodes_started.tolist())),
+        }
+
+    def start(self, pipeline: IngestPipeline, tick: float = 1.0):
+        """Run in real time on a background thread until stop()."""
+        if self._thread is not None:
+            return
+        self._running = True  # set before the thread runs so stop() is never lost
+
+        def loop():
+            try:
+                self._drive(pipeline, None, tick, 1.0)
+            except Exception:
+                logger.exception("Fleet simulator stopped")
+
+        self._thread = Thread(target=loop, name="fleet-simulator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
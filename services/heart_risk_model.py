@@ -1,14 +1,25 @@
 """
-Heart risk classification using scikit-learn LogisticRegression.
-Trained on synthetic data aligned with form features (suitable for scatter/feature analysis).
+Heart risk classification using a logistic-regression model artifact.
+Inference needs only NumPy: the artifact (coefficients, scaler mean/scale,
+feature order) is built offline with `python -m tools.build_model` and loaded
+at startup. scikit-learn is imported only when a model has to be fitted.
 """
 import logging
+import os
+import time
+
 import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.preprocessing import StandardScaler
+
+from services.model_artifact import ModelArtifact
 
 logger = logging.getLogger(__name__)
 
+MODEL_PATH = os.environ.get(
+    "HEART_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "heart_risk.json"),
+)
+SYNTHETIC_MODEL_VERSION = "synthetic-1"
+
 # Feature order for model (must match payload keys used in predict_service)
 FEATURE_NAMES = [
     "age",
@@ -27,51 +38,47 @@ FEATURE_NAMES = [
     "smoking",
 ]
 
-_model = None
-_scaler = None
-
-
-def _synthetic_label(row: np.ndarray) -> int:
-    """Synthetic risk rule so the dataset has a learnable structure (for scatter/ML)."""
-    age, sex, chol, bp, fbs, thalach, diab, obe, sob, cp, sw, stress, sleep, smoke = row
-    score = 0.0
-    if age >= 55:
-        score += 0.25
-    elif age >= 45:
-        score += 0.12
-    if sex == 1:
-        score += 0.05
-    if chol >= 240:
-        score += 0.2
-    elif chol >= 200:
-        score += 0.1
-    if bp >= 160:
-        score += 0.2
-    elif bp >= 140:
-        score += 0.12
-    if fbs:
-        score += 0.1
-    if thalach > 0 and thalach < 120:
-        score += 0.15
-    elif thalach > 0 and thalach < 140:
-        score += 0.05
-    if diab:
-        score += 0.12
-    if obe:
-        score += 0.08
-    if cp:
-        score += 0.15
-    if sob:
-        score += 0.06
-    if sw:
-        score += 0.05
-    if stress:
-        score += 0.04
-    if sleep:
-        score += 0.03
-    if smoke:
-        score += 0.12
-    return 1 if score >= 0.45 else 0
+# Clinical direction of each feature's effect on risk (+1 raises it, -1 lowers it). thalachh is the
+# peak heart rate reached in an exercise test, where a higher peak is protective.
+FEATURE_SIGNS = {name: 1 for name in FEATURE_NAMES} | {"thalachh": -1}
+
+_artifact: ModelArtifact | None = None
+
+
+def coefficient_sign_warnings(artifact: ModelArtifact) -> list[str]:
+    """
+    Features the artifact ignores (zero coefficient) or weighs against their
+    clinical direction. Training reports these; only the live features scored
+    continuously are enforced (risk_scorer.check_live_features).
+    """
+    zero = [f for f, c in zip(artifact.feature_names, artifact.coef) if c == 0]
+    inverted = [f for f, c in zip(artifact.feature_names, artifact.coef) if c * FEATURE_SIGNS.get(f, 0) < 0]
+    warnings = []
+    if zero:
+        warnings.append(f"zero coefficients for {', '.join(zero)}")
+    if inverted:
+        warnings.append(f"clinically inverted coefficients for {', '.join(inverted)}")
+    return warnings
+
+
+def _synthetic_labels(X: np.ndarray) -> np.ndarray:
+    """Synthetic risk rule so the dataset has a learnable structure (vectorised over rows)."""
+    age, sex, chol, bp, fbs, thalach, diab, obe, sob, cp, sw, stress, sleep, smoke = X.T
+    score = np.select([age >= 55, age >= 45], [0.25, 0.12], 0.0)
+    score += 0.05 * (sex == 1)
+    score += np.select([chol >= 240, chol >= 200], [0.2, 0.1], 0.0)
+    score += np.select([bp >= 160, bp >= 140], [0.2, 0.12], 0.0)
+    score += np.select([(thalach > 0) & (thalach < 120), (thalach > 0) & (thalach < 140)], [0.15, 0.05], 0.0)
+    score += 0.1 * (fbs != 0)
+    score += 0.12 * (diab != 0)
+    score += 0.08 * (obe != 0)
+    score += 0.15 * (cp != 0)
+    score += 0.06 * (sob != 0)
+    score += 0.05 * (sw != 0)
+    score += 0.04 * (stress != 0)
+    score += 0.03 * (sleep != 0)
+    score += 0.12 * (smoke != 0)
+    return (score >= 0.45).astype(np.int64)
 
 
 def _build_synthetic_data(n_samples: int = 800, seed: int = 42) -> tuple[np.ndarray, np.ndarray]:
@@ -85,25 +92,54 @@ def _build_synthetic_data(n_samples: int = 800, seed: int = 42) -> tuple[np.ndar
     X[:, 5] = rng.integers(90, 200, size=n_samples)  # thalachh
     for j in range(6, 14):
         X[:, j] = rng.integers(0, 2, size=n_samples)
-    y = np.array([_synthetic_label(X[i]) for i in range(n_samples)])
+    y = _synthetic_labels(X)
     return X, y
 
 
-def _get_model():
-    global _model, _scaler
-    if _model is not None:
-        return _model, _scaler
-    X, y = _build_synthetic_data()
-    _scaler = StandardScaler()
-    X_scaled = _scaler.fit_transform(X)
-    _model = LogisticRegression(max_iter=500, random_state=42)
-    _model.fit(X_scaled, y)
-    logger.info("Heart risk LogisticRegression model fitted on synthetic data.")
-    return _model, _scaler
-
-
-def payload_to_features(payload: dict) -> np.ndarray:
-    """Convert API payload to feature vector in FEATURE_NAMES order."""
+def fit_synthetic(n_samples: int = 800, seed: int = 42) -> ModelArtifact:
+    """Fit StandardScaler + LogisticRegression on synthetic data and package it as an artifact."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import StandardScaler
+
+    X, y = _build_synthetic_data(n_samples, seed)
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    model = LogisticRegression(max_iter=500, random_state=42)
+    model.fit(X_scaled, y)
+    artifact = ModelArtifact.from_sklearn(
+        model,
+        scaler,
+        FEATURE_NAMES,
+        version=SYNTHETIC_MODEL_VERSION,
+        metadata={"source": "synthetic", "n_samples": n_samples, "seed": seed, "trained_at": int(time.time())},
+    )
+    for warning in coefficient_sign_warnings(artifact):
+        logger.warning("Model %s: %s", artifact.version, warning)
+    return artifact
+
+
+def load_model(path: str | None = None) -> ModelArtifact:
+    """
+    Load the model artifact (refusing one built for a different FEATURE_NAMES).
+    Falls back to fitting the synthetic model in-process when no artifact exists.
+    """
+    global _artifact
+    path = path or MODEL_PATH
+    if os.path.exists(path):
+        _artifact = ModelArtifact.load(path, expected_features=FEATURE_NAMES)
+        logger.info("Heart risk model %s loaded from %s.", _artifact.version, path)
+    else:
+        logger.warning("No model artifact at %s; fitting synthetic model in-process.", path)
+        _artifact = fit_synthetic()
+    return _artifact
+
+
+def get_artifact() -> ModelArtifact:
+    return _artifact if _artifact is not None else load_model()
+
+
+def _payload_row(payload: dict) -> list:
+    """Feature values for one payload, in FEATURE_NAMES order."""
     def _float(k, default=0.0):
         v = payload.get(k, default)
         if v is None or v == "":
@@ -113,20 +149,11 @@ def payload_to_features(payload: dict) -> np.ndarray:
         except (TypeError, ValueError):
             return default
 
-    def _int(k, default=0):
-        v = payload.get(k, default)
-        if v is None or v == "":
-            return default
-        try:
-            return int(v)
-        except (TypeError, ValueError):
-            return default
-
     def _bool(k):
         v = payload.get(k)
         return 1.0 if v else 0.0
 
-    return np.array([
+    return [
         _float("age", 50),
         _float("sex", 0),
         _float("cholesterol", 200),
@@ -141,12 +168,29 @@ def payload_to_features(payload: dict) -> np.ndarray:
         _bool("stress"),
         _bool("poor_sleep"),
         _bool("smoking"),
-    ], dtype=np.float64).reshape(1, -1)
+    ]
+
+
+def payload_to_features(payload: dict) -> np.ndarray:
+    """Convert API payload to feature vector in FEATURE_NAMES order."""
+    return np.array(_payload_row(payload), dtype=np.float64).reshape(1, -1)
+
+
+def payloads_to_matrix(payloads) -> np.ndarray:
+    """Featurize many payloads into one (n, len(FEATURE_NAMES)) matrix."""
+    return np.array([_payload_row(p) for p in payloads], dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+
+
+def predict_proba_matrix(X: np.ndarray) -> np.ndarray:
+    """P(risk=1) for every row of a feature matrix, in one matrix-vector product."""
+    return get_artifact().predict_proba_matrix(X)
+
+
+def predict_proba_batch(payloads) -> np.ndarray:
+    """Return P(risk=1) for each payload."""
+    return predict_proba_matrix(payloads_to_matrix(payloads))
 
 
 def predict_proba(payload: dict) -> float:
     """Return P(risk=1) in [0, 1]."""
-    model, scaler = _get_model()
-    x = payload_to_features(payload)
-    x_scaled = scaler.transform(x)
-    return float(model.predict_proba(x_scaled)[0, 1])
+    return float(predict_proba_matrix(payload_to_features(payload))[0])
@@ -1,17 +1,145 @@
 """
-Generate a histogram image from user-provided numbers using matplotlib.
+Histogram service: bins numbers with NumPy and renders PNGs with matplotlib's
+object API (no pyplot global state). Each thread reuses one Figure/Agg canvas,
+and rendered images are cached by a hash of the data plus render options.
 """
+import hashlib
 import io
 import logging
+import threading
 from typing import Sequence
 
 import matplotlib
 matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 import numpy as np
 
+from services.cache import LRUCache
+
 logger = logging.getLogger(__name__)
 
+RENDER_CACHE_SIZE = 256
+FACECOLOR = "#f8fafc"
+
+_render_cache = LRUCache(RENDER_CACHE_SIZE)
+_local = threading.local()
+
+
+def _clean(numbers: Sequence[float]) -> np.ndarray:
+    if numbers is None or len(numbers) == 0:
+        raise ValueError("At least one number is required")
+    data = np.asarray(numbers, dtype=float)
+    data = data[~np.isnan(data)]
+    if len(data) == 0:
+        raise ValueError("No valid numbers provided")
+    return data
+
+
+def _default_bins(n: int) -> int:
+    return min(30, max(5, int(n ** 0.5)))
+
+
+def compute_bins(numbers: Sequence[float], bins: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Return (counts, edges) as np.histogram would, with the default bin rule."""
+    data = _clean(numbers)
+    return np.histogram(data, bins=bins or _default_bins(len(data)))
+
+
+def histogram_bins(numbers: Sequence[float], bins: int | None = None) -> dict:
+    """JSON-friendly bin counts and edges, without rendering."""
+    data = _clean(numbers)
+    counts, edges = np.histogram(data, bins=bins or _default_bins(len(data)))
+    return {
+        "counts": counts.tolist(),
+        "edges": edges.tolist(),
+        "n": int(len(data)),
+        "min": float(data.min()),
+        "max": float(data.max()),
+        "mean": float(data.mean()),
+    }
+
+
+class _Renderer:
+    """
+    One Figure/Agg canvas per thread. The bars are a single filled StepPatch
+    plus a LineCollection of bar separators, updated in place per render, so
+    axes, ticks and text artists are built once instead of per request.
+    """
+
+    def __init__(self):
+        self.fig = Figure(figsize=(8, 5), dpi=100, facecolor=FACECOLOR)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = ax = self.fig.add_subplot()
+        self.fig.subplots_adjust(left=0.09, right=0.97, top=0.9, bottom=0.12)
+        ax.set_facecolor(FACECOLOR)
+        ax.grid(axis="y", alpha=0.3, linestyle="--")
+        ax.set_axisbelow(True)
+        self.bars = ax.stairs([0], [0, 1], fill=True, linewidth=0)
+        self.separators = LineCollection([], linewidths=0.8)
+        ax.add_collection(self.separators)
+        self.title = ax.set_title("", fontsize=14, fontweight="bold")
+        ax.set_xlabel("", fontsize=12)
+        ax.set_ylabel("", fontsize=12)
+
+    def render(self, counts, edges, title, xlabel, ylabel, color, edgecolor) -> bytes:
+        ax = self.ax
+        self.bars.set_data(counts, edges)
+        self.bars.set_facecolor(color)
+        heights = np.maximum(counts[:-1], counts[1:])
+        self.separators.set_segments([((x, 0), (x, h)) for x, h in zip(edges[1:-1], heights)])
+        self.separators.set_color(edgecolor)
+        self.title.set_text(title)
+        ax.xaxis.label.set_text(xlabel)
+        ax.yaxis.label.set_text(ylabel)
+        top = float(counts.max()) if len(counts) else 1.0
+        pad = (edges[-1] - edges[0]) * 0.05 or 0.5
+        ax.set_xlim(edges[0] - pad, edges[-1] + pad)
+        ax.set_ylim(0, (top or 1.0) * 1.05)
+        buf = io.BytesIO()
+        self.canvas.print_png(buf)
+        return buf.getvalue()
+
+
+def _renderer() -> _Renderer:
+    renderer = getattr(_local, "renderer", None)
+    if renderer is None:
+        renderer = _local.renderer = _Renderer()
+    return renderer
+
+
+def _cache_key(counts: np.ndarray, edges: np.ndarray, options: tuple) -> str:
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(counts, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(edges, dtype=np.float64).tobytes())
+    h.update(repr(options).encode())
+    return h.hexdigest()
+
+
+def render_histogram(
+    counts,
+    edges,
+    title: str = "Distribution",
+    xlabel: str = "Value",
+    ylabel: str = "Frequency",
+    color: str = "#0f172a",
+    edgecolor: str = "white",
+) -> tuple[bytes, str]:
+    """
+    Render precomputed bin counts/edges to PNG. Returns (png_bytes, content_key);
+    identical inputs are served from the render cache.
+    """
+    counts = np.asarray(counts)
+    edges = np.asarray(edges, dtype=float)
+    key = _cache_key(counts, edges, (title, xlabel, ylabel, color, edgecolor))
+    png = _render_cache.get(key)
+    if png is not None:
+        return png, key
+    png = _renderer().render(counts, edges, title, xlabel, ylabel, color, edgecolor)
+    _render_cache.put(key, png)
+    return png, key
+
 
 def build_histogram(
     numbers: Sequence[float],
@@ -25,24 +153,26 @@ def build_histogram(
     """
     Create a histogram from a list of numbers and return PNG bytes.
     """
-    if not numbers:
-        raise ValueError("At least one number is required")
-    data = np.array(numbers, dtype=float)
-    data = data[~np.isnan(data)]
-    if len(data) == 0:
-        raise ValueError("No valid numbers provided")
-    if bins is None:
-        bins = min(30, max(5, int(len(data) ** 0.5)))
-    fig, ax = plt.subplots(figsize=(8, 5), facecolor="#f8fafc")
-    ax.set_facecolor("#f8fafc")
-    ax.hist(data, bins=bins, color=color, edgecolor=edgecolor, linewidth=0.8)
-    ax.set_title(title, fontsize=14, fontweight="bold")
-    ax.set_xlabel(xlabel, fontsize=12)
-    ax.set_ylabel(ylabel, fontsize=12)
-    ax.grid(axis="y", alpha=0.3, linestyle="--")
-    plt.tight_layout()
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png", dpi=100, bbox_inches="tight")
-    plt.close(fig)
-    buf.seek(0)
-    return buf.read()
+    counts, edges = compute_bins(numbers, bins)
+    png, _ = render_histogram(counts, edges, title, xlabel, ylabel, color, edgecolor)
+    return png
+
+
+def build_histogram_from_bins(
+    counts,
+    edges,
+    title: str = "Distribution",
+    xlabel: str = "Value",
+    ylabel: str = "Frequency",
+    color: str = "#0f172a",
+    edgecolor: str = "white",
+) -> bytes:
+    """Render PNG bytes from pre-aggregated bins (e.g. a vitals distribution sketch)."""
+    if len(counts) == 0 or len(edges) != len(counts) + 1:
+        raise ValueError("edges must have exactly one more entry than counts")
+    png, _ = render_histogram(counts, edges, title, xlabel, ylabel, color, edgecolor)
+    return png
+
+
+def cache_stats() -> dict:
+    return _render_cache.stats()
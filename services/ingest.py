@@ -0,0 +1,232 @@
+"""
+Vitals ingestion pipeline shared by device uploads and the mock stream.
+Batches are validated column-wise, grouped per patient and appended to the
+store, durable log, rollups and distribution sketches as blocks; alert
+evaluation runs once over the whole batch.
+"""
+import time
+
+import numpy as np
+
+from services.alert_engine import AlertEngine, alert_engine
+from services.event_hub import EventHub, event_hub
+from services.metrics import ingest_batch_seconds, readings_ingested
+from services.risk_scorer import RiskScorer, risk_scorer
+from services.vitals_distribution import VitalsDistribution, vitals_distribution
+from services.vitals_log import get_vitals_log
+from services.vitals_rollup import VitalsRollups, vitals_rollups
+from services.vitals_store import VITAL_DECIMALS, VITAL_FIELDS, VitalsStore, vitals_store
+
+MAX_INGEST_BATCH = 10_000
+MAX_PATIENT_ID_LENGTH = 128
+# Physically plausible range per vital; values outside reject the reading
+VITAL_LIMITS = {
+    "heartRate": (10.0, 350.0),
+    "systolic": (30.0, 320.0),
+    "diastolic": (10.0, 250.0),
+    "bloodOxygen": (30.0, 100.0),
+    "temperature": (25.0, 46.0),
+    "respiratoryRate": (0.0, 120.0),
+}
+MAX_CLOCK_SKEW_MS = 5 * 60_000  # readings stamped further in the future are rejected
+
+_ingested_stream = readings_ingested.labels("stream")
+_ingested_batch = readings_ingested.labels("batch")
+
+
+class IngestError(ValueError):
+    """The batch as a whole is unusable (wrong shape); `status` is the HTTP status to answer with."""
+
+    status = 400
+
+
+class IngestTooLarge(IngestError):
+    """The batch has more than MAX_INGEST_BATCH readings."""
+
+    status = 413
+
+
+class IngestBatch:
+    """Validated columnar batch: patient_ids[n], timestamps[n] (int64), values[vital, n] (float64, NaN = missing)."""
+
+    __slots__ = ("patient_ids", "timestamps", "values", "rejected")
+
+    def __init__(self, patient_ids: list, timestamps: np.ndarray, values: np.ndarray, rejected: list):
+        self.patient_ids = patient_ids
+        self.timestamps = timestamps
+        self.values = values
+        self.rejected = rejected
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def columns(self) -> dict:
+        """Alert-engine view: vital -> column, plus patientId and timestamp."""
+        cols = {vital: self.values[j] for j, vital in enumerate(VITAL_FIELDS)}
+        cols["patientId"] = self.patient_ids
+        cols["timestamp"] = self.timestamps
+        return cols
+
+    def readings(self) -> list:
+        rows = self.values.T.tolist()
+        out = []
+        for pid, ts, row in zip(self.patient_ids, self.timestamps.tolist(), rows):
+            reading = {"patientId": pid, "timestamp": ts}
+            for vital, v in zip(VITAL_FIELDS, row):
+                decimals = VITAL_DECIMALS[vital]
+                reading[vital] = None if v != v else (round(v, decimals) if decimals else int(round(v)))
+            out.append(reading)
+        return out
+
+
+def _numeric_column(values: list) -> tuple[np.ndarray, np.ndarray]:
+    """(float64 column with NaN for missing, mask of rows holding non-numeric values)."""
+    try:
+        arr = np.array(values)
+    except (TypeError, ValueError, OverflowError):
+        arr = None
+    # all plain numbers: the common case (nested arrays parse as 2-D and fall through)
+    if arr is not None and arr.ndim == 1 and arr.dtype.kind in "iuf":
+        return arr.astype(np.float64), np.zeros(len(values), dtype=bool)
+    # mixed column (None for missing vitals, or junk): check value by value
+    col = np.full(len(values), np.nan)
+    bad = np.zeros(len(values), dtype=bool)
+    for i, v in enumerate(values):
+        if v is None:
+            continue
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            col[i] = v
+        else:
+            bad[i] = True
+    return col, bad
+
+
+def rows_to_columns(rows: list) -> dict:
+    """List of reading objects -> dict of columns (missing keys become None)."""
+    if not all(isinstance(r, dict) for r in rows):
+        raise IngestError("Every reading must be an object")
+    return {key: [r.get(key) for r in rows] for key in ("patientId", "timestamp") + VITAL_FIELDS}
+
+
+def validate_columns(columns: dict, now_ms: int | None = None) -> IngestBatch:
+    """
+    Validate a columnar batch {patientId: [...], timestamp: [...], <vital>: [...]}
+    in bulk. Rows with a bad patient id, timestamp or vital value (non-numeric or
+    outside VITAL_LIMITS), or no vitals at all, are dropped and reported in
+    batch.rejected as {index, error}. A missing timestamp defaults to now.
+    """
+    if not isinstance(columns, dict) or not isinstance(columns.get("patientId"), list):
+        raise IngestError("Columnar batch needs a 'patientId' array")
+    pids = columns["patientId"]
+    n = len(pids)
+    if n > MAX_INGEST_BATCH:
+        raise IngestTooLarge(f"Batch too large (max {MAX_INGEST_BATCH} readings)")
+    for key in ("timestamp",) + VITAL_FIELDS:
+        col = columns.get(key)
+        if col is not None and (not isinstance(col, list) or len(col) != n):
+            raise IngestError(f"'{key}' must be an array of the same length as 'patientId'")
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    errors = np.zeros(n, dtype=np.int8)  # index into reasons, 0 = ok
+    reasons = [None, "invalid patientId", "invalid timestamp", "non-numeric vital", "vital out of range", "no vitals"]
+
+    bad_pid = np.fromiter(
+        (not isinstance(p, str) or not p or len(p) > MAX_PATIENT_ID_LENGTH for p in pids), dtype=bool, count=n
+    )
+    errors[bad_pid] = 1
+
+    raw_ts = columns.get("timestamp")
+    if raw_ts is None:
+        ts = np.full(n, now_ms, dtype=np.float64)
+    else:
+        ts, bad = _numeric_column(raw_ts)
+        ts[np.isnan(ts) & ~bad] = now_ms
+        bad |= ~np.isfinite(ts) | (ts < 0) | (ts > now_ms + MAX_CLOCK_SKEW_MS)
+        errors[(errors == 0) & bad] = 2
+
+    values = np.full((len(VITAL_FIELDS), n), np.nan)
+    for j, vital in enumerate(VITAL_FIELDS):
+        raw = columns.get(vital)
+        if raw is None:
+            continue
+        col, bad = _numeric_column(raw)
+        errors[(errors == 0) & bad] = 3
+        lo, hi = VITAL_LIMITS[vital]
+        with np.errstate(invalid="ignore"):
+            out_of_range = ~np.isnan(col) & ((col < lo) | (col > hi))
+        errors[(errors == 0) & out_of_range] = 4
+        values[j] = col
+    errors[(errors == 0) & np.isnan(values).all(axis=0)] = 5
+
+    ok = errors == 0
+    rejected = [{"index": i, "error": reasons[errors[i]]} for i in np.flatnonzero(~ok).tolist()]
+    if rejected:
+        keep = np.flatnonzero(ok)
+        pids = [pids[i] for i in keep.tolist()]
+        ts, values = ts[keep], values[:, keep]
+    return IngestBatch(list(pids), ts.astype(np.int64), values, rejected)
+
+
+class IngestPipeline:
+    def __init__(
+        self,
+        store: VitalsStore = vitals_store,
+        engine: AlertEngine = alert_engine,
+        distribution: VitalsDistribution = vitals_distribution,
+        rollups: VitalsRollups = vitals_rollups,
+        hub: EventHub | None = event_hub,
+        scorer: RiskScorer | None = risk_scorer,
+    ):
+        self._store = store
+        self._engine = engine
+        self._distribution = distribution
+        self._rollups = rollups
+        self._hub = hub
+        self._scorer = scorer
+
+    def record(self, reading: dict) -> list:
+        """
+        Downstream processing for one reading that is already in the store
+        (the mock stream path): durable log, sketches, rollups, risk aggregates, alerts.
+        """
+        pid = reading["patientId"]
+        _ingested_stream.inc()
+        log = get_vitals_log()
+        if log is not None:
+            log.append(pid, reading)
+        self._distribution.add(pid, reading)
+        self._rollups.add(pid, reading)
+        if self._scorer is not None:
+            self._scorer.observe_reading(reading)
+        return self._engine.evaluate(reading)
+
+    def ingest(self, batch: IngestBatch) -> dict:
+        """Append a validated batch patient by patient, then evaluate alerts over all of it."""
+        n = len(batch)
+        if not n:
+            return {"accepted": 0, "patients": 0, "alerts": 0}
+        t0 = time.perf_counter()
+        pids = np.asarray(batch.patient_ids, dtype=object)
+        keys, inverse = np.unique(pids, return_inverse=True)
+        # group rows by patient, oldest first within each patient
+        order = np.lexsort((batch.timestamps, inverse))
+        bounds = np.flatnonzero(np.diff(inverse[order])) + 1
+        log = get_vitals_log()
+        for pid, idx in zip(keys.tolist(), np.split(order, bounds)):
+            ts, values = batch.timestamps[idx], batch.values[:, idx]
+            self._store.extend(pid, ts, values)
+            if log is not None:
+                log.append_many(pid, ts, values)
+            self._rollups.add_many(pid, ts, values)
+            self._distribution.add_many(pid, values)
+        if self._hub is not None and self._hub.has_subscribers("vitals"):
+            for reading in batch.readings():
+                self._hub.publish("vitals", reading, patient_id=reading["patientId"])
+        if self._scorer is not None:
+            self._scorer.observe(batch.patient_ids, batch.values)
+        alerts = self._engine.evaluate_batch(batch.columns())
+        _ingested_batch.inc(n)
+        ingest_batch_seconds.observe(time.perf_counter() - t0)
+        return {"accepted": n, "patients": len(keys), "alerts": len(alerts)}
+
+
+ingest_pipeline = IngestPipeline()
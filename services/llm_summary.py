@@ -0,0 +1,199 @@
+"""
+Asynchronous LLM risk summaries. /predict returns immediately with a
+summary_id; a small worker pool produces the text through one shared,
+keep-alive OpenAI-compatible client with a strict per-call deadline.
+Summaries are cached by risk bucket, so most jobs complete without a call.
+"""
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock
+
+from services.cache import LRUCache
+from services.metrics import llm_summary_seconds
+
+logger = logging.getLogger(__name__)
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL")
+OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+# Hard deadline for one LLM call (seconds); no client-side retries
+OPENAI_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", 8.0))
+
+SUMMARY_WORKERS = 4
+SUMMARY_MAX_PENDING = 256
+SUMMARY_JOBS_RETAINED = 10_000
+# LLM summaries depend only on the risk bucket, so a handful of entries suffice
+SUMMARY_CACHE_SIZE = 16
+SUMMARY_CACHE_TTL = 6 * 3600.0
+
+_client = None
+_client_lock = Lock()
+
+
+def _get_client():
+    """One pooled client per process; its HTTP connection pool is reused across calls."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import openai
+                _client = openai.OpenAI(
+                    api_key=OPENAI_API_KEY,
+                    base_url=OPENAI_BASE_URL or None,
+                    timeout=OPENAI_TIMEOUT,
+                    max_retries=0,
+                )
+    return _client
+
+
+def get_llm_summary(
+    risk_percentage: float,
+    prediction: int,
+    payload: dict,
+    health_status: str | None = None,
+) -> str | None:
+    """
+    Call an LLM to generate a short, non-diagnostic summary of the risk result.
+    With health_status the prompt names only the risk bucket, so the text can
+    be shared by every result in that bucket.
+    Returns None if no API key or on error.
+    """
+    if not OPENAI_API_KEY:
+        return None
+
+    try:
+        risk_label = "elevated" if prediction == 1 else "lower"
+        if health_status:
+            risk_line = f"Risk level: {health_status} ({risk_label} risk). "
+        else:
+            risk_line = f"Risk score: {risk_percentage:.1f}% ({risk_label} risk). "
+        prompt = (
+            "You are a health assistant. In one or two short, clear sentences, "
+            "summarize this heart risk result in a supportive, non-alarming way. "
+            "Do not diagnose or give medical advice. "
+            f"{risk_line}"
+            "Mention that the user should discuss with a doctor for any health decisions."
+        )
+        response = _get_client().chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=120,
+        )
+        text = response.choices[0].message.content
+        return text.strip() if text else None
+    except Exception as e:
+        logger.warning("LLM summary failed: %s", e)
+        return None
+
+
+class _Job:
+    __slots__ = ("summary_id", "status", "summary", "created_at", "finished_at", "done")
+
+    def __init__(self, summary_id: str):
+        self.summary_id = summary_id
+        self.status = "pending"
+        self.summary = None
+        self.created_at = int(time.time() * 1000)
+        self.finished_at = None
+        self.done = Event()
+
+    def finish(self, summary: str | None):
+        self.summary = summary
+        self.status = "ready" if summary else "failed"
+        self.finished_at = int(time.time() * 1000)
+        self.done.set()
+
+    def to_dict(self) -> dict:
+        out = {"summary_id": self.summary_id, "status": self.status, "created_at": self.created_at}
+        if self.summary:
+            out["llm_summary"] = self.summary
+        if self.finished_at is not None:
+            out["finished_at"] = self.finished_at
+        return out
+
+
+class SummaryService:
+    def __init__(self, workers: int = SUMMARY_WORKERS, max_pending: int = SUMMARY_MAX_PENDING):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-summary")
+        self._max_pending = max_pending
+        self._pending = 0
+        self._jobs: OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self._cache = LRUCache(SUMMARY_CACHE_SIZE, ttl=SUMMARY_CACHE_TTL)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(OPENAI_API_KEY)
+
+    def _add_job(self) -> _Job:
+        job = _Job(uuid.uuid4().hex)
+        with self._lock:
+            self._jobs[job.summary_id] = job
+            while len(self._jobs) > SUMMARY_JOBS_RETAINED:
+                self._jobs.popitem(last=False)
+        return job
+
+    def submit(self, result: dict, payload: dict) -> _Job | None:
+        """
+        Start (or reuse a cached) summary for a scored result. Returns the job,
+        already finished on a cache hit; None when no LLM is configured or the
+        worker pool is saturated.
+        """
+        if not self.enabled:
+            return None
+        key = (result["health_status"], result["prediction"])
+        cached = self._cache.get(key)
+        if cached is not None:
+            job = self._add_job()
+            job.finish(cached)
+            return job
+        with self._lock:
+            if self._pending >= self._max_pending:
+                logger.warning("LLM summary queue full; skipping summary")
+                return None
+            self._pending += 1
+        job = self._add_job()
+        self._executor.submit(self._run, job, key, result, payload)
+        return job
+
+    def _run(self, job: _Job, key, result: dict, payload: dict):
+        def call():
+            t0 = time.perf_counter()
+            text = get_llm_summary(result["risk_percentage"], result["prediction"], payload, result["health_status"])
+            llm_summary_seconds.labels("ok" if text is not None else "failed").observe(time.perf_counter() - t0)
+            return text
+
+        try:
+            summary = self._cache.get_or_compute(
+                key, call,
+                cache_if=lambda text: text is not None,  # retry failed LLM calls next time
+                count_lookup=False,  # submit() already counted this lookup as a miss
+            )
+        except Exception as e:
+            logger.warning("LLM summary job failed: %s", e)
+            summary = None
+        finally:
+            with self._lock:
+                self._pending -= 1
+        job.finish(summary)
+
+    def get(self, summary_id: str) -> _Job | None:
+        with self._lock:
+            return self._jobs.get(summary_id)
+
+    def wait(self, summary_id: str, timeout: float) -> _Job | None:
+        job = self.get(summary_id)
+        if job is not None:
+            job.done.wait(timeout)
+        return job
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending, jobs = self._pending, len(self._jobs)
+        return {"pending": pending, "jobs": jobs, "cache": self._cache.stats()}
+
+
+summary_service = SummaryService()
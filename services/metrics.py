@@ -0,0 +1,474 @@
+"""
+In-process instrumentation: counters, gauges and fixed-bucket histograms
+rendered in the Prometheus text format or as a compact JSON summary, lock
+wait timing, and an optional sampling profiler producing collapsed stacks
+for flame graphs.
+
+Recording costs a cached child lookup plus a short lock-guarded add, cheap
+enough to leave on in production. Values that already live in a service
+(buffer sizes, dispatcher counters) are read only at scrape time through
+collectors instead of being mirrored on every event.
+"""
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter as _StackCounts
+from threading import Lock
+
+# Seconds; spans the 10 us alert checks up to slow LLM calls
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+PROFILE_HZ = 97  # off-beat with periodic work so samples don't alias
+MAX_PROFILE_STACKS = 20000  # distinct stacks kept; later new stacks are counted as dropped
+SUMMARY_QUANTILES = (0.5, 0.99)
+
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, bounds: tuple):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def state(self) -> tuple[list, float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        self._lock = Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Child for one label combination (positional, in labelnames order); cache it on hot paths."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(tuple(str(v) for v in values) if values else (), self._new_child())
+                self._children[values] = child
+        return child
+
+    def _items(self):
+        seen = set()
+        for values, child in list(self._children.items()):
+            if id(child) in seen:
+                continue
+            seen.add(id(child))
+            yield dict(zip(self.labelnames, (str(v) for v in values))), child
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def samples(self) -> list:
+        return [[self.name + "_total", labels, child.value] for labels, child in self._items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def samples(self) -> list:
+        return [[self.name, labels, child.value] for labels, child in self._items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def samples(self) -> list:
+        out = []
+        for labels, child in self._items():
+            counts, total = child.state()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                out.append([self.name + "_bucket", {**labels, "le": _format_value(bound)}, cumulative])
+            out.append([self.name + "_sum", labels, total])
+            out.append([self.name + "_count", labels, cumulative])
+        return out
+
+
+class MetricsRegistry:
+    """Named metrics plus collector callbacks returning extra families at scrape time."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors = []
+        self._lock = Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: tuple = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collect) -> None:
+        """collect() -> list of family dicts {name, type, help, samples}; called on every scrape."""
+        with self._lock:
+            if collect not in self._collectors:
+                self._collectors.append(collect)
+
+    def collect(self) -> list:
+        families = [
+            {"name": m.name, "type": m.kind, "help": m.help, "samples": m.samples()}
+            for m in list(self._metrics.values())
+        ]
+        for collect in list(self._collectors):
+            families.extend(collect())
+        return families
+
+
+def family(name: str, kind: str, help_text: str, samples) -> dict:
+    """Build a collector family; samples are (labels, value) pairs, or one bare value."""
+    suffix = "_total" if kind == "counter" else ""
+    if not isinstance(samples, list):
+        samples = [({}, samples)]
+    return {"name": name, "type": kind, "help": help_text,
+            "samples": [[name + suffix, labels, value] for labels, value in samples]}
+
+
+def label_families(families: list, **labels) -> list:
+    """Copy of families with extra labels on every sample (e.g. which process reported it)."""
+    return [
+        {**f, "samples": [[n, {**sample_labels, **labels}, v] for n, sample_labels, v in f["samples"]]}
+        for f in families
+    ]
+
+
+def merge_families(*groups: list) -> list:
+    """Concatenate samples of same-named families so each family renders once."""
+    merged: dict[str, dict] = {}
+    for families in groups:
+        for f in families:
+            if f["name"] in merged:
+                merged[f["name"]]["samples"].extend(f["samples"])
+            else:
+                merged[f["name"]] = {**f, "samples": list(f["samples"])}
+    return list(merged.values())
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_prometheus(families: list) -> str:
+    """Prometheus text exposition format 0.0.4."""
+    lines = []
+    for f in families:
+        lines.append(f"# HELP {f['name']} {f['help']}")
+        lines.append(f"# TYPE {f['name']} {f['type']}")
+        for name, labels, value in f["samples"]:
+            if labels:
+                label_str = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_str}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _bucket_quantile(q: float, bounds: list, cumulative: list) -> float | None:
+    """Linear interpolation inside the bucket holding the q-th observation (as histogram_quantile does)."""
+    total = cumulative[-1]
+    if not total:
+        return None
+    rank = q * total
+    i = bisect.bisect_left(cumulative, rank)
+    if i >= len(bounds) or bounds[i] == float("inf"):
+        return bounds[-2] if len(bounds) > 1 else None  # beyond the last finite bucket
+    lo = bounds[i - 1] if i else 0.0
+    below = cumulative[i - 1] if i else 0
+    in_bucket = cumulative[i] - below
+    return lo + (bounds[i] - lo) * ((rank - below) / in_bucket if in_bucket else 1.0)
+
+
+def summarize(families: list) -> dict:
+    """
+    Compact JSON view: counters and gauges by label set, histograms as
+    count/mean/p50/p99 (bucket estimates, in ms for *_seconds families).
+    """
+    out = {}
+    for f in families:
+        name = f["name"]
+        if f["type"] != "histogram":
+            values = {}
+            for _, labels, value in f["samples"]:
+                key = ",".join(f"{k}={v}" for k, v in labels.items()) or "value"
+                values[key] = value
+            out[name] = values.get("value", values) if list(values) == ["value"] else values
+            continue
+        series: dict[str, dict] = {}
+        for sample_name, labels, value in f["samples"]:
+            labels = dict(labels)
+            le = labels.pop("le", None)
+            key = ",".join(f"{k}={v}" for k, v in labels.items()) or "value"
+            s = series.setdefault(key, {"bounds": [], "cumulative": [], "sum": 0.0, "count": 0})
+            if sample_name.endswith("_bucket"):
+                s["bounds"].append(float(le))
+                s["cumulative"].append(value)
+            elif sample_name.endswith("_sum"):
+                s["sum"] = value
+            else:
+                s["count"] = value
+        scale, unit = (1000.0, "_ms") if name.endswith("_seconds") else (1.0, "")
+        summary = {}
+        for key, s in series.items():
+            if not s["count"]:
+                continue
+            entry = {"count": int(s["count"]), f"mean{unit}": round(s["sum"] / s["count"] * scale, 4)}
+            for q in SUMMARY_QUANTILES:
+                v = _bucket_quantile(q, s["bounds"], s["cumulative"])
+                entry[f"p{int(q * 100)}{unit}"] = None if v is None else round(v * scale, 4)
+            summary[key] = entry
+        out[name] = summary.get("value", summary) if list(summary) == ["value"] else summary
+    return out
+
+
+class TimedLock:
+    """
+    Drop-in for threading.Lock that records how long contended acquisitions
+    waited. Uncontended acquisitions take one non-blocking try and record nothing.
+    """
+
+    __slots__ = ("_lock", "_wait")
+
+    def __init__(self, name: str):
+        self._lock = Lock()
+        self._wait = lock_wait_seconds.labels(name)
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._lock.acquire(False):
+            return True
+        if not blocking:
+            return False
+        t0 = time.perf_counter()
+        acquired = self._lock.acquire(True, timeout)
+        self._wait.observe(time.perf_counter() - t0)
+        return acquired
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def __enter__(self):
+        if not self._lock.acquire(False):
+            t0 = time.perf_counter()
+            self._lock.acquire()
+            self._wait.observe(time.perf_counter() - t0)
+        return True
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's Python stack at hz from a background thread and
+    counts collapsed stacks ("thread;outer;...;inner count" lines, the input
+    of flamegraph.pl and speedscope). Costs nothing while stopped.
+    """
+
+    def __init__(self, max_stacks: int = MAX_PROFILE_STACKS):
+        self._max_stacks = max_stacks
+        self._counts: _StackCounts = _StackCounts()
+        self._lock = Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._hz = 0
+        self._samples = 0
+        self._dropped = 0
+        self._started_at: float | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, hz: int = PROFILE_HZ) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._hz = max(1, min(int(hz), 1000))
+            self._stop.clear()
+            self._started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._samples = self._dropped = 0
+
+    def _run(self) -> None:
+        interval = 1.0 / self._hz
+        me = threading.get_ident()
+        labels: dict[object, str] = {}
+        while not self._stop.wait(interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    parts.append(label)
+                    frame = frame.f_back
+                parts.append(names.get(ident, str(ident)))
+                stacks.append(";".join(reversed(parts)))
+            del frame
+            with self._lock:
+                self._samples += 1
+                for stack in stacks:
+                    if stack in self._counts or len(self._counts) < self._max_stacks:
+                        self._counts[stack] += 1
+                    else:
+                        self._dropped += 1
+
+    def collapsed(self) -> str:
+        with self._lock:
+            items = self._counts.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "hz": self._hz if self.running else 0,
+                "samples": self._samples,
+                "stacks": len(self._counts),
+                "dropped": self._dropped,
+                "started_at": self._started_at,
+            }
+
+
+# Process-wide registry and the metrics recorded by the services
+metrics = MetricsRegistry()
+lock_wait_seconds = metrics.histogram(
+    "rpm_lock_wait_seconds", "Time contended lock acquisitions waited", ("lock",)
+)
+http_request_seconds = metrics.histogram(
+    "rpm_http_request_duration_seconds", "Request handling time by route", ("route", "method")
+)
+http_requests = metrics.counter(
+    "rpm_http_requests", "Requests by route, method and status", ("route", "method", "status")
+)
+readings_ingested = metrics.counter(
+    "rpm_readings_ingested", "Readings stored, by source (stream or batch)", ("source",)
+)
+readings_rejected = metrics.counter("rpm_readings_rejected", "Readings rejected by ingest validation")
+ingest_batch_seconds = metrics.histogram("rpm_ingest_batch_seconds", "Time to apply one validated ingest batch")
+alert_evaluation_seconds = metrics.histogram(
+    "rpm_alert_evaluation_seconds", "Alert rule evaluation time, per reading or per batch", ("mode",)
+)
+alerts_raised = metrics.counter("rpm_alerts_raised", "Alerts raised by severity", ("severity",))
+predict_model_seconds = metrics.histogram(
+    "rpm_predict_model_seconds", "Heart-risk model scoring time (cache misses only)", ("path",)
+)
+llm_summary_seconds = metrics.histogram(
+    "rpm_llm_summary_seconds", "LLM summary call time", ("outcome",)
+)
+risk_score_seconds = metrics.histogram("rpm_risk_score_seconds", "Time to re-score every monitored patient")
+risk_tier_changes = metrics.counter("rpm_risk_tier_changes", "Patients entering a risk tier", ("tier",))
+profiler = SamplingProfiler()
@@ -1,11 +1,13 @@
 """
 Mock IoT data stream: generates patient vitals in a background thread
-and maintains a bounded buffer of recent readings for the dashboard.
+and appends them to the shared per-patient vitals store for the dashboard.
 """
 import time
 import random
-from collections import deque
-from threading import Lock, Thread
+from threading import Thread
+
+from services.event_hub import EventHub, event_hub
+from services.vitals_store import DEFAULT_PATIENT_ID, VitalsStore, vitals_store
 
 # Default buffer size for vitals history (e.g. last 100 readings)
 VITALS_BUFFER_SIZE = 100
@@ -18,9 +20,10 @@ def _random_in_range(min_val: float, max_val: float, decimals: int = 0) -> float
     return round(val, decimals) if decimals else int(round(val))
 
 
-def _generate_one_reading() -> dict:
+def _generate_one_reading(patient_id: str = DEFAULT_PATIENT_ID) -> dict:
     """Produce a single mock vital reading."""
     return {
+        "patientId": patient_id,
         "timestamp": int(time.time() * 1000),
         "heartRate": _random_in_range(60, 100),
         "systolic": _random_in_range(110, 130),
@@ -32,9 +35,16 @@ def _generate_one_reading() -> dict:
 
 
 class MockStreamService:
-    def __init__(self, buffer_size: int = VITALS_BUFFER_SIZE, interval: float = STREAM_INTERVAL):
-        self._buffer: deque = deque(maxlen=buffer_size)
-        self._lock = Lock()
+    def __init__(
+        self,
+        store: VitalsStore | None = None,
+        interval: float = STREAM_INTERVAL,
+        patient_id: str = DEFAULT_PATIENT_ID,
+        hub: EventHub | None = None,
+    ):
+        self._store = store if store is not None else VitalsStore(VITALS_BUFFER_SIZE)
+        self._hub = hub
+        self._patient_id = patient_id
         self._interval = interval
         self._running = False
         self._thread: Thread | None = None
@@ -46,8 +56,7 @@ class MockStreamService:
             return
         self._on_reading = on_reading
         # Seed one reading so /api/vitals/latest is valid immediately
-        with self._lock:
-            self._buffer.append(_generate_one_reading())
+        self._store.append(self._patient_id, _generate_one_reading(self._patient_id))
         self._running = True
         self._thread = Thread(target=self._run_loop, daemon=True)
         self._thread.start()
@@ -60,9 +69,10 @@ class MockStreamService:
 
     def _run_loop(self):
         while self._running:
-            reading = _generate_one_reading()
-            with self._lock:
-                self._buffer.append(reading)
+            reading = _generate_one_reading(self._patient_id)
+            self._store.append(self._patient_id, reading)
+            if self._hub is not None:
+                self._hub.publish("vitals", reading, patient_id=self._patient_id)
             if self._on_reading:
                 try:
                     self._on_reading(reading)
@@ -70,14 +80,29 @@ class MockStreamService:
                     pass
             time.sleep(self._interval)
 
-    def get_latest(self) -> dict | None:
-        with self._lock:
-            return self._buffer[-1] if self._buffer else None
+    def buffer_usage(self) -> dict:
+        """Readings held for the streamed patient vs the ring capacity."""
+        window = self._store.window(self._patient_id)
+        return {"used": 0 if window is None else len(window[0]), "capacity": self._store.capacity}
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def store(self) -> VitalsStore:
+        return self._store
+
+    @property
+    def patient_id(self) -> str:
+        return self._patient_id
+
+    def get_latest(self, patient_id: str | None = None) -> dict | None:
+        return self._store.latest(patient_id or self._patient_id)
 
-    def get_history(self, limit: int = 50) -> list:
-        with self._lock:
-            return list(self._buffer)[-limit:]
+    def get_history(self, limit: int = 50, patient_id: str | None = None) -> list:
+        return self._store.history(patient_id or self._patient_id, limit=limit)
 
 
 # Singleton used by the app
-mock_stream_service = MockStreamService()
+mock_stream_service = MockStreamService(store=vitals_store, hub=event_hub)
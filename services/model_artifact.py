@@ -0,0 +1,109 @@
+"""
+Portable heart-risk model artifact: versioned logistic-regression coefficients,
+scaler mean/scale and feature order in a small JSON file. Loading and scoring
+need only NumPy; scikit-learn is only used when an artifact is built.
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+
+ARTIFACT_FORMAT = 1
+
+
+class ModelArtifactError(ValueError):
+    """Artifact is malformed or does not match the running feature layout."""
+
+
+class ModelArtifact:
+    __slots__ = ("version", "feature_names", "coef", "intercept", "mean", "scale", "metadata", "weights", "bias")
+
+    def __init__(
+        self,
+        version: str,
+        feature_names,
+        coef,
+        intercept: float,
+        mean,
+        scale,
+        metadata: dict | None = None,
+    ):
+        self.version = str(version)
+        self.feature_names = tuple(feature_names)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.metadata = dict(metadata or {})
+        n = len(self.feature_names)
+        if not (self.coef.shape == self.mean.shape == self.scale.shape == (n,)):
+            raise ModelArtifactError(f"coef/mean/scale must all have {n} entries")
+        # Scaler folded into the linear model:
+        # w . (x - mean) / scale + b  ==  (w / scale) . x + (b - sum(w * mean / scale))
+        self.weights = self.coef / self.scale
+        self.bias = self.intercept - float(np.dot(self.weights, self.mean))
+
+    @classmethod
+    def from_sklearn(cls, model, scaler, feature_names, version: str, metadata: dict | None = None):
+        return cls(
+            version=version,
+            feature_names=feature_names,
+            coef=model.coef_[0],
+            intercept=model.intercept_[0],
+            mean=scaler.mean_,
+            scale=scaler.scale_,
+            metadata=metadata,
+        )
+
+    def predict_proba_matrix(self, X: np.ndarray) -> np.ndarray:
+        """P(risk=1) for every row of a feature matrix, in one matrix-vector product."""
+        z = X @ self.weights + self.bias
+        return np.exp(-np.logaddexp(0.0, -z))  # numerically stable sigmoid
+
+    def to_dict(self) -> dict:
+        return {
+            "format": ARTIFACT_FORMAT,
+            "version": self.version,
+            "feature_names": list(self.feature_names),
+            "coef": self.coef.tolist(),
+            "intercept": self.intercept,
+            "scaler_mean": self.mean.tolist(),
+            "scaler_scale": self.scale.tolist(),
+            "metadata": self.metadata,
+        }
+
+    def save(self, path: str):
+        """Write atomically (temp file + rename) so a reader never sees half an artifact."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, expected_features=None) -> "ModelArtifact":
+        """Load an artifact; refuse it if its feature order differs from expected_features."""
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("format") != ARTIFACT_FORMAT:
+            raise ModelArtifactError(f"Unsupported model artifact format: {data.get('format')!r}")
+        features = data.get("feature_names") or []
+        if expected_features is not None and list(features) != list(expected_features):
+            raise ModelArtifactError(
+                f"Model artifact {path} was built for features {features}, expected {list(expected_features)}"
+            )
+        try:
+            return cls(
+                version=data["version"],
+                feature_names=features,
+                coef=data["coef"],
+                intercept=data["intercept"],
+                mean=data["scaler_mean"],
+                scale=data["scaler_scale"],
+                metadata=data.get("metadata"),
+            )
+        except KeyError as e:
+            raise ModelArtifactError(f"Model artifact {path} is missing {e}") from None
@@ -1,86 +1,95 @@
 """
-Heart attack risk prediction: scikit-learn LogisticRegression + optional LLM summary.
+Heart attack risk prediction: logistic-regression model + optional LLM summary.
+The summary is produced asynchronously (see services.llm_summary); predict()
+returns a summary_id that can be fetched or streamed later.
 """
+from bisect import bisect_right
 import logging
-import os
+import time
 
-from services.heart_risk_model import predict_proba as model_predict_proba
+from services.cache import LRUCache
+from services.heart_risk_model import get_artifact, payload_to_features
+from services.heart_risk_model import predict_proba_batch as model_predict_proba_batch
+from services.llm_summary import summary_service
+from services.metrics import predict_model_seconds
 
 logger = logging.getLogger(__name__)
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL")
 
 # Global to store the most recent prediction for health check/monitoring
 LATEST_RESULT = {"status": "No prediction yet"}
+PREDICTION_THRESHOLD = 0.45
+# health_status by risk_percentage: below the first cutoff, up to the second, at or above it
+HEALTH_STATUSES = ("Low Risk", "Moderate Risk", "High Risk")
+RISK_TIER_CUTOFFS = (40.0, 60.0)
+MAX_BATCH_SIZE = 10_000
 
+# Identical feature vectors (same model version) reuse the scored result
+PREDICTION_CACHE_SIZE = 4096
+PREDICTION_CACHE_TTL = 3600.0
 
-def get_llm_summary(
-    risk_percentage: float,
-    prediction: int,
-    payload: dict,
-) -> str | None:
-    """
-    Call an LLM to generate a short, non-diagnostic summary of the risk result.
-    Returns None if no API key or on error.
-    """
-    if not OPENAI_API_KEY:
-        return None
-
-    try:
-        import openai
-        client = openai.OpenAI(
-            api_key=OPENAI_API_KEY,
-            base_url=OPENAI_BASE_URL or None,
-        )
-        risk_label = "elevated" if prediction == 1 else "lower"
-        prompt = (
-            "You are a health assistant. In one or two short, clear sentences, "
-            "summarize this heart risk result in a supportive, non-alarming way. "
-            "Do not diagnose or give medical advice. "
-            f"Risk score: {risk_percentage:.1f}% ({risk_label} risk). "
-            "Mention that the user should discuss with a doctor for any health decisions."
-        )
-        response = client.chat.completions.create(
-            model=os.environ.get("OPENAI_MODEL", "gpt-4o-mini"),
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=120,
-        )
-        text = response.choices[0].message.content
-        return text.strip() if text else None
-    except Exception as e:
-        logger.warning("LLM summary failed: %s", e)
-        return None
+_prediction_cache = LRUCache(PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL)
+_model_single = predict_model_seconds.labels("single")
+_model_batch = predict_model_seconds.labels("batch")
+
+
+def _score_result(probability: float) -> dict:
+    prediction = 1 if probability >= PREDICTION_THRESHOLD else 0
+    risk_percentage = probability * 100
+    return {
+        "prediction": prediction,
+        "probability": round(probability, 4),
+        "health_status": HEALTH_STATUSES[bisect_right(RISK_TIER_CUTOFFS, risk_percentage)],
+        "risk_percentage": round(risk_percentage, 2),
+    }
 
 
 def predict(payload: dict) -> dict:
     """
-    Run heart risk prediction (scikit-learn) and optional LLM summary.
-    Returns dict with prediction (0/1), probability, health_status, risk_percentage, llm_summary (if available).
+    Run heart risk prediction and start the optional LLM summary.
+    Results are cached by (model version, feature vector).
+    Returns dict with prediction (0/1), probability, health_status, risk_percentage,
+    plus summary_id/summary_status when an LLM is configured (and llm_summary
+    straight away if the summary was already cached).
     """
-    probability = model_predict_proba(payload)
-    threshold = 0.45
-    prediction = 1 if probability >= threshold else 0
-    risk_percentage = probability * 100
+    features = payload_to_features(payload)
+    artifact = get_artifact()
+    key = (artifact.version, tuple(features[0].tolist()))
 
-    if risk_percentage >= 60:
-        health_status = "High Risk"
-    elif risk_percentage >= 40:
-        health_status = "Moderate Risk"
-    else:
-        health_status = "Low Risk"
+    def score():
+        t0 = time.perf_counter()
+        probability = float(artifact.predict_proba_matrix(features)[0])
+        _model_single.observe(time.perf_counter() - t0)
+        return _score_result(probability)
 
-    llm_summary = get_llm_summary(risk_percentage, prediction, payload)
+    scored = _prediction_cache.get_or_compute(key, score)
+    out = dict(scored)
+
+    job = summary_service.submit(out, payload)
+    if job is not None:
+        out["summary_id"] = job.summary_id
+        out["summary_status"] = job.status
+        if job.summary:
+            out["llm_summary"] = job.summary
 
-    out = {
-        "prediction": prediction,
-        "probability": round(probability, 4),
-        "health_status": health_status,
-        "risk_percentage": round(risk_percentage, 2),
-    }
-    if llm_summary:
-        out["llm_summary"] = llm_summary
-    
     global LATEST_RESULT
     LATEST_RESULT = out
-    
     return out
+
+
+def cache_stats() -> dict:
+    return {"predictions": _prediction_cache.stats(), "summaries": summary_service.stats()["cache"]}
+
+
+def predict_batch(payloads: list) -> list:
+    """
+    Score many payloads in one vectorised pass. No LLM summary is generated
+    for batch results.
+    """
+    if len(payloads) > MAX_BATCH_SIZE:
+        raise ValueError(f"Batch too large (max {MAX_BATCH_SIZE} payloads)")
+    if not payloads:
+        return []
+    t0 = time.perf_counter()
+    probabilities = model_predict_proba_batch(payloads).tolist()
+    _model_batch.observe(time.perf_counter() - t0)
+    return [_score_result(p) for p in probabilities]
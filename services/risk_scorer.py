@@ -0,0 +1,267 @@
+"""
+Continuous heart-risk scoring of every monitored patient. The heart-risk model
+takes resting blood pressure ("bp"), which the vitals stream measures as
+systolic. Each patient keeps one row of a feature matrix: static profile
+features (age, cholesterol, history flags...) are set once, and the live
+columns are refreshed on every pass from aggregates that ingestion accumulates
+in place. A pass is one matrix-vector product over all patients. Patients
+whose risk tier changes are published on the event hub's "risk" topic.
+
+Scoring only runs on an artifact that weighs every live feature positively
+(check_live_features), so a rising vital can never lower a patient's risk.
+The model's "thalachh" is the peak heart rate of an exercise test, where a
+higher peak is protective; the resting heart rate is not fed into it.
+"""
+import logging
+import time
+from threading import Thread
+
+import numpy as np
+
+from services.event_hub import EventHub, event_hub
+from services.heart_risk_model import FEATURE_NAMES, get_artifact, payload_to_features
+from services.model_artifact import ModelArtifact, ModelArtifactError
+from services.metrics import TimedLock, risk_score_seconds, risk_tier_changes
+from services.predict_service import HEALTH_STATUSES, RISK_TIER_CUTOFFS
+from services.vitals_store import VITAL_FIELDS
+
+logger = logging.getLogger(__name__)
+
+RISK_SCORE_INTERVAL = 10.0  # seconds between passes; live features aggregate the readings in between
+RISK_INITIAL_SLOTS = 1024
+RISK_TOP_DEFAULT = 20
+# (model feature, vital, aggregate over the readings since the previous pass); each must raise risk
+# as the vital rises
+LIVE_FEATURES = (
+    ("bp", "systolic", "mean"),
+)
+
+_CUTOFFS = np.array(RISK_TIER_CUTOFFS)
+_DEFAULT_ROW = payload_to_features({})[0]
+_UNSCORED = -1
+
+
+def check_live_features(artifact: ModelArtifact, live_features=LIVE_FEATURES) -> None:
+    """Refuse an artifact on which a higher live vital would lower the score (weight <= 0)."""
+    bad = [
+        f"{feature} ({vital})" for feature, vital, _ in live_features
+        if artifact.weights[artifact.feature_names.index(feature)] <= 0
+    ]
+    if bad:
+        raise ModelArtifactError(
+            f"Model {artifact.version} does not raise risk with {', '.join(bad)}; continuous scoring disabled"
+        )
+
+
+class RiskScorer:
+    """
+    Per-patient slots over arrays: features[slot] (the model's input row),
+    live-feature accumulators since the last pass, and the last probability
+    and tier. observe() only scatters readings into the accumulators;
+    score() folds them into the feature matrix and scores every patient that
+    has reported vitals.
+    """
+
+    def __init__(self, hub: EventHub | None = None):
+        self._hub = hub
+        self._columns = tuple(FEATURE_NAMES.index(feature) for feature, _, _ in LIVE_FEATURES)
+        self._vitals = tuple(VITAL_FIELDS.index(vital) for _, vital, _ in LIVE_FEATURES)
+        self._is_max = np.array([agg == "max" for _, _, agg in LIVE_FEATURES])
+        self._acc_init = np.where(self._is_max, -np.inf, 0.0)
+        self._slots: dict = {}
+        self._ids: list = []
+        self._features = np.tile(_DEFAULT_ROW, (RISK_INITIAL_SLOTS, 1))
+        self._acc = np.tile(self._acc_init, (RISK_INITIAL_SLOTS, 1))
+        self._counts = np.zeros((RISK_INITIAL_SLOTS, len(LIVE_FEATURES)), dtype=np.int64)
+        self._live = np.zeros(RISK_INITIAL_SLOTS, dtype=bool)  # has reported the live vitals at least once
+        self._probability = np.full(RISK_INITIAL_SLOTS, np.nan)
+        self._tier = np.full(RISK_INITIAL_SLOTS, _UNSCORED, dtype=np.int8)
+        self._scored_at = 0
+        self._stats = {"passes": 0, "tier_changes": 0, "score_ms_last": 0.0}
+        self._validated: ModelArtifact | None = None  # last artifact that passed check_live_features
+        self._lock = TimedLock("risk_scorer")
+        self._running = False
+        self._thread: Thread | None = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _grow(self) -> None:
+        n = len(self._features)
+        self._features = np.concatenate([self._features, np.tile(_DEFAULT_ROW, (n, 1))])
+        self._acc = np.concatenate([self._acc, np.tile(self._acc_init, (n, 1))])
+        self._counts = np.concatenate([self._counts, np.zeros_like(self._counts)])
+        self._live = np.concatenate([self._live, np.zeros_like(self._live)])
+        self._probability = np.concatenate([self._probability, np.full(n, np.nan)])
+        self._tier = np.concatenate([self._tier, np.full(n, _UNSCORED, dtype=np.int8)])
+
+    def _slot(self, patient_id) -> int:
+        slot = self._slots.get(patient_id)
+        if slot is None:
+            slot = self._slots[patient_id] = len(self._ids)
+            self._ids.append(patient_id)
+            if slot == len(self._features):
+                self._grow()
+        return slot
+
+    def set_profile(self, patient_id: str, payload: dict) -> None:
+        """Static features from a /predict-style payload; the live features keep their current values."""
+        row = payload_to_features(payload)[0]
+        with self._lock:
+            slot = self._slot(patient_id)
+            live = self._features[slot, list(self._columns)]
+            self._features[slot] = row
+            if self._live[slot]:
+                self._features[slot, list(self._columns)] = live
+
+    def observe(self, patient_ids, values: np.ndarray) -> None:
+        """Accumulate a block of readings: values[vital, row] in VITAL_FIELDS order (NaN = missing)."""
+        n = len(patient_ids)
+        if not n:
+            return
+        with self._lock:
+            slots = np.fromiter((self._slot(p) for p in patient_ids), dtype=np.intp, count=n)
+            for j, vital in enumerate(self._vitals):
+                v = values[vital]
+                present = ~np.isnan(v)
+                s, v = (slots, v) if present.all() else (slots[present], v[present])
+                if self._is_max[j]:
+                    np.maximum.at(self._acc[:, j], s, v)
+                else:
+                    np.add.at(self._acc[:, j], s, v)
+                np.add.at(self._counts[:, j], s, 1)
+
+    def observe_reading(self, reading: dict) -> None:
+        """observe() for one reading dict (the mock-stream path)."""
+        with self._lock:
+            slot = self._slot(reading.get("patientId"))
+            for j, (_, vital, agg) in enumerate(LIVE_FEATURES):
+                v = reading.get(vital)
+                if v is None or v != v:
+                    continue
+                self._acc[slot, j] = max(self._acc[slot, j], v) if agg == "max" else self._acc[slot, j] + v
+                self._counts[slot, j] += 1
+
+    def score(self) -> dict:
+        """
+        One pass: fold the accumulated aggregates into the feature matrix, score
+        every patient with live vitals in one product, publish tier changes.
+        Raises ModelArtifactError when the loaded model fails check_live_features.
+        """
+        t0 = time.perf_counter()
+        artifact = get_artifact()
+        if artifact is not self._validated:
+            check_live_features(artifact)
+            self._validated = artifact
+        now_ms = int(time.time() * 1000)
+        with self._lock:
+            n = len(self._ids)
+            features = self._features[:n]
+            counts = self._counts[:n]
+            acc = self._acc[:n]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                for j, column in enumerate(self._columns):
+                    fresh = counts[:, j] > 0
+                    value = acc[:, j] if self._is_max[j] else acc[:, j] / counts[:, j]
+                    features[:, column] = np.where(fresh, value, features[:, column])
+            live = self._live[:n]
+            live |= (counts > 0).all(axis=1)
+            acc[:] = self._acc_init
+            counts[:] = 0
+            probability = artifact.predict_proba_matrix(features)
+            tier = np.searchsorted(_CUTOFFS, probability * 100, side="right").astype(np.int8)
+            tier[~live] = _UNSCORED
+            probability[~live] = np.nan
+            changed = np.flatnonzero(tier != self._tier[:n])
+            previous = self._tier[changed]
+            self._tier[:n] = tier
+            self._probability[:n] = probability
+            self._scored_at = now_ms
+            publish = self._hub is not None and self._hub.has_subscribers("risk")
+            ids = [self._ids[i] for i in changed.tolist()] if publish else None
+        for t, count in enumerate(np.bincount(tier[changed], minlength=len(HEALTH_STATUSES)).tolist()):
+            if count:
+                risk_tier_changes.labels(HEALTH_STATUSES[t]).inc(count)
+        if ids:
+            for patient_id, t, prev, p in zip(ids, tier[changed].tolist(), previous.tolist(),
+                                              probability[changed].tolist()):
+                self._hub.publish("risk", {
+                    "patientId": patient_id,
+                    "tier": HEALTH_STATUSES[t],
+                    "previous": HEALTH_STATUSES[prev] if prev != _UNSCORED else None,
+                    "probability": round(p, 4),
+                    "risk_percentage": round(p * 100, 2),
+                    "timestamp": now_ms,
+                }, patient_id=patient_id)
+        elapsed = time.perf_counter() - t0
+        risk_score_seconds.observe(elapsed)
+        self._stats["passes"] += 1
+        self._stats["tier_changes"] += len(changed)
+        self._stats["score_ms_last"] = round(elapsed * 1000, 3)
+        return {"patients": int(live.sum()), "tier_changes": len(changed), "score_ms": elapsed * 1000}
+
+    def get(self, patient_id: str) -> dict | None:
+        """Latest score and model inputs for one patient, or None before its first scored pass."""
+        slot = self._slots.get(patient_id)
+        if slot is None or self._tier[slot] == _UNSCORED:
+            return None
+        p = float(self._probability[slot])
+        return {
+            "patientId": patient_id,
+            "tier": HEALTH_STATUSES[self._tier[slot]],
+            "probability": round(p, 4),
+            "risk_percentage": round(p * 100, 2),
+            "features": dict(zip(FEATURE_NAMES, self._features[slot].tolist())),
+            "scoredAt": self._scored_at,
+        }
+
+    def top(self, limit: int = RISK_TOP_DEFAULT) -> list:
+        """Highest-risk patients from the last pass, highest first."""
+        n = len(self._ids)
+        probability = self._probability[:n]
+        scored = np.flatnonzero(~np.isnan(probability))
+        if len(scored) > limit:
+            scored = scored[np.argpartition(-probability[scored], limit - 1)[:limit]]
+        order = scored[np.argsort(-probability[scored], kind="stable")]
+        return [
+            {"patientId": self._ids[i], "tier": HEALTH_STATUSES[self._tier[i]], "probability": round(float(p), 4)}
+            for i, p in zip(order.tolist(), probability[order].tolist())
+        ]
+
+    def tier_counts(self) -> dict:
+        tier = self._tier[:len(self._ids)]
+        counts = np.bincount(tier[tier != _UNSCORED], minlength=len(HEALTH_STATUSES)).tolist()
+        return dict(zip(HEALTH_STATUSES, counts))
+
+    def start(self, interval: float = RISK_SCORE_INTERVAL) -> bool:
+        """Start periodic passes; False (and nothing started) when the model fails check_live_features."""
+        if self._running:
+            return True
+        try:
+            check_live_features(get_artifact())
+        except ModelArtifactError as e:
+            logger.error("%s", e)
+            return False
+        self._running = True
+
+        def loop():
+            while self._running:
+                time.sleep(interval)
+                try:
+                    self.score()
+                except Exception:
+                    logger.exception("Risk scoring pass failed")
+
+        self._thread = Thread(target=loop, name="risk-scorer", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._running = False
+        self._thread = None
+
+    def stats(self) -> dict:
+        return dict(self._stats, patients=len(self), scored_at=self._scored_at, tiers=self.tier_counts())
+
+
+risk_scorer = RiskScorer(hub=event_hub)
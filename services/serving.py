@@ -0,0 +1,179 @@
+"""
+Process roles and deterministic startup.
+
+standalone  one process does everything (python app.py, development)
+ingest      owns all state: mock stream, ingest pipeline, alert engine, dispatcher,
+            durable log; writes vitals rings and recent alerts into shared memory
+            and serves the full API on an internal port
+api         stateless worker (gunicorn): latest/history/alerts straight from shared
+            memory, prediction/histogram/diet locally, everything else proxied to
+            the ingestion process
+
+Background services start from an explicit call (start_services), never from
+the first request. IngestProcess is the supervisor side used by gunicorn.conf.py:
+it creates the shared segment, starts the ingestion process and waits until it
+is serving before any API worker is forked. The ingestion process itself is
+
+    SERVE_ROLE=ingest SHARED_STATE_NAME=... python -m services.serving
+"""
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from threading import Lock, Thread
+
+from services.alert_engine import alert_engine
+from services.emergency_dispatch import emergency_dispatcher
+from services.fleet_simulator import FleetSimulator
+from services.ingest import ingest_pipeline
+from services.mock_stream import mock_stream_service
+from services.risk_scorer import risk_scorer
+from services.shared_state import DEFAULT_MAX_PATIENTS, SharedState
+from services.vitals_log import get_vitals_log
+from services.vitals_store import DEFAULT_CAPACITY
+
+logger = logging.getLogger(__name__)
+
+SERVE_ROLES = ("standalone", "ingest", "api")
+DEFAULT_INGEST_HOST = "127.0.0.1"
+DEFAULT_INGEST_PORT = 4001
+STARTUP_TIMEOUT = 60.0  # model load + warm start from the durable log
+SHUTDOWN_TIMEOUT = 10.0
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_services_lock = Lock()
+_fleet: FleetSimulator | None = None
+
+
+def _on_reading(reading):
+    ingest_pipeline.record(reading)
+
+
+def _on_critical(alert):
+    emergency_dispatcher.submit(alert, source="critical_alert")
+
+
+def start_services(app) -> None:
+    """
+    Start the dispatcher, alert compaction, risk scoring, mock stream and
+    optional fleet simulator; idempotent.
+    """
+    global _fleet
+    with _services_lock:
+        if mock_stream_service.running:
+            return
+        emergency_dispatcher.start()
+        alert_engine.store.start()
+        alert_engine.set_on_critical(_on_critical)
+        if app.config.get("RISK_SCORE_INTERVAL"):
+            risk_scorer.start(app.config["RISK_SCORE_INTERVAL"])
+        mock_stream_service.start(on_reading=_on_reading)
+        logger.info("Mock IoT vitals stream started.")
+        if app.config.get("FLEET_SIM_PATIENTS"):
+            _fleet = FleetSimulator(
+                app.config["FLEET_SIM_PATIENTS"], rate_hz=app.config["FLEET_SIM_RATE_HZ"], seed=app.config["FLEET_SIM_SEED"]
+            )
+            _fleet.start(ingest_pipeline)
+            logger.info("Fleet simulator started: %d patients at %.2f Hz.", _fleet.n_patients, _fleet.rate_hz)
+
+
+def stop_services() -> None:
+    """Stop producers first, then drain the dispatcher and flush the durable log."""
+    global _fleet
+    with _services_lock:
+        if _fleet is not None:
+            _fleet.stop()
+            _fleet = None
+        mock_stream_service.stop()
+        alert_engine.store.stop()
+        risk_scorer.stop()
+        emergency_dispatcher.stop()
+        log = get_vitals_log()
+        if log is not None and log.running:
+            log.stop()
+
+
+def ingest_main(app) -> None:
+    """Run the ingestion process: start services, serve the full API internally, stop on SIGTERM."""
+    from werkzeug.serving import make_server
+
+    host, port = app.config["INGEST_HOST"], app.config["INGEST_PORT"]
+    server = make_server(host, port, app, threaded=True)
+    signal.signal(signal.SIGTERM, lambda *_: Thread(target=server.shutdown, daemon=True).start())
+    start_services(app)
+    app.extensions["shared_state"].mark_ready()
+    logger.info("Ingestion process %d serving on %s:%d.", os.getpid(), host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_services()
+        logger.info("Ingestion process %d stopped.", os.getpid())
+
+
+class IngestProcess:
+    """Supervisor handle: shared segment + the single ingestion process writing it."""
+
+    def __init__(
+        self,
+        name: str | None = None,
+        host: str = DEFAULT_INGEST_HOST,
+        port: int = DEFAULT_INGEST_PORT,
+        max_patients: int = DEFAULT_MAX_PATIENTS,
+        capacity: int = DEFAULT_CAPACITY,
+    ):
+        self._name = name
+        self.host = host
+        self.port = port
+        self.max_patients = max_patients
+        self.capacity = capacity
+        self.shared: SharedState | None = None
+        self._process: subprocess.Popen | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self, timeout: float = STARTUP_TIMEOUT) -> None:
+        """Create the segment, spawn the ingestion process and block until it is serving."""
+        self.shared = SharedState.create(self._name, self.max_patients, self.capacity)
+        env = dict(os.environ, SERVE_ROLE="ingest", SHARED_STATE_NAME=self.shared.name,
+                   INGEST_HOST=self.host, INGEST_PORT=str(self.port))
+        self._process = subprocess.Popen([sys.executable, "-m", "services.serving"], env=env, cwd=_PROJECT_ROOT)
+        deadline = time.monotonic() + timeout
+        while not self.shared.ready:
+            code = self._process.poll()
+            if code is not None:
+                self.stop()
+                raise RuntimeError(f"ingestion process exited during startup (code {code})")
+            if time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError(f"ingestion process not ready after {timeout:.0f}s")
+            time.sleep(0.05)
+        logger.info("Ingestion process %d ready; shared state %s.", self._process.pid, self.shared.name)
+
+    def stop(self, timeout: float = SHUTDOWN_TIMEOUT) -> None:
+        """SIGTERM the ingestion process (it flushes the log), then remove the segment."""
+        if self._process is not None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+            self._process = None
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+
+if __name__ == "__main__":
+    os.environ["SERVE_ROLE"] = "ingest"  # before config is imported
+    if not os.environ.get("SHARED_STATE_NAME"):
+        sys.exit("SHARED_STATE_NAME must name a segment created by IngestProcess")
+    from app import app as ingest_app
+
+    ingest_main(ingest_app)
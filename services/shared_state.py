@@ -0,0 +1,302 @@
+"""
+Shared-memory state for multi-process serving. The ingestion process owns the
+segment and writes vitals rings and the recent-alerts snapshot into it; API
+worker processes attach read-only and serve latest/history/alerts without
+talking to the ingestion process at all.
+
+Layout (one SharedMemory segment, regions 64-byte aligned):
+    header      int64[8]        magic, version, max_patients, capacity, n_patients, alert bytes, ready, owner pid
+    ids         S512[P]         patient id per slot (utf-8), published before n_patients is bumped
+    state       int64[P, 4]     head, count, seq per ring (same seqlock protocol as PatientRing)
+    timestamps  int64[P, 2C]    mirrored ring columns, as in PatientRing
+    values      float32[P, V, 2C]
+    alerts      int64[2] + bytes  seq, length, JSON of the alert engine's current snapshot
+"""
+import json
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+from threading import Lock
+
+import numpy as np
+
+from services.vitals_store import DEFAULT_CAPACITY, SEQLOCK_BACKOFF, VITAL_FIELDS, PatientRing, VitalsStore
+
+MAGIC = 0x52504D5348  # "RPMSH"
+VERSION = 1
+DEFAULT_MAX_PATIENTS = 10000
+ID_BYTES = 512  # MAX_PATIENT_ID_LENGTH characters of utf-8
+ALERT_BYTES = 256 * 1024
+_ALIGN = 64
+_HEADER_FIELDS = 8
+_MAX_PATIENTS, _CAPACITY, _N_PATIENTS, _ALERT_BYTES, _READY, _OWNER = 2, 3, 4, 5, 6, 7
+
+
+class SharedStateFull(RuntimeError):
+    """No free patient slot left in the shared segment."""
+
+
+class _Segment(shared_memory.SharedMemory):
+    """
+    SharedMemory whose lifetime is the owner's business alone. Every attach
+    registers with a resource tracker that unlinks the segment when that
+    process exits, so registrations are dropped here and the owner's unlink
+    re-registers; NumPy views keep the mapping until exit, so __del__ is a no-op.
+    """
+
+    def __init__(self, name: str | None = None, create: bool = False, size: int = 0):
+        super().__init__(name, create, size)
+        resource_tracker.unregister(self._name, "shared_memory")
+
+    def __del__(self):
+        pass
+
+    def unlink(self):
+        resource_tracker.register(self._name, "shared_memory")
+        super().unlink()
+
+
+def _layout(max_patients: int, capacity: int, alert_bytes: int) -> tuple[dict, int]:
+    """Byte offset of each region and the total segment size."""
+    regions = (
+        ("header", 8 * _HEADER_FIELDS),
+        ("ids", ID_BYTES * max_patients),
+        ("state", 8 * 4 * max_patients),
+        ("timestamps", 8 * 2 * capacity * max_patients),
+        ("values", 4 * len(VITAL_FIELDS) * 2 * capacity * max_patients),
+        ("alerts", 16 + alert_bytes),
+    )
+    offsets, pos = {}, 0
+    for name, size in regions:
+        offsets[name] = pos
+        pos += -(-size // _ALIGN) * _ALIGN
+    return offsets, pos
+
+
+def _state_field(index: int):
+    def get(ring):
+        return ring._state[index]
+
+    def set_(ring, value):
+        ring._state[index] = value
+
+    return property(get, set_)
+
+
+class SharedRing(PatientRing):
+    """
+    PatientRing over one slot of the shared segment. head/count/seq live in
+    shared memory so another process can run the same seqlock snapshot; the
+    newest reading is read back from the columns instead of a Python tuple.
+    """
+
+    __slots__ = ("_state",)
+
+    _head = _state_field(0)
+    _count = _state_field(1)
+    _seq = _state_field(2)
+
+    def __init__(self, capacity: int, timestamps: np.ndarray, values: np.ndarray, state: memoryview):
+        self.capacity = capacity
+        self.timestamps = timestamps
+        self.values = values
+        self._state = state
+
+    @property
+    def latest(self) -> tuple | None:
+        ts, values = self.snapshot(1)
+        if not len(ts):
+            return None
+        return int(ts[0]), tuple(values[:, 0].tolist())
+
+    @latest.setter
+    def latest(self, value) -> None:
+        pass  # derived from the shared columns; nothing to publish
+
+
+class SharedVitalsView(VitalsStore):
+    """Read-only VitalsStore over an attached segment; new patients are picked up on lookup."""
+
+    def __init__(self, shared: "SharedState"):
+        super().__init__(shared.capacity, shards=1)
+        self._shared = shared
+        self._known = 0
+        self._refresh_lock = Lock()
+
+    def _refresh(self) -> None:
+        n = self._shared.n_patients
+        if n == self._known:
+            return
+        with self._refresh_lock:
+            for slot in range(self._known, n):
+                pid = self._shared.patient_id(slot)
+                self._patients[pid] = self._shared.ring(slot)
+            self._known = max(self._known, n)
+
+    def _lookup(self, patient_id: str) -> PatientRing | None:
+        ring = self._patients.get(patient_id)
+        if ring is None:
+            self._refresh()
+            ring = self._patients.get(patient_id)
+        return ring
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._patients)
+
+    def __contains__(self, patient_id: str) -> bool:
+        return self._lookup(patient_id) is not None
+
+    def patient_ids(self) -> list:
+        self._refresh()
+        return list(self._patients)
+
+    def append(self, patient_id: str, reading: dict) -> None:
+        raise RuntimeError("shared vitals are written by the ingestion process only")
+
+    def extend(self, patient_id: str, timestamps: np.ndarray, values: np.ndarray) -> None:
+        raise RuntimeError("shared vitals are written by the ingestion process only")
+
+
+class SharedState:
+    """
+    One shared-memory segment. create() in the serving supervisor, attach()
+    in the ingestion process (the only writer: allocate, publish_alerts,
+    mark_ready) and in each API worker (store, recent_alerts).
+    """
+
+    def __init__(self, shm: _Segment, owner: bool = False):
+        self._shm = shm
+        self._owner = owner
+        buf = shm.buf
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=buf)
+        if header[0] != MAGIC or header[1] != VERSION:
+            raise ValueError(f"shared memory segment {shm.name!r} is not an RPM state segment")
+        self._header = header
+        self.max_patients = int(header[_MAX_PATIENTS])
+        self.capacity = int(header[_CAPACITY])
+        alert_bytes = int(header[_ALERT_BYTES])
+        offsets, _ = _layout(self.max_patients, self.capacity, alert_bytes)
+        p, c = self.max_patients, self.capacity
+        self._ids = np.ndarray((p,), dtype=f"S{ID_BYTES}", buffer=buf, offset=offsets["ids"])
+        self._state = buf[offsets["state"]:offsets["state"] + 32 * p].cast("q")
+        self._timestamps = np.ndarray((p, 2 * c), dtype=np.int64, buffer=buf, offset=offsets["timestamps"])
+        self._values = np.ndarray((p, len(VITAL_FIELDS), 2 * c), dtype=np.float32, buffer=buf,
+                                  offset=offsets["values"])
+        self._alert_seq = buf[offsets["alerts"]:offsets["alerts"] + 16].cast("q")
+        self._alert_data = buf[offsets["alerts"] + 16:offsets["alerts"] + 16 + alert_bytes]
+        self._alloc_lock = Lock()
+        self._alerts_cache: tuple[int, list] = (-1, [])
+        self._view: SharedVitalsView | None = None
+
+    @classmethod
+    def create(cls, name: str | None = None, max_patients: int = DEFAULT_MAX_PATIENTS,
+               capacity: int = DEFAULT_CAPACITY, alert_bytes: int = ALERT_BYTES) -> "SharedState":
+        _, size = _layout(max_patients, capacity, alert_bytes)
+        shm = _Segment(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = (MAGIC, VERSION, max_patients, capacity, 0, alert_bytes, 0, 0)
+        del header  # drop the export so close() can release the buffer
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedState":
+        return cls(_Segment(name=name))
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def n_patients(self) -> int:
+        return int(self._header[_N_PATIENTS])
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._header[_READY])
+
+    @property
+    def owner_pid(self) -> int:
+        return int(self._header[_OWNER])
+
+    def mark_ready(self) -> None:
+        """Called by the ingestion process once it is serving; the supervisor waits for this."""
+        self._header[_OWNER] = os.getpid()
+        self._header[_READY] = 1
+
+    def patient_id(self, slot: int) -> str:
+        return self._ids[slot].decode()
+
+    def ring(self, slot: int) -> SharedRing:
+        return SharedRing(self.capacity, self._timestamps[slot], self._values[slot],
+                          self._state[4 * slot:4 * slot + 4])
+
+    # -- writer (ingestion process) --
+
+    def allocate(self, patient_id: str, capacity: int) -> SharedRing:
+        """VitalsStore.bind allocator: claim the next slot for a new patient."""
+        if capacity != self.capacity:
+            raise ValueError(f"store capacity {capacity} != shared capacity {self.capacity}")
+        with self._alloc_lock:
+            slot = self.n_patients
+            if slot >= self.max_patients:
+                raise SharedStateFull(f"shared vitals segment is full ({self.max_patients} patients)")
+            self._ids[slot] = patient_id.encode()
+            ring = self.ring(slot)
+            ring._head = ring._count = ring._seq = 0
+            self._values[slot] = np.nan
+            self._header[_N_PATIENTS] = slot + 1  # publish only after the slot is initialised
+        return ring
+
+    def publish_alerts(self, alerts: tuple) -> None:
+        """AlertEngine mirror: copy the current recent-alerts snapshot into the segment."""
+        data = json.dumps(list(alerts), separators=(",", ":")).encode()
+        while len(data) > len(self._alert_data) and alerts:
+            alerts = alerts[len(alerts) // 2 + 1:]  # keep the newest half until it fits
+            data = json.dumps(list(alerts), separators=(",", ":")).encode()
+        self._alert_seq[0] += 1
+        self._alert_data[:len(data)] = data
+        self._alert_seq[1] = len(data)
+        self._alert_seq[0] += 1
+
+    # -- readers (API workers) --
+
+    def store(self) -> SharedVitalsView:
+        if self._view is None:
+            self._view = SharedVitalsView(self)
+        return self._view
+
+    def _alerts(self) -> list:
+        while True:
+            seq = self._alert_seq[0]
+            if seq & 1:
+                time.sleep(SEQLOCK_BACKOFF)
+                continue
+            cached_seq, cached = self._alerts_cache
+            if seq == cached_seq:
+                return cached
+            length = self._alert_seq[1]
+            data = bytes(self._alert_data[:length])
+            if self._alert_seq[0] == seq:
+                alerts = json.loads(data) if data else []
+                self._alerts_cache = (seq, alerts)
+                return alerts
+
+    def recent_alerts(self, limit: int = 20, patient_id: str | None = None) -> list:
+        """Same result as AlertEngine.get_recent in the ingestion process."""
+        alerts = self._alerts()
+        if patient_id is not None:
+            alerts = [a for a in alerts if a.get("patientId") == patient_id]
+        return list(alerts[-limit:])
+
+    def close(self) -> None:
+        self._view = None
+        self._ids = self._timestamps = self._values = self._header = None
+        for view in (self._state, self._alert_seq, self._alert_data):
+            view.release()
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # a caller still holds a ring view; the mapping goes away with the process
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,264 @@
+"""
+Per-patient and per-cohort alert threshold profiles.
+Profiles are compiled into an immutable, versioned RuleTable; readers grab the
+current table with a plain attribute read and updates swap in a new table.
+"""
+from threading import Lock
+from types import MappingProxyType
+
+import numpy as np
+
+DEFAULT_THRESHOLDS = {
+    "heartRateHigh": 120,
+    "heartRateLow": 50,
+    "systolicHigh": 180,
+    "diastolicHigh": 120,
+    "diastolicLow": 60,
+    "spo2Low": 92,
+}
+THRESHOLD_KEYS = tuple(DEFAULT_THRESHOLDS)
+
+
+class RuleTable:
+    """
+    Immutable snapshot of every threshold profile. Each distinct resolved
+    profile is stored once, as a read-only mapping and as a row of `matrix`
+    (columns in THRESHOLD_KEYS order); patients and cohorts map to row indices.
+    Row 0 is always the global defaults. Patient rows are a frozen `patients`
+    dict plus a small `delta` of later changes that shadows it, so publishing
+    one patient's update does not copy every other patient's entry. `rows`
+    may be an append-only list shared with later tables; this one only ever
+    indexes its first len(matrix) entries.
+    """
+
+    __slots__ = ("version", "matrix", "_rows", "_patients", "_delta", "_n_patients", "_cohorts")
+
+    def __init__(self, version: int, rows: list, matrix: np.ndarray, patients: dict, delta: dict,
+                 n_patients: int, cohorts: dict):
+        self.version = version
+        self._rows = rows
+        self.matrix = matrix
+        self.matrix.flags.writeable = False
+        self._patients = patients
+        self._delta = delta
+        self._n_patients = n_patients
+        self._cohorts = cohorts
+
+    @property
+    def defaults(self):
+        return self._rows[0]
+
+    def __len__(self) -> int:
+        return self._n_patients
+
+    def _row_of(self, patient_id) -> int:
+        idx = self._delta.get(patient_id)
+        return self._patients.get(patient_id, 0) if idx is None else idx
+
+    def for_patient(self, patient_id: str | None):
+        """O(1) lookup of the resolved thresholds for one patient."""
+        if not self._delta:
+            return self._rows[self._patients.get(patient_id, 0)]
+        return self._rows[self._row_of(patient_id)]
+
+    def for_cohort(self, cohort: str):
+        return self._rows[self._cohorts.get(cohort, 0)]
+
+    def batch_thresholds(self, patient_ids=None) -> dict:
+        """
+        Thresholds for a block of readings: key -> per-row array, or the
+        default scalars when the block carries no patient ids.
+        """
+        if patient_ids is None:
+            return dict(self.defaults)
+        if self._delta:
+            get = self._row_of
+            rows = np.fromiter((get(p) for p in patient_ids), dtype=np.intp, count=len(patient_ids))
+        else:
+            get = self._patients.get
+            rows = np.fromiter((get(p, 0) for p in patient_ids), dtype=np.intp, count=len(patient_ids))
+        block = self.matrix[rows]
+        return {key: block[:, j] for j, key in enumerate(THRESHOLD_KEYS)}
+
+
+def _apply(base: tuple, overrides: dict | None) -> tuple:
+    if not overrides:
+        return base
+    return tuple(overrides.get(k, v) for k, v in zip(THRESHOLD_KEYS, base))
+
+
+class ThresholdProfiles:
+    """
+    Mutable source of truth (defaults, cohort profiles, patient -> cohort,
+    patient overrides). Every change re-resolves only the patients and
+    cohorts it touches and atomically publishes a new RuleTable; readers
+    never take the write lock. Rows are interned append-only, so tables
+    already published stay valid; once unreferenced rows outnumber live
+    ones (and MIN_DEAD_ROWS) the whole table is recompiled to drop them.
+    Changing the defaults always recompiles everything.
+    """
+
+    MIN_DEAD_ROWS = 1024
+    MAX_PATIENT_DELTA = 4096
+
+    def __init__(self, defaults: dict | None = None):
+        self._defaults = dict(DEFAULT_THRESHOLDS)
+        self._defaults.update(defaults or {})
+        self._cohorts: dict[str, dict] = {}
+        self._patient_cohort: dict[str, str] = {}
+        self._cohort_patients: dict[str, dict] = {}  # cohort -> {patient_id: None}, insertion ordered
+        self._patient_overrides: dict[str, dict] = {}
+        self._write_lock = Lock()
+        self._version = 0
+        self._compile()
+        self._publish()
+
+    @property
+    def table(self) -> RuleTable:
+        return self._table
+
+    def _compile(self):
+        """Re-intern every profile from scratch into fresh row buffers."""
+        self._rows: list = []
+        self._resolved: list[tuple] = []
+        self._row_of: dict[tuple, int] = {}
+        self._refs: list[int] = []
+        self._live = 0
+        self._matrix = np.empty((64, len(THRESHOLD_KEYS)), dtype=np.float64)
+        self._cohort_rows: dict[str, int] = {}
+        self._patient_rows: dict[str, int] = {}
+        self._patient_base: dict[str, int] | None = None  # patient rows as of the last full copy
+        self._patient_delta: dict[str, int] = {}  # patients re-resolved since then (0 when dropped)
+        self._intern(tuple(self._defaults[k] for k in THRESHOLD_KEYS))  # row 0, never released
+        for name in self._cohorts:
+            self._resolve_cohort(name)
+        for pid in self._patient_cohort.keys() | self._patient_overrides.keys():
+            self._resolve_patient(pid)
+
+    def _intern(self, resolved: tuple) -> int:
+        idx = self._row_of.get(resolved)
+        if idx is None:
+            idx = self._row_of[resolved] = len(self._rows)
+            if idx == len(self._matrix):
+                grown = np.empty((2 * idx, len(THRESHOLD_KEYS)), dtype=np.float64)
+                grown[:idx] = self._matrix[:idx]
+                self._matrix = grown
+            self._matrix[idx] = resolved
+            self._rows.append(MappingProxyType(dict(zip(THRESHOLD_KEYS, resolved))))
+            self._resolved.append(resolved)
+            self._refs.append(0)
+        if not self._refs[idx]:
+            self._live += 1
+        self._refs[idx] += 1
+        return idx
+
+    def _release(self, idx: int | None):
+        if idx is not None:
+            self._refs[idx] -= 1
+            if not self._refs[idx]:
+                self._live -= 1
+
+    def _resolve_cohort(self, cohort: str):
+        old = self._cohort_rows.pop(cohort, None)
+        if cohort in self._cohorts:
+            self._cohort_rows[cohort] = self._intern(_apply(self._resolved[0], self._cohorts[cohort]))
+        self._release(old)
+
+    def _resolve_patient(self, pid: str):
+        old = self._patient_rows.get(pid)
+        if pid in self._patient_cohort or pid in self._patient_overrides:
+            base = self._resolved[self._cohort_rows.get(self._patient_cohort.get(pid), 0)]
+            idx = self._patient_rows[pid] = self._intern(_apply(base, self._patient_overrides.get(pid)))
+        else:
+            idx = 0
+            self._patient_rows.pop(pid, None)
+        self._release(old)
+        if self._patient_base is not None:
+            if len(self._patient_delta) < self.MAX_PATIENT_DELTA:
+                self._patient_delta[pid] = idx
+            else:
+                self._patient_base = None  # too many changes: publish a fresh full copy
+
+    def _publish(self):
+        if len(self._rows) - self._live > max(self.MIN_DEAD_ROWS, self._live):
+            self._compile()
+        if self._patient_base is None:
+            self._patient_base, self._patient_delta = dict(self._patient_rows), {}
+        self._version += 1
+        self._table = RuleTable(
+            self._version, self._rows, self._matrix[:len(self._rows)],
+            self._patient_base, dict(self._patient_delta), len(self._patient_rows), dict(self._cohort_rows),
+        )
+
+    def set_defaults(self, updates: dict):
+        with self._write_lock:
+            self._defaults.update(updates)
+            self._compile()
+            self._publish()
+
+    def set_cohort(self, cohort: str, updates: dict):
+        with self._write_lock:
+            self._cohorts.setdefault(cohort, {}).update(updates)
+            self._resolve_cohort_and_members(cohort)
+            self._publish()
+
+    def delete_cohort(self, cohort: str):
+        with self._write_lock:
+            if self._cohorts.pop(cohort, None) is not None:
+                self._resolve_cohort_and_members(cohort)
+            self._publish()
+
+    def _resolve_cohort_and_members(self, cohort: str):
+        self._resolve_cohort(cohort)
+        for pid in self._cohort_patients.get(cohort, ()):
+            self._resolve_patient(pid)
+
+    def assign_cohort(self, patient_ids, cohort: str | None):
+        """Put patients in a cohort (None removes the assignment)."""
+        with self._write_lock:
+            for pid in patient_ids:
+                old = self._patient_cohort.pop(pid, None)
+                if old is not None:
+                    members = self._cohort_patients[old]
+                    del members[pid]
+                    if not members:
+                        del self._cohort_patients[old]
+                if cohort is not None:
+                    self._patient_cohort[pid] = cohort
+                    self._cohort_patients.setdefault(cohort, {})[pid] = None
+                self._resolve_patient(pid)
+            self._publish()
+
+    def set_patients(self, overrides: dict):
+        """Bulk update: {patient_id: {key: value}}; one publish for the whole batch."""
+        with self._write_lock:
+            for pid, updates in overrides.items():
+                self._patient_overrides.setdefault(pid, {}).update(updates)
+                self._resolve_patient(pid)
+            self._publish()
+
+    def set_patient(self, patient_id: str, updates: dict):
+        self.set_patients({patient_id: updates})
+
+    def clear_patient(self, patient_id: str):
+        with self._write_lock:
+            if self._patient_overrides.pop(patient_id, None) is not None:
+                self._resolve_patient(patient_id)
+            self._publish()
+
+    def cohort_of(self, patient_id: str) -> str | None:
+        return self._patient_cohort.get(patient_id)
+
+    def cohort_members(self, cohort: str) -> list:
+        with self._write_lock:
+            return list(self._cohort_patients.get(cohort, ()))
+
+    def describe(self) -> dict:
+        with self._write_lock:
+            return {
+                "version": self._table.version,
+                "defaults": dict(self._defaults),
+                "cohorts": {name: dict(o) for name, o in self._cohorts.items()},
+                "patientOverrides": len(self._patient_overrides),
+                "patientCohorts": len(self._patient_cohort),
+            }
@@ -0,0 +1,180 @@
+"""
+Incrementally maintained, mergeable distribution sketches per vital per patient:
+a fixed-bin histogram plus a DDSketch-style log-bucketed quantile sketch
+(relative error <= 1%). Updates are O(1) per value (O(n) vectorised for
+batches); quantile and bin queries cost O(bins) however many readings exist.
+"""
+import math
+from threading import Lock
+
+import numpy as np
+
+from services.vitals_store import VITAL_FIELDS
+
+# vital -> (low edge, high edge, bin width); values outside are clamped to the end bins
+VITAL_BINS = {
+    "heartRate": (20.0, 240.0, 2.0),
+    "systolic": (60.0, 260.0, 2.0),
+    "diastolic": (30.0, 160.0, 2.0),
+    "bloodOxygen": (70.0, 100.0, 0.5),
+    "temperature": (33.0, 43.0, 0.1),
+    "respiratoryRate": (0.0, 60.0, 1.0),
+}
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+# DDSketch parameters: bucket i holds values in (gamma^(i-1), gamma^i]
+SKETCH_RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+SKETCH_BUCKETS = 352  # covers (0, ~1100]; vitals never exceed that
+# blocks this small are cheaper to add value by value than vectorised
+SCALAR_BLOCK_MAX = 8
+
+
+class VitalSketch:
+    """Histogram + quantile sketch for one vital. Two sketches merge by addition."""
+
+    __slots__ = ("vital", "low", "width", "counts", "dd", "n", "total", "min", "max")
+
+    def __init__(self, vital: str):
+        low, high, width = VITAL_BINS[vital]
+        self.vital = vital
+        self.low = low
+        self.width = width
+        self.counts = np.zeros(int(round((high - low) / width)), dtype=np.int64)
+        self.dd = np.zeros(SKETCH_BUCKETS, dtype=np.int64)
+        self.n = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _bin(self, value: float) -> int:
+        return min(max(int((value - self.low) // self.width), 0), len(self.counts) - 1)
+
+    @staticmethod
+    def _dd_index(value: float) -> int:
+        if value <= 1.0:
+            return 0
+        return min(math.ceil(math.log(value) / _LOG_GAMMA), SKETCH_BUCKETS - 1)
+
+    def add(self, value: float):
+        if value != value:  # NaN = vital missing from this reading
+            return
+        self.counts[self._bin(value)] += 1
+        self.dd[self._dd_index(value)] += 1
+        self.n += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_many(self, values: np.ndarray):
+        if len(values) <= SCALAR_BLOCK_MAX:
+            for value in np.asarray(values, dtype=np.float64).tolist():
+                self.add(value)
+            return
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        bins = np.clip(((values - self.low) // self.width).astype(np.intp), 0, len(self.counts) - 1)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        dd = np.ceil(np.log(np.maximum(values, 1.0)) / _LOG_GAMMA).astype(np.intp)
+        self.dd += np.bincount(np.clip(dd, 0, SKETCH_BUCKETS - 1), minlength=SKETCH_BUCKETS)
+        self.n += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other: "VitalSketch"):
+        self.counts += other.counts
+        self.dd += other.dd
+        self.n += other.n
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def copy(self) -> "VitalSketch":
+        out = VitalSketch(self.vital)
+        out.merge(self)
+        return out
+
+    def quantiles(self, qs=DEFAULT_QUANTILES) -> dict:
+        if not self.n:
+            return {}
+        cum = np.cumsum(self.dd)
+        out = {}
+        for q in qs:
+            i = int(np.searchsorted(cum, q * (self.n - 1), side="right"))
+            value = 2 * _GAMMA ** i / (_GAMMA + 1) if i else 1.0
+            out[f"p{q * 100:g}"] = round(min(max(value, self.min), self.max), 3)
+        return out
+
+    def bins(self, trim: bool = True) -> tuple[np.ndarray, np.ndarray]:
+        """(counts, edges); trim drops empty bins at both ends."""
+        counts = self.counts
+        start, stop = 0, len(counts)
+        if trim and self.n:
+            nonzero = np.flatnonzero(counts)
+            start, stop = int(nonzero[0]), int(nonzero[-1]) + 1
+        edges = self.low + self.width * np.arange(start, stop + 1)
+        return counts[start:stop].copy(), np.round(edges, 6)
+
+    def summary(self, qs=DEFAULT_QUANTILES) -> dict:
+        counts, edges = self.bins()
+        return {
+            "vital": self.vital,
+            "count": self.n,
+            "min": self.min if self.n else None,
+            "max": self.max if self.n else None,
+            "mean": round(self.total / self.n, 3) if self.n else None,
+            "quantiles": self.quantiles(qs),
+            "bins": {"counts": counts.tolist(), "edges": edges.tolist()},
+        }
+
+
+class VitalsDistribution:
+    """patient_id -> {vital: VitalSketch}, fed from the ingestion path."""
+
+    def __init__(self):
+        self._patients: dict[str, dict] = {}
+        self._lock = Lock()
+
+    def _sketches(self, patient_id: str) -> dict:
+        sketches = self._patients.get(patient_id)
+        if sketches is None:
+            sketches = self._patients[patient_id] = {v: VitalSketch(v) for v in VITAL_FIELDS}
+        return sketches
+
+    def add(self, patient_id: str, reading: dict):
+        with self._lock:
+            sketches = self._sketches(patient_id)
+            for vital, sketch in sketches.items():
+                value = reading.get(vital)
+                if value is not None:
+                    sketch.add(float(value))
+
+    def add_many(self, patient_id: str, values: np.ndarray):
+        """Columnar block for one patient: values[vital, n] in VITAL_FIELDS order."""
+        with self._lock:
+            sketches = self._sketches(patient_id)
+            for j, vital in enumerate(VITAL_FIELDS):
+                sketches[vital].add_many(values[j])
+
+    def sketch(self, vital: str, patient_ids) -> VitalSketch:
+        """Merged copy of one vital's sketch across patient_ids (unknown ids are skipped)."""
+        merged = VitalSketch(vital)
+        with self._lock:
+            for pid in patient_ids:
+                sketches = self._patients.get(pid)
+                if sketches is not None:
+                    merged.merge(sketches[vital])
+        return merged
+
+    def patient_ids(self) -> list:
+        with self._lock:
+            return list(self._patients)
+
+
+vitals_distribution = VitalsDistribution()
@@ -0,0 +1,320 @@
+"""
+Durable append-only vitals log. Each patient has a directory of fixed-width
+binary segments (32-byte records: int64 timestamp + float32 per vital).
+Appends only copy into an in-memory buffer; a background flusher writes the
+buffers out and fsyncs every touched segment once per interval, so ingestion
+never waits on the disk. Segments are read back through mmap as zero-copy
+NumPy record views, for history queries and for warm-starting the in-memory
+stores on boot. Records stay in arrival order, so late readings can sit behind
+newer ones; reads prune segments by their time bounds and return rows sorted by
+timestamp.
+"""
+import logging
+import os
+import struct
+import time
+from collections import OrderedDict
+from operator import itemgetter
+from threading import Lock, Thread
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from services.metrics import TimedLock
+from services.vitals_store import VITAL_FIELDS
+
+logger = logging.getLogger(__name__)
+
+RECORD_DTYPE = np.dtype([("timestamp", "<i8")] + [(v, "<f4") for v in VITAL_FIELDS])
+_RECORD = struct.Struct("<q" + "f" * len(VITAL_FIELDS))
+SEGMENT_RECORDS = 65_536  # 2 MiB per segment
+SEGMENT_SUFFIX = ".seg"
+FLUSH_INTERVAL = 1.0  # seconds between write + fsync batches
+MAX_OPEN_FILES = 256
+_NAN = float("nan")
+_vital_values = itemgetter(*VITAL_FIELDS)
+
+
+def _segment_name(seq: int) -> str:
+    return f"{seq:012d}{SEGMENT_SUFFIX}"
+
+
+class _PatientLog:
+    __slots__ = ("directory", "seq", "records", "pending", "bounds")
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        segments = sorted(f for f in os.listdir(directory) if f.endswith(SEGMENT_SUFFIX))
+        if segments:
+            self.seq = int(segments[-1][: -len(SEGMENT_SUFFIX)])
+            path = os.path.join(directory, segments[-1])
+            size = os.path.getsize(path)
+            if size % RECORD_DTYPE.itemsize:  # torn write from a crash: drop the partial record
+                size -= size % RECORD_DTYPE.itemsize
+                os.truncate(path, size)
+            self.records = size // RECORD_DTYPE.itemsize
+        else:
+            self.seq, self.records = 0, 0
+        self.pending = bytearray()
+        # seq -> (records covered, min ts, max ts, sorted); segments only grow, so a prefix stays valid
+        self.bounds: dict = {}
+
+
+class VitalsLog:
+    def __init__(self, root: str, flush_interval: float = FLUSH_INTERVAL, segment_records: int = SEGMENT_RECORDS):
+        self._root = root
+        self._flush_interval = flush_interval
+        self._segment_records = segment_records
+        self._patients: dict[str, _PatientLog] = {}
+        self._files: OrderedDict = OrderedDict()  # (patient_id, seq) -> fd, LRU
+        self._dirty: set = set()  # keys of open segments written since their last fsync
+        self._lock = TimedLock("vitals_log")  # guards pending buffers
+        self._io_lock = Lock()  # serialises flushes
+        self._running = False
+        self._thread: Thread | None = None
+        self._stats = {"appended": 0, "flushed": 0, "fsyncs": 0, "flush_ms_last": 0.0}
+        os.makedirs(root, exist_ok=True)
+        for name in os.listdir(root):
+            if os.path.isdir(os.path.join(root, name)):
+                self._patients[unquote(name)] = _PatientLog(os.path.join(root, name))
+
+    @property
+    def root(self) -> str:
+        return self._root
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def _patient(self, patient_id: str) -> _PatientLog:
+        log = self._patients.get(patient_id)
+        if log is None:
+            log = self._patients[patient_id] = _PatientLog(os.path.join(self._root, quote(patient_id, safe="")))
+        return log
+
+    def append(self, patient_id: str, reading: dict):
+        try:
+            record = _RECORD.pack(int(reading["timestamp"]), *_vital_values(reading))
+        except (KeyError, struct.error):  # missing vitals are stored as NaN
+            get = reading.get
+            record = _RECORD.pack(int(reading["timestamp"]), *[_NAN if (v := get(f)) is None else v for f in VITAL_FIELDS])
+        with self._lock:
+            self._patient(patient_id).pending += record
+            self._stats["appended"] += 1
+
+    def append_many(self, patient_id: str, timestamps: np.ndarray, values: np.ndarray):
+        """Columnar block for one patient: timestamps[n], values[vital, n]."""
+        block = np.empty(len(timestamps), dtype=RECORD_DTYPE)
+        block["timestamp"] = timestamps
+        for j, vital in enumerate(VITAL_FIELDS):
+            block[vital] = values[j]
+        data = block.tobytes()
+        with self._lock:
+            self._patient(patient_id).pending += data
+            self._stats["appended"] += len(timestamps)
+
+    # --- writing ---------------------------------------------------------
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = Thread(target=self._run_flusher, name="vitals-log-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=self._flush_interval * 2 + 5)
+            self._thread = None
+        self.flush()
+        with self._io_lock:
+            for fd in self._files.values():
+                os.close(fd)
+            self._files.clear()
+
+    def _run_flusher(self):
+        while self._running:
+            time.sleep(self._flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Vitals log flush failed")
+
+    def _fd(self, patient_id: str, log: _PatientLog) -> int:
+        key = (patient_id, log.seq)
+        fd = self._files.get(key)
+        if fd is None:
+            path = os.path.join(log.directory, _segment_name(log.seq))
+            fd = self._files[key] = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            while len(self._files) > MAX_OPEN_FILES:
+                old_key, old = self._files.popitem(last=False)
+                if old_key in self._dirty:  # written this flush: sync before the fd goes away
+                    self._dirty.discard(old_key)
+                    os.fsync(old)
+                    self._stats["fsyncs"] += 1
+                os.close(old)
+        else:
+            self._files.move_to_end(key)
+        return fd
+
+    def flush(self):
+        """Write all pending records and fsync each touched segment once."""
+        with self._io_lock:
+            t0 = time.perf_counter()
+            with self._lock:
+                batches = []
+                for pid, log in self._patients.items():
+                    if log.pending:
+                        batches.append((pid, log, bytes(log.pending)))
+                        log.pending = bytearray()
+            written = 0
+            for pid, log, data in batches:
+                view = memoryview(data)
+                while view:
+                    room = (self._segment_records - log.records) * RECORD_DTYPE.itemsize
+                    if room <= 0:  # segment full: roll over to the next one
+                        log.seq += 1
+                        log.records = 0
+                        continue
+                    chunk = view[:room]
+                    fd = self._fd(pid, log)
+                    os.write(fd, chunk)
+                    self._dirty.add((pid, log.seq))
+                    log.records += len(chunk) // RECORD_DTYPE.itemsize
+                    written += len(chunk) // RECORD_DTYPE.itemsize
+                    view = view[room:]
+            # segments evicted from the open-file LRU mid-flush were synced on eviction
+            for key in self._dirty:
+                os.fsync(self._files[key])
+            self._stats["flushed"] += written
+            self._stats["fsyncs"] += len(self._dirty)
+            self._dirty.clear()
+            self._stats["flush_ms_last"] = round((time.perf_counter() - t0) * 1000, 3)
+
+    # --- reading ---------------------------------------------------------
+
+    def patient_ids(self) -> list:
+        with self._lock:
+            return list(self._patients)
+
+    def _segments(self, patient_id: str) -> list:
+        log = self._patients.get(patient_id)
+        if log is None:
+            return []
+        out = []
+        for name in sorted(os.listdir(log.directory)):
+            if not name.endswith(SEGMENT_SUFFIX):
+                continue
+            path = os.path.join(log.directory, name)
+            n = os.path.getsize(path) // RECORD_DTYPE.itemsize
+            if n:
+                out.append((log, int(name[: -len(SEGMENT_SUFFIX)]),
+                            np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(n,))))
+        return out
+
+    def segments(self, patient_id: str) -> list:
+        """Read-only memory-mapped record arrays for every flushed segment, oldest first."""
+        return [seg for _, _, seg in self._segments(patient_id)]
+
+    @staticmethod
+    def _bounds(log: _PatientLog, seq: int, seg: np.ndarray) -> tuple:
+        """(min ts, max ts, sorted) of a segment, scanning only records appended since the last call."""
+        n = len(seg)
+        done, lo, hi, ordered = log.bounds.get(seq, (0, None, None, True))
+        if done > n:  # cannot happen for an append-only segment; rescan
+            done, lo, hi, ordered = 0, None, None, True
+        if done < n:
+            ts = np.asarray(seg["timestamp"][max(done - 1, 0):])
+            new = ts[1:] if done else ts
+            lo = int(new.min()) if lo is None else min(lo, int(new.min()))
+            hi = int(new.max()) if hi is None else max(hi, int(new.max()))
+            ordered = ordered and bool((ts[1:] >= ts[:-1]).all())
+            log.bounds[seq] = (n, lo, hi, ordered)
+        return lo, hi, ordered
+
+    def read_range(self, patient_id: str, start_ms: int | None = None, end_ms: int | None = None, limit=None):
+        """
+        Flushed readings in [start_ms, end_ms] as (timestamps[n], values[vital, n]),
+        sorted by time; limit keeps only the newest rows. Segments outside the
+        range are skipped by their time bounds without touching their pages.
+        """
+        parts = []
+        in_order = True  # parts concatenate to a sorted run
+        prev_hi = None
+        for log, seq, seg in self._segments(patient_id):
+            lo_ts, hi_ts, ordered = self._bounds(log, seq, seg)
+            if (start_ms is not None and hi_ts < start_ms) or (end_ms is not None and lo_ts > end_ms):
+                continue
+            ts = seg["timestamp"]
+            if ordered:
+                lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side="left"))
+                hi = len(ts) if end_ms is None else int(np.searchsorted(ts, end_ms, side="right"))
+                part = seg[lo:hi]
+            else:  # late readings: filter by mask
+                keep = np.ones(len(ts), dtype=bool)
+                if start_ms is not None:
+                    keep &= ts >= start_ms
+                if end_ms is not None:
+                    keep &= ts <= end_ms
+                part = seg[keep]
+            if len(part):
+                in_order = in_order and ordered and (prev_hi is None or lo_ts >= prev_hi)
+                prev_hi = hi_ts if prev_hi is None else max(prev_hi, hi_ts)
+                parts.append(part)
+        if not in_order:
+            records = np.concatenate(parts)
+            parts = [records[np.argsort(records["timestamp"], kind="stable")]]
+        if limit is not None:
+            kept, total = [], 0
+            for part in reversed(parts):
+                if total >= limit:
+                    break
+                part = part[-(limit - total):]
+                kept.append(part)
+                total += len(part)
+            parts = kept[::-1]
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty((len(VITAL_FIELDS), 0), dtype=np.float32)
+        records = np.concatenate(parts)
+        values = np.vstack([records[v] for v in VITAL_FIELDS])
+        return records["timestamp"].astype(np.int64), values
+
+    def oldest(self, patient_id: str) -> int | None:
+        bounds = [self._bounds(log, seq, seg)[0] for log, seq, seg in self._segments(patient_id)]
+        return min(bounds) if bounds else None
+
+    def warm_start(self, store, rollups=None, rollup_span_ms: int = 25 * 3_600_000) -> int:
+        """Reload the newest readings into the vitals store (and recent history into rollups)."""
+        loaded = 0
+        for pid in self.patient_ids():
+            ts, values = self.read_range(pid, limit=store.capacity)
+            if len(ts):
+                store.extend(pid, ts, values)
+                loaded += len(ts)
+                if rollups is not None:
+                    rts, rvalues = self.read_range(pid, start_ms=int(ts[-1]) - rollup_span_ms)
+                    rollups.add_many(pid, rts, rvalues)
+        return loaded
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = sum(len(log.pending) for log in self._patients.values()) // RECORD_DTYPE.itemsize
+            out = dict(self._stats, pending=pending, patients=len(self._patients))
+        return out
+
+
+vitals_log: VitalsLog | None = None
+
+
+def open_vitals_log(root: str, flush_interval: float = FLUSH_INTERVAL) -> VitalsLog:
+    """Create the process-wide log (idempotent per process)."""
+    global vitals_log
+    if vitals_log is None:
+        vitals_log = VitalsLog(root, flush_interval=flush_interval)
+    return vitals_log
+
+
+def get_vitals_log() -> VitalsLog | None:
+    return vitals_log
@@ -0,0 +1,215 @@
+"""
+Windowed rollups of vitals history: tumbling 1-minute, 5-minute and 1-hour
+buckets per patient holding count/min/max/sum for every vital, maintained
+in O(1) per reading as readings arrive. Each resolution is a fixed ring of
+buckets, so memory per patient is bounded. Also provides LTTB downsampling
+for returning long series in a bounded number of points.
+"""
+from threading import Lock
+
+import numpy as np
+
+from services.vitals_store import VITAL_DECIMALS, VITAL_FIELDS
+
+# name -> (bucket width in ms, buckets retained); each keeps a margin over its
+# nominal span so a full 6 h / 24 h / 7 d window is always answerable
+ROLLUP_RESOLUTIONS = {
+    "1m": (60_000, 390),  # 6.5 hours
+    "5m": (300_000, 300),  # 25 hours
+    "1h": (3_600_000, 192),  # 8 days
+}
+_N = len(VITAL_FIELDS)
+# blocks this small are cheaper to apply reading by reading than through ufunc.at
+SCALAR_BLOCK_MAX = 8
+
+
+class RollupRing:
+    """Fixed ring of tumbling buckets for one patient at one resolution."""
+
+    __slots__ = ("width", "size", "starts", "counts", "sums", "mins", "maxs")
+
+    def __init__(self, width: int, size: int):
+        self.width = width
+        self.size = size
+        self.starts = np.full(size, -1, dtype=np.int64)
+        self.counts = np.zeros((_N, size), dtype=np.int32)
+        self.sums = np.zeros((_N, size), dtype=np.float64)
+        self.mins = np.full((_N, size), np.inf, dtype=np.float32)
+        self.maxs = np.full((_N, size), -np.inf, dtype=np.float32)
+
+    def _reset(self, slots, starts):
+        self.starts[slots] = starts
+        self.counts[:, slots] = 0
+        self.sums[:, slots] = 0.0
+        self.mins[:, slots] = np.inf
+        self.maxs[:, slots] = -np.inf
+
+    def add(self, ts: int, values: np.ndarray):
+        start = ts - ts % self.width
+        slot = (start // self.width) % self.size
+        current = self.starts[slot]
+        if current != start:
+            if current > start:
+                return  # older than the bucket now occupying this slot
+            self._reset(slot, start)
+        present = values == values  # NaN = vital missing
+        self.counts[:, slot] += present
+        self.sums[:, slot] += np.where(present, values, 0.0)
+        # fmin/fmax ignore NaN, so missing vitals leave the extremes untouched
+        self.mins[:, slot] = np.fmin(self.mins[:, slot], values)
+        self.maxs[:, slot] = np.fmax(self.maxs[:, slot], values)
+
+    def add_many(self, ts: np.ndarray, values: np.ndarray):
+        """Block update: ts[n], values[vital, n]."""
+        if len(ts) <= SCALAR_BLOCK_MAX:
+            for i, t in enumerate(ts.tolist()):
+                self.add(t, values[:, i])
+            return
+        starts = ts - ts % self.width
+        slots = (starts // self.width) % self.size
+        # newest bucket start per slot wins; readings for older buckets in that slot are dropped
+        latest = np.full(self.size, -1, dtype=np.int64)
+        np.maximum.at(latest, slots, starts)
+        touched = np.flatnonzero(latest >= 0)
+        stale = touched[self.starts[touched] < latest[touched]]
+        if len(stale):
+            self._reset(stale, latest[stale])
+        keep = starts == self.starts[slots]
+        slots, values = slots[keep], values[:, keep]
+        present = ~np.isnan(values)
+        for j in range(_N):
+            p = present[j]
+            s, v = slots[p], values[j, p]
+            self.counts[j] += np.bincount(s, minlength=self.size).astype(np.int32)
+            self.sums[j] += np.bincount(s, weights=v, minlength=self.size)
+            np.minimum.at(self.mins[j], s, v)
+            np.maximum.at(self.maxs[j], s, v)
+
+    def series(self, start_ms: int | None = None, end_ms: int | None = None) -> dict:
+        """Buckets overlapping [start_ms, end_ms], oldest first, as column arrays."""
+        valid = self.starts >= 0
+        if start_ms is not None:
+            valid &= self.starts + self.width > start_ms
+        if end_ms is not None:
+            valid &= self.starts <= end_ms
+        idx = np.flatnonzero(valid)
+        idx = idx[np.argsort(self.starts[idx], kind="stable")]
+        counts = self.counts[:, idx]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(counts > 0, self.sums[:, idx] / counts, np.nan)
+        empty = counts == 0
+        return {
+            "timestamps": self.starts[idx],
+            "count": counts,
+            "mean": means,
+            "min": np.where(empty, np.nan, self.mins[:, idx]),
+            "max": np.where(empty, np.nan, self.maxs[:, idx]),
+        }
+
+    def oldest(self) -> int | None:
+        valid = self.starts[self.starts >= 0]
+        return int(valid.min()) if len(valid) else None
+
+
+class VitalsRollups:
+    """patient_id -> {resolution: RollupRing}."""
+
+    def __init__(self, resolutions: dict | None = None):
+        self._resolutions = dict(resolutions or ROLLUP_RESOLUTIONS)
+        self._patients: dict[str, dict] = {}
+        self._lock = Lock()
+
+    @property
+    def resolutions(self) -> dict:
+        return dict(self._resolutions)
+
+    def _rings(self, patient_id: str) -> dict:
+        rings = self._patients.get(patient_id)
+        if rings is None:
+            rings = self._patients[patient_id] = {
+                name: RollupRing(width, size) for name, (width, size) in self._resolutions.items()
+            }
+        return rings
+
+    def add(self, patient_id: str, reading: dict):
+        values = np.array(
+            [np.nan if reading.get(v) is None else reading[v] for v in VITAL_FIELDS], dtype=np.float64
+        )
+        ts = int(reading["timestamp"])
+        with self._lock:
+            for ring in self._rings(patient_id).values():
+                ring.add(ts, values)
+
+    def add_many(self, patient_id: str, timestamps: np.ndarray, values: np.ndarray):
+        """Columnar block for one patient: timestamps[n], values[vital, n]."""
+        ts = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        with self._lock:
+            for ring in self._rings(patient_id).values():
+                ring.add_many(ts, values)
+
+    def series(self, patient_id: str, resolution: str, start_ms=None, end_ms=None) -> dict | None:
+        with self._lock:
+            rings = self._patients.get(patient_id)
+            if rings is None:
+                return None
+            return rings[resolution].series(start_ms, end_ms)
+
+    def covering_resolution(self, patient_id: str, start_ms: int) -> str | None:
+        """Finest resolution whose retained buckets reach back to start_ms (else the coarsest)."""
+        with self._lock:
+            rings = self._patients.get(patient_id)
+            if rings is None:
+                return None
+            names = sorted(rings, key=lambda n: self._resolutions[n][0])
+            for name in names:
+                oldest = rings[name].oldest()
+                if oldest is not None and oldest <= start_ms:
+                    return name
+            return names[-1]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points that preserve the
+    visual shape of (x, y). NaN points are never selected. O(len(x)).
+    """
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if n_out >= n:
+        return valid
+    if n_out < 3:
+        return valid[np.linspace(0, n - 1, max(n_out, 1)).astype(np.intp)]
+    xs = x[valid].astype(np.float64)
+    ys = y[valid].astype(np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)  # n_out - 2 inner buckets
+    out = np.empty(n_out, dtype=np.intp)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xs[nlo:nhi].mean() if nhi > nlo else xs[-1]
+        avg_y = ys[nlo:nhi].mean() if nhi > nlo else ys[-1]
+        area = np.abs(
+            (xs[a] - avg_x) * (ys[lo:hi] - ys[a]) - (xs[a] - xs[lo:hi]) * (avg_y - ys[a])
+        )
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return valid[out]
+
+
+def downsample_series(timestamps: np.ndarray, values: np.ndarray, points: int) -> dict:
+    """LTTB each vital row of values[vital, n] independently; returns {vital: {timestamps, values}}."""
+    out = {}
+    for j, vital in enumerate(VITAL_FIELDS):
+        idx = lttb(timestamps, values[j], points)
+        decimals = VITAL_DECIMALS[vital] + 1
+        out[vital] = {
+            "timestamps": timestamps[idx].tolist(),
+            "values": np.round(values[j, idx].astype(np.float64), decimals).tolist(),
+        }
+    return out
+
+
+vitals_rollups = VitalsRollups()
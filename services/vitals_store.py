@@ -0,0 +1,266 @@
+"""
+Per-patient vitals store backed by preallocated columnar ring buffers.
+Each patient gets one int64 timestamp column and one float32 column per vital;
+appends are O(1) and history windows are returned as zero-copy NumPy views.
+Readers never take a lock: writers are serialised per shard of patients, each
+ring is guarded by a seqlock for consistent history copies, and the newest
+reading is published as an immutable tuple swapped in by reference.
+"""
+import time
+
+import numpy as np
+
+from services.metrics import TimedLock
+
+# Vital columns in storage order (timestamp is kept in its own int64 column)
+VITAL_FIELDS = (
+    "heartRate",
+    "systolic",
+    "diastolic",
+    "bloodOxygen",
+    "temperature",
+    "respiratoryRate",
+)
+READING_FIELDS = ("timestamp",) + VITAL_FIELDS
+# Decimal places used when turning stored float32 values back into JSON numbers
+VITAL_DECIMALS = {
+    "heartRate": 0,
+    "systolic": 0,
+    "diastolic": 0,
+    "bloodOxygen": 0,
+    "temperature": 1,
+    "respiratoryRate": 0,
+}
+
+DEFAULT_CAPACITY = 100
+DEFAULT_PATIENT_ID = "demo"
+STORE_SHARDS = 64  # writer locks; patients hash onto shards
+SEQLOCK_BACKOFF = 50e-6  # reader pause (s) when it catches a write in progress
+
+
+def _to_number(value: float, decimals: int):
+    if value != value:  # NaN marks a missing vital
+        return None
+    return round(value, decimals) if decimals else int(round(value))
+
+
+def columns_to_readings(patient_id: str, timestamps: np.ndarray, values: np.ndarray) -> list:
+    """Turn a (timestamps, values[vital, n]) window into a list of reading dicts."""
+    ts_list = timestamps.tolist()
+    cols = [
+        [_to_number(v, VITAL_DECIMALS[name]) for v in values[j].tolist()]
+        for j, name in enumerate(VITAL_FIELDS)
+    ]
+    out = []
+    for i, ts in enumerate(ts_list):
+        reading = {"patientId": patient_id, "timestamp": ts}
+        for j, name in enumerate(VITAL_FIELDS):
+            reading[name] = cols[j][i]
+        out.append(reading)
+    return out
+
+
+class PatientRing:
+    """
+    Fixed-capacity ring for one patient. Every row is written twice (at i and
+    i + capacity), so the newest n rows are always one contiguous slice and can
+    be handed out as views without wrapping or copying.
+    32 bytes per reading (int64 + 6 x float32), mirrored.
+
+    One writer at a time (the store's shard lock). The sequence counter is odd
+    while a write is in progress; snapshot() retries until it copies a window
+    with no write overlapping it, so readers need no lock.
+    """
+
+    __slots__ = ("capacity", "timestamps", "values", "_head", "_count", "_seq", "latest")
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self.values = np.full((len(VITAL_FIELDS), 2 * capacity), np.nan, dtype=np.float32)
+        self._head = 0  # next physical slot in [0, capacity)
+        self._count = 0
+        self._seq = 0
+        self.latest: tuple | None = None  # (timestamp, stored values): swapped whole, never mutated
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: int, values) -> None:
+        self._seq += 1
+        i = self._head
+        j = i + self.capacity
+        self.timestamps[i] = timestamp
+        self.timestamps[j] = timestamp
+        self.values[:, i] = values
+        self.values[:, j] = values
+        self._head = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        self._seq += 1
+
+    def extend(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Append a block: timestamps[n], values[vital, n] (oldest first)."""
+        n = len(timestamps)
+        if n == 0:
+            return
+        if n > self.capacity:
+            timestamps = timestamps[-self.capacity:]
+            values = values[:, -self.capacity:]
+            n = self.capacity
+        idx = (self._head + np.arange(n)) % self.capacity
+        self._seq += 1
+        self.timestamps[idx] = timestamps
+        self.timestamps[idx + self.capacity] = timestamps
+        self.values[:, idx] = values
+        self.values[:, idx + self.capacity] = values
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+        self._seq += 1
+
+    def window(self, limit: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Views (timestamps[n], values[vital, n]) of the newest n rows, oldest first."""
+        n = self._count if limit is None else max(0, min(limit, self._count))
+        start = (self._head - n) % self.capacity
+        return self.timestamps[start:start + n], self.values[:, start:start + n]
+
+    def snapshot(self, limit: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Consistent copies of the newest n rows, taken without blocking the writer."""
+        while True:
+            seq = self._seq
+            if seq & 1:
+                time.sleep(SEQLOCK_BACKOFF)  # writer mid-update: get out of its way
+                continue
+            ts, values = self.window(limit)
+            ts, values = ts.copy(), values.copy()
+            if self._seq == seq:
+                return ts, values
+
+
+class VitalsStore:
+    """
+    Map of patient_id -> PatientRing. Rings are created on first write.
+    Writes lock one of STORE_SHARDS shard locks; reads take no lock at all.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, shards: int = STORE_SHARDS):
+        self._capacity = capacity
+        self._patients: dict[str, PatientRing] = {}
+        self._shards = [TimedLock("vitals_store") for _ in range(shards)]
+        self._allocate = None  # optional allocate(patient_id, capacity) -> PatientRing (see bind)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def __len__(self) -> int:
+        return len(self._patients)
+
+    def __contains__(self, patient_id: str) -> bool:
+        return patient_id in self._patients
+
+    def patient_ids(self) -> list:
+        return list(self._patients)
+
+    def _shard(self, patient_id: str) -> TimedLock:
+        return self._shards[hash(patient_id) % len(self._shards)]
+
+    def bind(self, allocate) -> None:
+        """
+        Back new rings with external storage (e.g. a shared-memory segment):
+        allocate(patient_id, capacity) returns a PatientRing. Bind before the
+        first write so every patient lives in the same place.
+        """
+        if self._patients:
+            raise RuntimeError("bind() must be called before the first write")
+        self._allocate = allocate
+
+    def _lookup(self, patient_id: str) -> PatientRing | None:
+        return self._patients.get(patient_id)
+
+    def _ring(self, patient_id: str) -> PatientRing:
+        """Caller holds the patient's shard lock."""
+        ring = self._patients.get(patient_id)
+        if ring is None:
+            if self._allocate is None:
+                ring = PatientRing(self._capacity)
+            else:
+                ring = self._allocate(patient_id, self._capacity)
+            self._patients[patient_id] = ring
+        return ring
+
+    def append(self, patient_id: str, reading: dict) -> None:
+        """Append one reading dict (missing vitals are stored as NaN)."""
+        ts = int(reading["timestamp"])
+        values = [reading.get(name) for name in VITAL_FIELDS]
+        values = [np.nan if v is None else v for v in values]
+        with self._shard(patient_id):
+            ring = self._ring(patient_id)
+            ring.append(ts, values)
+            ring.latest = (ts, tuple(ring.values[:, ring._head - 1].tolist()))
+
+    def extend(self, patient_id: str, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Append a columnar block for one patient: timestamps[n], values[vital, n]."""
+        if not len(timestamps):
+            return
+        with self._shard(patient_id):
+            ring = self._ring(patient_id)
+            ring.extend(timestamps, values)
+            ring.latest = (int(timestamps[-1]), tuple(ring.values[:, ring._head - 1].tolist()))
+
+    def window(self, patient_id: str, limit: int | None = None) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        Zero-copy views of the newest readings. The views alias the ring and
+        are not protected against concurrent appends; use snapshot() when the
+        data must be consistent or outlive further appends.
+        """
+        ring = self._lookup(patient_id)
+        if ring is None:
+            return None
+        return ring.window(limit)
+
+    def snapshot(self, patient_id: str, limit: int | None = None) -> tuple[np.ndarray, np.ndarray] | None:
+        """Consistent copies (timestamps[n], values[vital, n]) of the newest readings, lock-free."""
+        ring = self._lookup(patient_id)
+        if ring is None:
+            return None
+        return ring.snapshot(limit)
+
+    def latest(self, patient_id: str) -> dict | None:
+        ring = self._lookup(patient_id)
+        latest = None if ring is None else ring.latest
+        if latest is None:
+            return None
+        ts, stored = latest
+        reading = {"patientId": patient_id, "timestamp": ts}
+        for name, v in zip(VITAL_FIELDS, stored):
+            reading[name] = _to_number(v, VITAL_DECIMALS[name])
+        return reading
+
+    def history(self, patient_id: str, limit: int = 50) -> list:
+        snap = self.snapshot(patient_id, limit)
+        if snap is None:
+            return []
+        return columns_to_readings(patient_id, *snap)
+
+    def history_columns(self, patient_id: str, limit: int = 50) -> dict:
+        """
+        history() as one array per field, taken straight from a ring snapshot
+        (no per-reading objects): {"patientId", "timestamp": [...], vital: [...]}.
+        Values are rounded as in history(); NaN marks a missing vital.
+        """
+        snap = self.snapshot(patient_id, limit)
+        if snap is None:
+            snap = np.empty(0, dtype=np.int64), np.empty((len(VITAL_FIELDS), 0), dtype=np.float32)
+        ts, values = snap
+        out = {"patientId": patient_id, "timestamp": ts}
+        for j, name in enumerate(VITAL_FIELDS):
+            col = np.round(values[j].astype(np.float64), VITAL_DECIMALS[name])
+            out[name] = col if VITAL_DECIMALS[name] or np.isnan(col).any() else col.astype(np.int64)
+        return out
+
+
+# Singleton shared by the mock stream and the API routes
+vitals_store = VitalsStore()
@@ -0,0 +1,144 @@
+"""EmergencyDispatcher delivering to the local webhook stub (tools/webhook_stub.py)."""
+import time
+
+import pytest
+
+from services.emergency_dispatch import EmergencyDispatcher, WebhookSink
+from tools.webhook_stub import WebhookStub
+
+BACKOFF = 0.05
+
+
+def _alert(patient_id="p1", alert_type="heartRate"):
+    return {"patientId": patient_id, "type": alert_type, "severity": "critical", "value": 150}
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for the dispatcher")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def webhook():
+    stub = WebhookStub().start()
+    yield stub
+    stub.stop()
+
+
+def _dispatcher(webhook, **kwargs):
+    kwargs.setdefault("backoff", BACKOFF)
+    dispatcher = EmergencyDispatcher(sinks=[WebhookSink(webhook.url, timeout=2.0)], workers=1, **kwargs)
+    dispatcher.start()
+    return dispatcher
+
+
+def _settled(dispatcher, n):
+    def done():
+        m = dispatcher.metrics()
+        return m["dispatched"] + m["failed"] >= n
+    return done
+
+
+def test_delivers_alert_to_webhook(webhook):
+    dispatcher = _dispatcher(webhook)
+    try:
+        assert dispatcher.submit(_alert(), source="test") == "queued"
+        _wait_for(_settled(dispatcher, 1))
+    finally:
+        dispatcher.stop()
+    assert len(webhook.received) == 1
+    event = webhook.received[0]
+    assert event["alert"] == _alert()
+    assert event["source"] == "test"
+    assert isinstance(event["queued_at"], int)
+
+
+def test_cooldown_is_per_patient_and_alert_type(webhook):
+    dispatcher = _dispatcher(webhook, cooldown=0.3)
+    try:
+        assert dispatcher.submit(_alert("p1")) == "queued"
+        assert dispatcher.submit(_alert("p1")) == "suppressed"
+        assert dispatcher.submit(_alert("p2")) == "queued"
+        assert dispatcher.submit(_alert("p1", "bloodOxygen")) == "queued"
+        time.sleep(0.35)
+        assert dispatcher.submit(_alert("p1")) == "queued"
+        _wait_for(_settled(dispatcher, 4))
+        metrics = dispatcher.metrics()
+    finally:
+        dispatcher.stop()
+    assert metrics["submitted"] == 5
+    assert metrics["suppressed"] == 1
+    assert metrics["dispatched"] == 4
+    assert len(webhook.received) == 4
+
+
+def test_retries_with_exponential_backoff(webhook):
+    webhook.fail_next = 2
+    dispatcher = _dispatcher(webhook, max_retries=3)
+    try:
+        t0 = time.monotonic()
+        dispatcher.submit(_alert())
+        _wait_for(_settled(dispatcher, 1))
+        elapsed = time.monotonic() - t0
+        metrics = dispatcher.metrics()
+    finally:
+        dispatcher.stop()
+    assert metrics["dispatched"] == 1
+    assert metrics["failed"] == 0
+    assert metrics["retries"] == 2
+    assert elapsed >= BACKOFF + 2 * BACKOFF  # 0.05 s then 0.1 s before the third attempt
+    assert len(webhook.received) == 1
+    assert dispatcher.dead_letters() == []
+
+
+def test_dead_letter_after_last_retry(webhook):
+    webhook.fail_next = 100
+    dispatcher = _dispatcher(webhook, max_retries=2)
+    try:
+        dispatcher.submit(_alert("p9"))
+        _wait_for(_settled(dispatcher, 1))
+        metrics = dispatcher.metrics()
+        letters = dispatcher.dead_letters()
+    finally:
+        dispatcher.stop()
+    assert metrics["failed"] == 1
+    assert metrics["dispatched"] == 0
+    assert metrics["retries"] == 2
+    assert metrics["dead_letters"] == 1
+    assert webhook.received == []
+    (letter,) = letters
+    assert letter["event"]["alert"] == _alert("p9")
+    assert letter["attempts"] == 3
+    assert "503" in letter["error"]
+    assert webhook.url in letter["sink"]
+
+
+def test_full_queue_drops_and_releases_cooldown(webhook):
+    dispatcher = EmergencyDispatcher(sinks=[WebhookSink(webhook.url)], queue_size=1)  # not started: queue stays full
+    assert dispatcher.submit(_alert("p1")) == "queued"
+    assert dispatcher.submit(_alert("p2")) == "dropped"
+    assert dispatcher.submit(_alert("p2")) == "dropped"  # a dropped alert does not start a cooldown
+    metrics = dispatcher.metrics()
+    assert metrics["dropped"] == 2
+    assert metrics["suppressed"] == 0
+    assert metrics["queue_depth"] == 1
+
+
+def test_metrics_report_latency_and_workers(webhook):
+    dispatcher = _dispatcher(webhook)
+    try:
+        for i in range(5):
+            dispatcher.submit(_alert(f"p{i}"))
+        _wait_for(_settled(dispatcher, 5))
+        metrics = dispatcher.metrics()
+    finally:
+        dispatcher.stop()
+    assert metrics["workers"] == 1
+    assert metrics["queue_depth"] == 0
+    assert metrics["dispatched"] == 5
+    latency = metrics["latency_ms"]
+    assert latency["samples"] == 5
+    assert 0 <= latency["p50"] <= latency["p95"] <= latency["max"]
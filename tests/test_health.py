@@ -0,0 +1,43 @@
+"""/api/health in the standalone and api serving roles."""
+import json
+
+import pytest
+from flask import Flask
+
+import routes.front
+from app import create_app
+from routes.main import main_bp
+
+
+def test_standalone_reports_last_prediction():
+    client = create_app().test_client()
+    client.post("/api/predict", json={"age": 60, "bp": 150})
+    body = client.get("/api/health").get_json()
+    assert body["ok"] is True
+    assert body["last_prediction"]["health_status"]
+    assert "predictions" in body["prediction_cache"]
+
+
+@pytest.fixture
+def api_client():
+    app = Flask(__name__)
+    app.config.update(SERVE_ROLE="api", PORT=4000)
+    app.register_blueprint(main_bp)
+    return app.test_client()
+
+
+def test_api_worker_reports_ingestion_process_values(api_client, monkeypatch):
+    upstream = {"ok": True, "port": 4001, "last_prediction": {"risk_percentage": 42.0},
+                "prediction_cache": {"predictions": {"hits": 3}}}
+    monkeypatch.setattr(routes.front, "fetch_upstream", lambda path: (200, json.dumps(upstream).encode()))
+    body = api_client.get("/api/health").get_json()
+    assert body["port"] == 4000
+    assert body["last_prediction"] == upstream["last_prediction"]
+    assert body["prediction_cache"] == upstream["prediction_cache"]
+
+
+def test_api_worker_without_ingestion_process_is_503(api_client, monkeypatch):
+    monkeypatch.setattr(routes.front, "fetch_upstream", lambda path: (0, b""))
+    r = api_client.get("/api/health")
+    assert r.status_code == 503
+    assert r.get_json()["ok"] is False
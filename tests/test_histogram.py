@@ -0,0 +1,28 @@
+"""POST /api/histogram request validation."""
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app().test_client()
+
+
+@pytest.mark.parametrize("body", [[1, 2], "x", 5])
+def test_non_object_body_is_400(client, body):
+    r = client.post("/api/histogram", json=body)
+    assert r.status_code == 400
+    assert "error" in r.get_json()
+
+
+@pytest.mark.parametrize("vital", [["heartRate"], {"a": 1}, "pulse"])
+def test_unknown_vital_is_400(client, vital):
+    r = client.post("/api/histogram", json={"vital": vital})
+    assert r.status_code == 400
+
+
+def test_numbers_as_json_bins(client):
+    r = client.post("/api/histogram?format=json", json={"numbers": [1, 2, 2, 3], "bins": 3})
+    assert r.status_code == 200
+    assert sum(r.get_json()["counts"]) == 4
@@ -0,0 +1,43 @@
+"""POST /api/vitals/ingest batch-level errors."""
+import json
+
+import pytest
+
+import routes.vitals
+import services.ingest
+from app import create_app
+
+MAX_BATCH = 3
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app().test_client()
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(services.ingest, "MAX_INGEST_BATCH", MAX_BATCH)
+    monkeypatch.setattr(routes.vitals, "MAX_INGEST_BATCH", MAX_BATCH)
+
+
+def _rows(n):
+    return [{"patientId": f"p{i}", "heartRate": 80} for i in range(n)]
+
+
+def test_oversized_json_batch_is_413(client, small_batches):
+    r = client.post("/api/vitals/ingest", json=_rows(MAX_BATCH + 1))
+    assert r.status_code == 413
+
+
+def test_oversized_ndjson_batch_is_413(client, small_batches):
+    body = "\n".join(json.dumps(row) for row in _rows(MAX_BATCH + 1))
+    r = client.post("/api/vitals/ingest", data=body, content_type="application/x-ndjson")
+    assert r.status_code == 413
+
+
+@pytest.mark.parametrize("body", [{"heartRate": [80]}, [1, 2], {"patientId": ["p1"], "heartRate": 80}])
+def test_malformed_batch_is_400(client, body):
+    r = client.post("/api/vitals/ingest", json=body)
+    assert r.status_code == 400
+    assert "error" in r.get_json()
@@ -0,0 +1,121 @@
+"""Async LLM summaries through /predict against the local OpenAI-compatible stub (tools/openai_stub.py)."""
+import time
+
+import pytest
+
+import routes.predict
+import services.llm_summary as llm_summary
+import services.predict_service as predict_service
+from app import create_app
+from services.llm_summary import SummaryService
+from tools.openai_stub import STUB_REPLY, OpenAIStub
+
+LLM_TIMEOUT = 0.5
+PAYLOAD = {"age": 62, "sex": 1, "cholesterol": 250, "bp": 150, "thalachh": 120, "smoking": True}
+
+
+@pytest.fixture
+def stub():
+    stub = OpenAIStub().start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def summaries(monkeypatch, stub):
+    """A fresh SummaryService (empty job table and cache) pointed at the stub."""
+    monkeypatch.setattr(llm_summary, "OPENAI_API_KEY", "stub")
+    monkeypatch.setattr(llm_summary, "OPENAI_BASE_URL", stub.base_url)
+    monkeypatch.setattr(llm_summary, "OPENAI_TIMEOUT", LLM_TIMEOUT)
+    monkeypatch.setattr(llm_summary, "_client", None)
+    service = SummaryService(workers=2)
+    for module in (llm_summary, predict_service, routes.predict):
+        monkeypatch.setattr(module, "summary_service", service)
+    return service
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app().test_client()
+
+
+def _predict(client, payload=PAYLOAD) -> dict:
+    r = client.post("/api/predict", json=payload)
+    assert r.status_code == 200
+    return r.get_json()
+
+
+def test_predict_returns_summary_id_then_summary(client, summaries, stub):
+    result = _predict(client)
+    assert result["summary_status"] == "pending"
+    assert "llm_summary" not in result
+    r = client.get(f"/api/predict/summary/{result['summary_id']}?wait=5")
+    assert r.status_code == 200
+    job = r.get_json()
+    assert job["status"] == "ready"
+    assert job["llm_summary"] == STUB_REPLY
+    assert job["finished_at"] >= job["created_at"]
+    assert stub.requests == 1
+
+
+def test_summary_cache_is_reused_within_a_risk_bucket(client, summaries, stub):
+    first = _predict(client)
+    client.get(f"/api/predict/summary/{first['summary_id']}?wait=5")
+    second = _predict(client)
+    assert second["summary_id"] != first["summary_id"]
+    assert second["summary_status"] == "ready"
+    assert second["llm_summary"] == STUB_REPLY
+    assert stub.requests == 1
+    cache = summaries.stats()["cache"]
+    assert (cache["hits"], cache["misses"]) == (1, 1)  # one lookup per submit
+
+
+def test_slow_llm_hits_deadline_without_delaying_predict(client, summaries, stub):
+    stub.delay = LLM_TIMEOUT * 4
+    t0 = time.monotonic()
+    result = _predict(client)
+    assert time.monotonic() - t0 < LLM_TIMEOUT  # /predict never waits for the LLM
+    job = client.get(f"/api/predict/summary/{result['summary_id']}?wait=5").get_json()
+    assert job["status"] == "failed"
+    assert "llm_summary" not in job
+    assert (job["finished_at"] - job["created_at"]) / 1000 < stub.delay
+
+    # failures are not cached: the next prediction in the bucket calls the LLM again
+    stub.delay = 0
+    retry = _predict(client)
+    assert retry["summary_status"] == "pending"
+    job = client.get(f"/api/predict/summary/{retry['summary_id']}?wait=5").get_json()
+    assert job["status"] == "ready"
+
+
+def test_llm_error_marks_summary_failed(client, summaries, stub):
+    stub.status = 500
+    result = _predict(client)
+    job = client.get(f"/api/predict/summary/{result['summary_id']}?wait=5").get_json()
+    assert job["status"] == "failed"
+
+
+def test_wait_long_polls_until_ready(client, summaries, stub):
+    stub.delay = 0.3
+    result = _predict(client)
+    summary_id = result["summary_id"]
+    assert client.get(f"/api/predict/summary/{summary_id}").get_json()["status"] == "pending"
+
+    t0 = time.monotonic()
+    job = client.get(f"/api/predict/summary/{summary_id}?wait=0.05").get_json()
+    assert job["status"] == "pending"  # wait expires before the stub answers
+    assert time.monotonic() - t0 >= 0.05
+
+    job = client.get(f"/api/predict/summary/{summary_id}?wait=5").get_json()
+    assert job["status"] == "ready"
+    assert time.monotonic() - t0 < 5
+
+
+def test_unknown_summary_id_is_404(client, summaries):
+    assert client.get("/api/predict/summary/nope?wait=0.1").status_code == 404
+
+
+def test_no_summary_without_llm(client, monkeypatch):
+    monkeypatch.setattr(llm_summary, "OPENAI_API_KEY", None)
+    result = _predict(client)
+    assert "summary_id" not in result
@@ -0,0 +1,22 @@
+"""The /api/metrics endpoints."""
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app().test_client()
+
+
+@pytest.mark.parametrize("body", [[1], "x", 5])
+def test_profile_rejects_non_object_body(client, body):
+    r = client.post("/api/metrics/profile", json=body)
+    assert r.status_code == 400
+    assert "error" in r.get_json()
+
+
+def test_profile_status(client):
+    r = client.post("/api/metrics/profile", json={"enabled": False})
+    assert r.status_code == 200
+    assert client.get("/api/metrics/profile?format=json").status_code == 200
@@ -0,0 +1,43 @@
+"""Training the heart-risk artifact on src/heart.csv with prior coefficients for unmapped features."""
+import os
+
+import numpy as np
+import pytest
+
+from services.heart_risk_model import FEATURE_NAMES, fit_synthetic
+from services.model_training import HEART_CSV_COLUMN_MAP, build_artifact, mapped_features
+from services.risk_scorer import check_live_features
+
+HEART_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "heart.csv")
+
+
+@pytest.fixture(scope="module")
+def prior():
+    return fit_synthetic()
+
+
+@pytest.fixture(scope="module")
+def artifact(prior):
+    return build_artifact(HEART_CSV, version="test", folds=3, n_jobs=1, prior=prior)
+
+
+def test_heart_csv_trains_in_clinical_direction(artifact):
+    assert artifact.metadata["sign_warnings"] == []
+    assert artifact.metadata["mapped_features"] == mapped_features(HEART_CSV_COLUMN_MAP)
+    assert artifact.metadata["scores"]["roc_auc_mean"] > 0.7
+    check_live_features(artifact)
+
+
+def test_unmapped_features_keep_prior_coefficients(artifact, prior):
+    unmapped = [i for i, name in enumerate(FEATURE_NAMES) if name not in HEART_CSV_COLUMN_MAP]
+    assert artifact.metadata["prior_features"] == [FEATURE_NAMES[i] for i in unmapped]
+    assert artifact.metadata["prior_version"] == prior.version
+    assert np.array_equal(artifact.coef[unmapped], prior.coef[unmapped])
+    assert np.array_equal(artifact.mean[unmapped], prior.mean[unmapped])
+    assert np.all(artifact.coef != 0)
+
+
+def test_prior_terms_vanish_at_prior_mean(artifact):
+    row = artifact.mean.copy()
+    trained_only = 1 / (1 + np.exp(-artifact.intercept))
+    assert artifact.predict_proba_matrix(row[None, :])[0] == pytest.approx(trained_only)
@@ -0,0 +1,85 @@
+"""respond() format negotiation and response compression (routes/responses.py)."""
+import gzip
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from routes.responses import install_responses, respond
+from services.encoding import brotli, dumps_json, loads_json, msgpack
+
+ROWS = [{"patientId": f"p{i}", "heartRate": 60 + i % 40, "note": "steady " * 4} for i in range(100)]
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = Flask(__name__)
+    install_responses(app)
+
+    @app.route("/rows")
+    def rows():
+        return respond(lambda: ROWS, raw=lambda: [dumps_json(r) for r in ROWS])
+
+    @app.route("/columns")
+    def columns():
+        return respond(lambda: ROWS, columns=lambda: {"heartRate": np.array([72.0, np.nan])})
+
+    @app.route("/small")
+    def small():
+        return respond(lambda: ROWS[:1])
+
+    return app.test_client()
+
+
+def test_plain_json_splices_raw_rows(client):
+    r = client.get("/rows", headers={"Accept-Encoding": "identity"})
+    assert r.mimetype == "application/json"
+    assert "Content-Encoding" not in r.headers
+    assert loads_json(r.data) == ROWS
+
+
+def test_columnar_layout(client):
+    assert loads_json(client.get("/columns?format=columnar").data) == {"heartRate": [72.0, None]}
+    pivoted = loads_json(client.get("/rows?format=columnar").data)
+    assert pivoted["patientId"] == [r["patientId"] for r in ROWS]
+
+
+def test_unknown_format_is_400(client):
+    assert client.get("/rows?format=xml").status_code == 400
+
+
+@pytest.mark.skipif(msgpack is None, reason="msgpack not installed")
+@pytest.mark.parametrize("query, headers", [
+    ("?format=msgpack", {}),
+    ("", {"Accept": "application/msgpack"}),
+    ("", {"Accept": "application/json;q=0.5, application/x-msgpack"}),
+])
+def test_msgpack_negotiation(client, query, headers):
+    r = client.get("/rows" + query, headers={"Accept-Encoding": "identity", **headers})
+    assert r.mimetype == "application/msgpack"
+    assert msgpack.unpackb(r.data, raw=False) == ROWS
+
+
+def test_json_preferred_over_msgpack_by_quality(client):
+    r = client.get("/rows", headers={"Accept": "application/json, application/msgpack;q=0.5"})
+    assert r.mimetype == "application/json"
+
+
+def test_gzip_when_accepted(client):
+    r = client.get("/rows", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["Vary"]
+    assert loads_json(gzip.decompress(r.data)) == ROWS
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli not installed")
+def test_brotli_preferred_when_accepted(client):
+    r = client.get("/rows", headers={"Accept-Encoding": "gzip, br"})
+    assert r.headers["Content-Encoding"] == "br"
+    assert loads_json(brotli.decompress(r.data)) == ROWS
+
+
+def test_small_bodies_are_not_compressed(client):
+    r = client.get("/small", headers={"Accept-Encoding": "gzip, br"})
+    assert "Content-Encoding" not in r.headers
+    assert loads_json(r.data) == ROWS[:1]
@@ -0,0 +1,95 @@
+"""Threshold profile compilation and the /api/thresholds routes."""
+import random
+
+import numpy as np
+import pytest
+
+from app import create_app
+from services.threshold_profiles import DEFAULT_THRESHOLDS, THRESHOLD_KEYS, ThresholdProfiles
+
+
+@pytest.fixture(scope="module")
+def client():
+    return create_app().test_client()
+
+
+@pytest.mark.parametrize("path", ["/api/thresholds", "/api/thresholds/patients", "/api/thresholds/cohorts/icu/patients"])
+def test_non_object_body_is_400(client, path):
+    r = client.put(path, json=[{"heartRateHigh": 130}])
+    assert r.status_code == 400
+    assert "error" in r.get_json()
+
+
+def test_patient_override_round_trip(client):
+    r = client.put("/api/thresholds?patient_id=t-1", json={"heartRateHigh": 135})
+    assert r.status_code == 200
+    assert r.get_json()["heartRateHigh"] == 135
+    client.delete("/api/thresholds?patient_id=t-1")
+    assert client.get("/api/thresholds?patient_id=t-1").get_json()["heartRateHigh"] == 120
+
+
+def _expected(profiles: ThresholdProfiles, pid: str) -> dict:
+    resolved = dict(profiles._defaults)
+    resolved.update(profiles._cohorts.get(profiles.cohort_of(pid), {}))
+    resolved.update(profiles._patient_overrides.get(pid, {}))
+    return resolved
+
+
+def _check(profiles: ThresholdProfiles, pids: list):
+    table = profiles.table
+    for pid in pids:
+        assert dict(table.for_patient(pid)) == _expected(profiles, pid), pid
+    batch = table.batch_thresholds(pids)
+    for j, key in enumerate(THRESHOLD_KEYS):
+        assert batch[key].tolist() == [_expected(profiles, pid)[key] for pid in pids]
+    assert len(table) == len(profiles._patient_cohort.keys() | profiles._patient_overrides.keys())
+
+
+def test_incremental_updates_match_full_resolution(monkeypatch):
+    monkeypatch.setattr(ThresholdProfiles, "MIN_DEAD_ROWS", 8)
+    monkeypatch.setattr(ThresholdProfiles, "MAX_PATIENT_DELTA", 16)
+    rng = random.Random(0)
+    pids = [f"p{i}" for i in range(60)]
+    profiles = ThresholdProfiles()
+    for step in range(400):
+        op = rng.randrange(6)
+        if op == 0:
+            profiles.set_patient(rng.choice(pids), {rng.choice(THRESHOLD_KEYS): rng.randrange(40, 200)})
+        elif op == 1:
+            profiles.set_patients({pid: {"spo2Low": rng.randrange(85, 95)} for pid in rng.sample(pids, 20)})
+        elif op == 2:
+            profiles.clear_patient(rng.choice(pids))
+        elif op == 3:
+            profiles.assign_cohort(rng.sample(pids, 5), rng.choice(["a", "b", None]))
+        elif op == 4:
+            profiles.set_cohort(rng.choice(["a", "b"]), {rng.choice(THRESHOLD_KEYS): rng.randrange(40, 200)})
+        elif step % 50 == 0:
+            profiles.set_defaults({"heartRateHigh": rng.randrange(100, 140)})
+        else:
+            profiles.delete_cohort(rng.choice(["a", "b"]))
+        _check(profiles, pids + ["unknown"])
+    assert profiles.table.version == 401
+
+
+def test_published_tables_are_not_changed_by_later_updates():
+    profiles = ThresholdProfiles()
+    profiles.set_patient("p1", {"heartRateHigh": 130})
+    before = profiles.table
+    matrix = before.matrix.copy()
+    for i in range(200):
+        profiles.set_patient(f"q{i}", {"heartRateHigh": 200 + i})
+    profiles.set_patient("p1", {"heartRateHigh": 99})
+    assert before.for_patient("p1")["heartRateHigh"] == 130
+    assert before.for_patient("q5") == before.defaults
+    assert np.array_equal(before.matrix, matrix)
+    assert profiles.table.for_patient("p1")["heartRateHigh"] == 99
+
+
+def test_unreferenced_rows_are_compacted(monkeypatch):
+    monkeypatch.setattr(ThresholdProfiles, "MIN_DEAD_ROWS", 10)
+    profiles = ThresholdProfiles()
+    for value in range(100):
+        profiles.set_patient("p1", {"heartRateHigh": value})
+    assert len(profiles.table.matrix) <= 2 + 10 + 1
+    assert profiles.table.for_patient("p1")["heartRateHigh"] == 99
+    assert profiles.table.defaults == DEFAULT_THRESHOLDS
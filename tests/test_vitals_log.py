@@ -0,0 +1,51 @@
+"""VitalsLog range reads over segments holding late (out-of-order) readings."""
+import pytest
+
+from services.vitals_log import VitalsLog
+
+
+def _reading(ts, heart_rate=80):
+    return {"timestamp": ts, "heartRate": heart_rate, "systolic": 120, "diastolic": 80,
+            "bloodOxygen": 98, "temperature": 36.8, "respiratoryRate": 16}
+
+
+@pytest.fixture
+def log(tmp_path):
+    return VitalsLog(str(tmp_path), segment_records=4)
+
+
+def _write(log, *timestamps):
+    for ts in timestamps:
+        log.append("p1", _reading(ts, heart_rate=ts // 100))
+    log.flush()
+
+
+def test_late_readings_within_a_segment(log):
+    _write(log, 5000, 1000, 3000)
+    ts, values = log.read_range("p1", 0, 4000)
+    assert ts.tolist() == [1000, 3000]
+    assert values[0].tolist() == [10, 30]  # heartRate travels with its timestamp
+    assert log.oldest("p1") == 1000
+    assert log.read_range("p1", limit=1)[0].tolist() == [5000]
+
+
+def test_late_readings_across_segments(log):
+    _write(log, 4000, 5000, 6000, 7000, 1000, 8000, 2000)  # second segment: 1000, 8000, 2000
+    assert log.read_range("p1")[0].tolist() == [1000, 2000, 4000, 5000, 6000, 7000, 8000]
+    assert log.read_range("p1", 0, 4500)[0].tolist() == [1000, 2000, 4000]
+    assert log.read_range("p1", 4500, None, limit=3)[0].tolist() == [6000, 7000, 8000]
+    assert log.oldest("p1") == 1000
+
+
+def test_late_reading_after_bounds_are_cached(log):
+    _write(log, 1000, 2000)
+    assert log.read_range("p1", 0, 1500)[0].tolist() == [1000]
+    _write(log, 500)  # same segment, now unsorted
+    assert log.read_range("p1", 0, 1500)[0].tolist() == [500, 1000]
+    assert log.oldest("p1") == 500
+
+
+def test_sorted_segments_outside_range_are_skipped(log):
+    _write(log, *range(1000, 13000, 1000))
+    assert log.read_range("p1", 5500, 7500)[0].tolist() == [6000, 7000]
+    assert log.read_range("p1", 20000, None)[0].tolist() == []
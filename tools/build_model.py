@@ -0,0 +1,62 @@
+"""
+Build the heart-risk model artifact offline.
+
+    python -m tools.build_model --synthetic [--out models/heart_risk.json]
+    python -m tools.build_model --data train.csv --out models/candidate.json
+
+    python -m tools.build_model --data src/heart.csv --jobs 1
+
+Features the data has no column for keep the synthetic model's coefficients
+(src/heart.csv covers 6 of the 14). Coefficients that are zero or point
+against a feature's clinical direction are printed as warnings.
+"""
+import argparse
+import json
+import sys
+
+from services.heart_risk_model import MODEL_PATH, coefficient_sign_warnings, fit_synthetic
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the heart-risk model artifact")
+    parser.add_argument("--out", default=MODEL_PATH, help="artifact path (default: %(default)s)")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data", help="tabular training data (UCI heart.csv layout)")
+    source.add_argument("--synthetic", action="store_true", help="fit on generated synthetic rows")
+    parser.add_argument("--positive", type=int, help="target value meaning disease (default: heart.csv's 0)")
+    parser.add_argument("--sep", default="\t", help="field separator for --data (default: tab)")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="rows per read chunk")
+    parser.add_argument("--folds", type=int, default=5, help="cross-validation folds")
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel CV jobs (-1 = all cores)")
+    parser.add_argument("--version", help="artifact version (default: <data file>-<date>)")
+    parser.add_argument("--samples", type=int, default=800, help="synthetic training rows")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        artifact = fit_synthetic(n_samples=args.samples, seed=args.seed)
+    else:
+        from services.model_training import HEART_CSV_POSITIVE, build_artifact
+
+        artifact = build_artifact(
+            args.data,
+            version=args.version,
+            positive=HEART_CSV_POSITIVE if args.positive is None else args.positive,
+            sep=args.sep,
+            chunksize=args.chunksize,
+            folds=args.folds,
+            n_jobs=args.jobs,
+        )
+    artifact.save(args.out)
+    print(f"Wrote model {artifact.version} ({len(artifact.feature_names)} features) to {args.out}")
+    if artifact.metadata.get("prior_features"):
+        print(f"Prior ({artifact.metadata['prior_version']}) coefficients for: "
+              f"{', '.join(artifact.metadata['prior_features'])}")
+    for warning in coefficient_sign_warnings(artifact):
+        print(f"warning: {warning}", file=sys.stderr)
+    if "scores" in artifact.metadata:
+        print(json.dumps(artifact.metadata["scores"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
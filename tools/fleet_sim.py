@@ -0,0 +1,108 @@
+"""
+Fleet simulator CLI for capacity planning: N virtual patients driving either
+the in-process ingest pipeline or a running server's POST /api/vitals/ingest.
+
+    python -m tools.fleet_sim --patients 10000 --rate 1 --duration 60 --seed 7
+    python -m tools.fleet_sim --patients 10000 --speed 0 --duration 300          # as fast as possible
+    python -m tools.fleet_sim --url http://127.0.0.1:4000 --patients 2000 --format msgpack
+
+In real time (--speed 1) the report's max lag shows whether the target keeps up.
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.fleet_simulator import DEFAULT_ANOMALY_RATE, DEFAULT_RATE_HZ, EPISODE_KINDS, FleetSimulator
+from services.ingest import MAX_INGEST_BATCH
+from tools.ingest_load import CONTENT_TYPES, IngestClient, encode
+
+
+def run_http(sim: FleetSimulator, url: str, duration: float, tick: float, speed: float,
+             batch: int, workers: int, fmt: str) -> dict:
+    """Like FleetSimulator.run, but each tick is split into batches POSTed by a worker pool."""
+    local = threading.local()
+    clients = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def post(body: bytes):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = IngestClient(url, fmt)
+            with lock:
+                clients.append(client)
+        try:
+            status, _ = client.send(body)
+        except OSError:
+            status = 0
+        if status != 200:
+            with lock:
+                errors[0] += 1
+
+    sim_start = sim.now_ms
+    wall_start = time.perf_counter()
+    sent, requests, max_lag, t = 0, 0, 0.0, sim_start
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while t - sim_start < duration * 1000:
+            t += int(tick * 1000)
+            block = sim.advance(t)
+            cols = block.to_columns()
+            futures = []
+            for lo in range(0, len(block), batch):
+                chunk = {k: v[lo:lo + batch] for k, v in cols.items()}
+                futures.append(pool.submit(post, encode(chunk, fmt)))
+            for f in futures:
+                f.result()
+            sent += len(block)
+            requests += len(futures)
+            if speed:
+                lag = time.perf_counter() - (wall_start + (t - sim_start) / 1000.0 / speed)
+                max_lag = max(max_lag, lag)
+                if lag < 0:
+                    time.sleep(-lag)
+    for client in clients:
+        client.close()
+    wall = time.perf_counter() - wall_start
+    return {
+        "patients": sim.n_patients,
+        "readings": sent,
+        "requests": requests,
+        "errors": errors[0],
+        "simulated_s": (t - sim_start) / 1000.0,
+        "wall_s": wall,
+        "readings_per_s": sent / wall if wall else 0.0,
+        "max_lag_s": max_lag,
+        "episodes_started": dict(zip(EPISODE_KINDS, sim.episodes_started.tolist())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate N patients against the ingest pipeline")
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE_HZ, help="readings per patient per second")
+    parser.add_argument("--anomaly-rate", type=float, default=DEFAULT_ANOMALY_RATE,
+                        help="anomaly episodes per patient per day")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--duration", type=float, default=30.0, help="simulated seconds")
+    parser.add_argument("--tick", type=float, default=1.0, help="simulated seconds per block")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression; 0 = as fast as possible")
+    parser.add_argument("--url", default=None, help="drive a server's ingest endpoint instead of in-process")
+    parser.add_argument("--batch", type=int, default=1000, help="readings per HTTP request")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent HTTP requests")
+    parser.add_argument("--format", choices=sorted(CONTENT_TYPES), default="columnar")
+    args = parser.parse_args()
+
+    sim = FleetSimulator(args.patients, rate_hz=args.rate, seed=args.seed, anomaly_rate=args.anomaly_rate)
+    if args.url:
+        result = run_http(sim, args.url, args.duration, args.tick, args.speed,
+                          min(args.batch, MAX_INGEST_BATCH), args.workers, args.format)
+    else:
+        from services.ingest import ingest_pipeline
+        result = sim.run(ingest_pipeline, duration=args.duration, tick=args.tick, speed=args.speed)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
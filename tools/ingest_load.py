@@ -0,0 +1,176 @@
+"""
+Load-test harness for POST /api/vitals/ingest. Worker threads send batches of
+synthetic readings over keep-alive connections at a target request rate and
+report throughput and latency percentiles.
+
+    python -m tools.ingest_load --url http://127.0.0.1:4000 --rate 50 --batch 500 --duration 30
+    python -m tools.ingest_load --in-process --format msgpack --batch 1000
+
+--rate 0 sends as fast as the workers can.
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from services.vitals_store import VITAL_FIELDS
+
+INGEST_PATH = "/api/vitals/ingest"
+CONTENT_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "msgpack": "application/msgpack",
+    "columnar": "application/json",
+}
+
+
+def synthetic_columns(n: int, n_patients: int, rng: np.random.Generator) -> dict:
+    """Plausible, mostly in-range readings for n random patients, stamped now, as columns."""
+    now = int(time.time() * 1000)
+    return {
+        "patientId": [f"load-{i}" for i in rng.integers(0, n_patients, size=n).tolist()],
+        "timestamp": [now] * n,
+        "heartRate": rng.integers(55, 115, size=n).tolist(),
+        "systolic": rng.integers(100, 150, size=n).tolist(),
+        "diastolic": rng.integers(62, 95, size=n).tolist(),
+        "bloodOxygen": rng.integers(93, 101, size=n).tolist(),
+        "temperature": np.round(rng.uniform(36.0, 37.8, size=n), 1).tolist(),
+        "respiratoryRate": rng.integers(10, 24, size=n).tolist(),
+    }
+
+
+def encode(columns: dict, fmt: str) -> bytes:
+    """Serialise a columnar batch in one of the ingest wire formats."""
+    if fmt == "columnar":
+        return json.dumps(columns).encode()
+    if fmt == "msgpack":
+        import msgpack
+        return msgpack.packb(columns)
+    keys = ("patientId", "timestamp") + VITAL_FIELDS
+    rows = [dict(zip(keys, values)) for values in zip(*(columns[k] for k in keys))]
+    if fmt == "ndjson":
+        return "\n".join(json.dumps(r) for r in rows).encode()
+    return json.dumps(rows).encode()
+
+
+class IngestClient:
+    """One keep-alive connection to a server, or a Flask test client when url is None."""
+
+    def __init__(self, url: str | None, fmt: str = "json"):
+        self.fmt = fmt
+        self._content_type = CONTENT_TYPES[fmt]
+        if url is None:
+            from app import app
+            self._test_client = app.test_client()
+            self._conn = None
+        else:
+            parts = urlsplit(url)
+            self._test_client = None
+            self._conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+
+    def send(self, body: bytes) -> tuple[int, dict]:
+        if self._test_client is not None:
+            r = self._test_client.post(INGEST_PATH, data=body, content_type=self._content_type)
+            return r.status_code, r.get_json() or {}
+        try:
+            self._conn.request("POST", INGEST_PATH, body=body, headers={"Content-Type": self._content_type})
+            r = self._conn.getresponse()
+        except (OSError, http.client.HTTPException):
+            self._conn.close()  # reconnect on the next request
+            raise
+        data = r.read()
+        return r.status, json.loads(data) if data else {}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+def run(url: str | None, rate: float, batch: int, duration: float, workers: int,
+        n_patients: int, fmt: str, seed: int = 0) -> dict:
+    """Drive the endpoint for duration seconds; rate is requests/s across all workers (0 = unthrottled)."""
+    rng = np.random.default_rng(seed)
+    # pre-encode a pool of bodies so payload building never limits the send rate
+    bodies = [encode(synthetic_columns(batch, n_patients, rng), fmt) for _ in range(16)]
+    latencies, errors, accepted = [], [0], [0]
+    lock = threading.Lock()
+    interval = workers / rate if rate > 0 else 0.0
+    deadline = time.perf_counter() + duration
+
+    def worker(k: int):
+        client = IngestClient(url, fmt)
+        next_send = time.perf_counter() + (interval * k / workers)
+        i = k
+        try:
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if interval and now < next_send:
+                    time.sleep(min(next_send - now, deadline - now))
+                    continue
+                next_send += interval
+                t0 = time.perf_counter()
+                try:
+                    status, result = client.send(bodies[i % len(bodies)])
+                except (OSError, http.client.HTTPException):
+                    status, result = 0, {}
+                elapsed = time.perf_counter() - t0
+                i += workers
+                with lock:
+                    latencies.append(elapsed)
+                    if status != 200:
+                        errors[0] += 1
+                    accepted[0] += result.get("accepted", 0)
+        finally:
+            client.close()
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(k,), daemon=True) for k in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    lat = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "readings_accepted": accepted[0],
+        "requests_per_s": len(latencies) / wall,
+        "readings_per_s": accepted[0] / wall,
+        "latency_ms": {f"p{q}": float(np.percentile(lat, q)) for q in (50, 95, 99)} | {"max": float(lat.max())},
+        "body_bytes": len(bodies[0]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test POST /api/vitals/ingest")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://127.0.0.1:4000", help="server base URL")
+    target.add_argument("--in-process", action="store_true", help="use the Flask test client instead of HTTP")
+    parser.add_argument("--rate", type=float, default=20.0, help="requests per second (0 = unthrottled)")
+    parser.add_argument("--batch", type=int, default=500, help="readings per request")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--format", choices=sorted(CONTENT_TYPES), default="json")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args()
+    result = run(None if args.in_process else args.url, args.rate, args.batch, args.duration,
+                 args.workers, args.patients, args.format)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    lat = result["latency_ms"]
+    print(f"{result['requests']} requests ({result['errors']} errors), {result['body_bytes']:,} B/request")
+    print(f"{result['requests_per_s']:,.1f} req/s, {result['readings_per_s']:,.0f} readings/s")
+    print(f"latency ms: p50 {lat['p50']:.1f}  p95 {lat['p95']:.1f}  p99 {lat['p99']:.1f}  max {lat['max']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Local stand-in for an OpenAI-compatible chat completions server, for exercising
+the async LLM summary path without network access.
+
+    python -m tools.openai_stub --port 9200 --delay 0.5
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:9200/v1 ./run.sh
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+STUB_REPLY = (
+    "Your result suggests a risk level worth keeping an eye on. "
+    "Please discuss it with your doctor before making any health decisions."
+)
+
+
+class OpenAIStub:
+    """Answers POST /v1/chat/completions with a canned reply after `delay` seconds."""
+
+    def __init__(self, port: int = 0, delay: float = 0.0, reply: str = STUB_REPLY, status: int = 200):
+        self.delay = delay
+        self.reply = reply
+        self.status = status
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like a real provider
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                stub.requests += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    return self._send(404, {"error": {"message": "not found"}})
+                if stub.status != 200:
+                    return self._send(stub.status, {"error": {"message": "stub failure"}})
+                self._send(200, {
+                    "id": f"chatcmpl-stub-{stub.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": stub.reply},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                })
+
+            def _send(self, status: int, payload: dict):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._thread: Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "OpenAIStub":
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    args = parser.parse_args()
+    stub = OpenAIStub(port=args.port, delay=args.delay)
+    print(f"OpenAI stub listening on {stub.base_url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
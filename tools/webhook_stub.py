@@ -0,0 +1,69 @@
+"""
+Local stand-in for an emergency webhook receiver. Records every JSON POST and
+can be told to fail the next N requests to exercise dispatcher retries.
+
+    python -m tools.webhook_stub --port 9100
+    EMERGENCY_WEBHOOK_URL=http://127.0.0.1:9100/ ./run.sh
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+
+
+class WebhookStub:
+    """In-process webhook receiver on 127.0.0.1; use .url as a WebhookSink target."""
+
+    def __init__(self, port: int = 0, fail_next: int = 0):
+        self.received: list = []
+        self.fail_next = fail_next
+        self._lock = Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._lock:
+                    fail = stub.fail_next > 0
+                    if fail:
+                        stub.fail_next -= 1
+                    else:
+                        stub.received.append(json.loads(body or b"null"))
+                self.send_response(503 if fail else 204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._thread: Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "WebhookStub":
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local emergency webhook stand-in")
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+    stub = WebhookStub(port=args.port)
+    print(f"Webhook stub listening on {stub.url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()